@@ -57,8 +57,11 @@ CREATE TABLE IF NOT EXISTS project.search_history (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
--- Index to accelerate searches by user
-CREATE INDEX IF NOT EXISTS search_history_user_id_idx ON project.search_history(user_id);
+-- Index serving the history pages of a user in order (keyset pagination);
+-- it also covers lookups by user_id alone
+CREATE INDEX IF NOT EXISTS search_history_user_created_idx
+    ON project.search_history(user_id, created_at DESC, id DESC);
+DROP INDEX IF EXISTS project.search_history_user_id_idx;
 
 --------------------------------------------------------------
 -- Function to automatically update updated_at
@@ -6,6 +6,9 @@ CREATE SCHEMA project;
 --------------------------------------------------------------
 CREATE EXTENSION IF NOT EXISTS vector;
 
+-- Trigram indexes for substring searches on card names
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
 --------------------------------------------------------------
 -- Attack Types
 --------------------------------------------------------------
@@ -57,17 +60,14 @@ CREATE TABLE project.cards (
     rulings JSONB,                        -- rulings
     related_cards JSONB,                  -- relatedCards
     leadership_skills JSONB,              -- leadershipSkills
-    embedding_of_text vector(1024)        -- embedding vector (pgvector)
+    embedding_of_text vector(1024),       -- embedding vector (pgvector)
+    text_hash TEXT,                       -- md5 of the text that was embedded
+    embedding_model TEXT                  -- model that produced the embedding
 );
 
 --------------------------------------------------------------
--- Index to accelerate semantic searches
+-- Indexes
 --------------------------------------------------------------
-CREATE INDEX IF NOT EXISTS cards_embedding_idx 
-ON project.cards 
-USING ivfflat (embedding_of_text vector_cosine_ops)
-WITH (lists = 100);
-
--- Index for name searches
-CREATE INDEX IF NOT EXISTS cards_name_idx
-ON project.cards (name);
\ No newline at end of file
+-- None here: secondary indexes (init_db_indexes.sql) and vector indexes
+-- (dao/vector_index_dao.py) are built once the cards are loaded, which is
+-- faster than updating them row by row during the COPY
@@ -0,0 +1,40 @@
+--------------------------------------------------------------
+-- Secondary indexes of the cards, built after the bulk load
+-- (utils/reset_all_the_database.py). The vector indexes are built by
+-- dao/vector_index_dao.py, so that their parameters match the data and
+-- IVFFlat trains on real vectors
+--------------------------------------------------------------
+
+-- Index for name searches
+CREATE INDEX IF NOT EXISTS cards_name_idx
+ON project.cards (name);
+
+-- Substring searches (LIKE '%...%') on names, case insensitive
+CREATE INDEX IF NOT EXISTS cards_name_trgm_idx
+ON project.cards USING GIN (lower(name) gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS cards_ascii_name_trgm_idx
+ON project.cards USING GIN (lower(ascii_name) gin_trgm_ops);
+
+--------------------------------------------------------------
+-- Indexes for the structured filters of hybrid searches
+--------------------------------------------------------------
+-- Array containment (@>, <@) and JSONB containment use GIN
+CREATE INDEX IF NOT EXISTS cards_colors_idx
+ON project.cards USING GIN (colors);
+
+CREATE INDEX IF NOT EXISTS cards_color_identity_idx
+ON project.cards USING GIN (color_identity);
+
+CREATE INDEX IF NOT EXISTS cards_types_idx
+ON project.cards USING GIN (types);
+
+CREATE INDEX IF NOT EXISTS cards_keywords_idx
+ON project.cards USING GIN (keywords);
+
+CREATE INDEX IF NOT EXISTS cards_legalities_idx
+ON project.cards USING GIN (legalities jsonb_path_ops);
+
+-- Range filter on the mana value
+CREATE INDEX IF NOT EXISTS cards_mana_value_idx
+ON project.cards (mana_value);
@@ -1,18 +1,45 @@
 import logging
 import os
 
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Query
 from fastapi.responses import RedirectResponse
 from pydantic import BaseModel, EmailStr
 from typing import Optional
+import requests
 import uvicorn
 
+from business_object.card_filter import CardFilter
 from service.card_service import CardService
 from service.user_service import UserService
 from service.favorite_service import FavoriteService
 from service.historical_service import HistoricalService
+from service.stats_service import StatsService
+from service.history_writer import close_history_writer, loaded_history_writer
 from utils.log_init import initialize_logs
-from technical_components.embedding.ollama_embedding import get_embedding
+from utils.async_runner import run_sync, shutdown_executor
+from dao.db_connection import DBConnection
+from technical_components.embedding.reembedding_queue import close_reembedding_queue
+from technical_components.search.in_memory_search import (
+    get_search_engine,
+    loaded_search_engine,
+    search_engine_enabled,
+    search_engine_refresher,
+)
+from technical_components.search.name_index import (
+    get_name_index,
+    loaded_name_index,
+    name_index_refresher,
+)
+from technical_components.search.refresher import stop_refreshers
+from technical_components.embedding.embedding_client import (
+    CircuitOpenError,
+    EmbeddingBackendError,
+)
+from technical_components.embedding.ollama_embedding import (
+    get_embedding,
+    get_embedding_batcher,
+    get_embedding_cache,
+)
 from utils.auth import (
     create_access_token,
     Token,
@@ -32,6 +59,41 @@ card_service = CardService()
 user_service = UserService()
 favorite_service = FavoriteService()
 historical_service = HistoricalService()
+stats_service = StatsService()
+
+
+@app.on_event("startup")
+async def load_search_engine():
+    """Load the in-memory search engine up front (SEARCH_ENGINE=memory)"""
+    if search_engine_enabled():
+        await run_sync(get_search_engine)
+
+
+@app.on_event("startup")
+async def load_name_index():
+    """Build the name index used by /card/suggest"""
+    try:
+        await run_sync(get_name_index)
+    except Exception as e:
+        logging.warning(f"Name index not loaded, built on first suggestion: {e}")
+
+
+@app.on_event("shutdown")
+def release_resources():
+    """Stop the I/O thread pool and close the database connections"""
+    shutdown_executor()
+    stop_refreshers()
+    close_reembedding_queue()
+    close_history_writer()
+    DBConnection.close_if_open()
+
+
+def embedding_backend_http_error(error: Exception) -> HTTPException:
+    """503 while the embedding backend is known to be down, 502 for its faults"""
+    logging.error(f"Embedding backend error: {error}")
+    if isinstance(error, CircuitOpenError):
+        return HTTPException(status_code=503, detail=str(error))
+    return HTTPException(status_code=502, detail=f"Embedding backend error: {error}")
 
 
 # ==================== PYDANTIC MODELS ====================
@@ -43,6 +105,23 @@ class CardModel(BaseModel):
     text: Optional[str] = None
 
 
+class HybridSearchModel(BaseModel):
+    """Pydantic model for a semantic search with structured filters"""
+
+    query: str
+    limit: int = 3
+    distance: str = "L2"
+    colors: Optional[list[str]] = None
+    color_identity: Optional[list[str]] = None
+    type: Optional[str] = None
+    mana_value_min: Optional[float] = None
+    mana_value_max: Optional[float] = None
+    legal_in: Optional[str] = None
+    keywords: Optional[list[str]] = None
+    exclude_ids: Optional[list[int]] = None
+    exclude_favorites: bool = False
+
+
 class UserModel(BaseModel):
     """Pydantic model for users"""
 
@@ -79,17 +158,48 @@ async def redirect_to_docs():
 async def random_card():
     """Get a random card"""
     logging.info("Searching for a random card")
-    result = card_service.random()
+    result = await run_sync(card_service.random)
     if not result:
         raise HTTPException(status_code=404, detail="No card found")
     return result
 
 
+@app.get("/card/random_sample", response_model=list[CardModel], tags=["Cards"])
+async def random_cards(n: int = 5):
+    """Get `n` distinct random cards (1 to 100)"""
+    logging.info(f"Drawing {n} random cards")
+    try:
+        result = await run_sync(card_service.random_cards, n)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not result:
+        raise HTTPException(status_code=404, detail="No card found")
+    return result
+
+
+@app.get("/card/suggest", tags=["Cards"])
+async def suggest_card_names(prefix: str, limit: int = 10, fuzzy: bool = True):
+    """
+    Card names for typeahead, answered from memory (no database query)
+
+    Names starting with `prefix` come first, then names with a later word
+    starting with it; with `fuzzy`, close names are returned when nothing
+    matches.
+    """
+    if loaded_name_index() is None:
+        # First use: the index is built from the database
+        suggestions = await run_sync(card_service.suggest_names, prefix, limit, fuzzy)
+    else:
+        # Microseconds of CPU work: run inline rather than in the thread pool
+        suggestions = card_service.suggest_names(prefix, limit, fuzzy)
+    return [{"id": card_id, "name": name} for card_id, name in suggestions]
+
+
 @app.get("/card/name/{name}", response_model=list[CardModel], tags=["Cards"])
-async def search_by_name(name: str):
-    """Search for cards by name"""
-    logging.info(f"Searching for cards by name: {name}")
-    result = card_service.search_by_name(name)
+async def search_by_name(name: str, limit: int = 20):
+    """Search for cards by name, closest names first"""
+    logging.info(f"Searching for cards by name: {name} (limit={limit})")
+    result = await run_sync(card_service.search_by_name, name, limit)
     if not result:
         raise HTTPException(status_code=404, detail=f"No card found for name: {name}")
     return result
@@ -99,55 +209,19 @@ async def search_by_name(name: str):
 async def describe_by_id(id: int):
     """Get detailed description of a card by ID"""
     logging.info(f"Searching for card by ID: {id}")
-    result = card_service.describe_card(id)
+    result = await run_sync(card_service.describe_card, id)
     if not result:
         raise HTTPException(status_code=404, detail=f"No card found for ID: {id}")
     return {"id": id, "description": result}
 
 
-@app.post("/card/semantic_search_with_L2_distance/", tags=["Cards"])
-async def semantic_search_l2(query: str, limit: int = 3):
-    """Semantic search for cards with L2 distance"""
-    logging.info(f"L2 semantic search with: {query} (limit={limit})")
-    result = card_service.semantic_search(query, limit)
-    if not result:
-        raise HTTPException(status_code=404, detail="No matching card found")
-    return [
-        {
-            "id": card.id,
-            "name": card.name,
-            "text": card.text,
-            "similarity": similarity,
-        }
-        for card, similarity in result
-    ]
-
-
-@app.post("/card/semantic_search_with_cosine_distance/", tags=["Cards"])
-async def semantic_search_cosine(query: str, limit: int = 3):
-    """Semantic search for cards with cosine distance"""
-    logging.info(f"Cosine semantic search with: {query} (limit={limit})")
-    result = card_service.semantic_search(query, limit, "cosine")
-    if not result:
-        raise HTTPException(status_code=404, detail="No matching card found")
-    return [
-        {
-            "id": card.id,
-            "name": card.name,
-            "text": card.text,
-            "similarity": similarity,
-        }
-        for card, similarity in result
-    ]
-
-
 @app.post("/card/{name}/{text}", tags=["game_designer"])
 async def create_card(
     name: str, text: str, current_user: TokenData = Depends(require_game_designer)
 ):
     """Create a new card (requires game_designer role)"""
     logging.info(f"Creating card: {name} by {current_user.email}")
-    success = card_service.add_card(name, text)
+    success = await run_sync(card_service.add_card, name, text)
     if not success:
         raise HTTPException(status_code=500, detail="Error creating card")
     return {"message": f"Card '{name}' created successfully"}
@@ -161,10 +235,10 @@ async def update_card(
 ):
     """Update one or more fields of a card (requires game_designer role)"""
     logging.info(f"Updating card ID {card_id} by {current_user.email}")
-    card_object = card_service.find_by_id(card_id)
+    card_object = await run_sync(card_service.find_by_id, card_id)
     if not card_object:
         raise HTTPException(status_code=404, detail=f"Card with ID {card_id} not found")
-    success = card_service.modify_card(card_object, updates)
+    success = await run_sync(card_service.modify_card, card_object, updates)
     if not success:
         raise HTTPException(status_code=400, detail="One or more updates failed")
     return {
@@ -179,11 +253,11 @@ async def delete_card(
 ):
     """Delete a card (requires game_designer role)"""
     logging.info(f"Deleting card ID {card_id} by {current_user.email}")
-    card_object = card_service.find_by_id(card_id)
+    card_object = await run_sync(card_service.find_by_id, card_id)
     if not card_object:
         raise HTTPException(status_code=404, detail=f"Card with ID {card_id} not found")
     name = card_object.name
-    success = card_service.delete_card(card_object)
+    success = await run_sync(card_service.delete_card, card_object)
     if not success:
         raise HTTPException(status_code=500, detail="Error during deletion")
     return {"message": f"Card '{name}' (ID={card_id}) deleted successfully"}
@@ -198,7 +272,8 @@ async def register_client(user: UserModel):
     logging.info(f"Registering new client: {user.email}")
 
     # Force type to 'client' for public registration
-    success, message, created_user = user_service.create_account(
+    success, message, created_user = await run_sync(
+        user_service.create_account,
         email=user.email,
         password=user.password,
         first_name=user.first_name,
@@ -217,12 +292,12 @@ async def register_client(user: UserModel):
 async def login(email: str, password: str):
     """Log in a user and get a JWT token"""
     logging.info(f"Login attempt for: {email}")
-    success, message, session = user_service.login(email, password)
+    success, message, session = await run_sync(user_service.login, email, password)
     if not success:
         raise HTTPException(status_code=401, detail=message)
 
     # Get user information
-    user = user_service.find_by_email(email)
+    user = await run_sync(user_service.find_by_email, email)
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
 
@@ -245,7 +320,7 @@ async def get_my_profile(current_user: TokenData = Depends(require_authenticated
     """Get your own profile (requires authentication)"""
     logging.info(f"Fetching profile for {current_user.email}")
 
-    user = user_service.find_by_id(current_user.user_id)
+    user = await run_sync(user_service.find_by_id, current_user.user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -277,7 +352,8 @@ async def create_user_as_admin(
             detail=f"Invalid user type. Must be one of: {', '.join(valid_types)}",
         )
 
-    success, message, created_user = user_service.create_account(
+    success, message, created_user = await run_sync(
+        user_service.create_account,
         email=user.email,
         password=user.password,
         first_name=user.first_name,
@@ -309,7 +385,8 @@ async def update_user_as_admin(
     logging.info(f"Updating user ID {user_id} by admin: {current_user.email}")
 
     # Use service layer
-    success, message, updates = user_service.update_user(
+    success, message, updates = await run_sync(
+        user_service.update_user,
         user_id=user_id,
         user_type=user_type,
         is_active=is_active,
@@ -335,15 +412,18 @@ async def get_user_favorites_as_admin(
     """Get any user's favorites (admin only)"""
     logging.info(f"Admin {current_user.email} fetching favorites for user ID {user_id}")
 
-    user = user_service.find_by_id(user_id)
+    user = await run_sync(user_service.find_by_id, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    favorites = favorite_service.list_favorites(user_id)
+    favorites = await run_sync(favorite_service.list_favorites, user_id)
     return {
         "user_id": user_id,
         "user_email": user.email,
-        "favorites": favorites if favorites else [],
+        "favorites": [
+            CardModel(id=card.id, name=card.name, text=card.text)
+            for card in favorites or []
+        ],
     }
 
 
@@ -357,11 +437,13 @@ async def get_user_history_as_admin(
     """Get any user's search history (admin only)"""
     logging.info(f"Admin {current_user.email} fetching history for user ID {user_id}")
 
-    user = user_service.find_by_id(user_id)
+    user = await run_sync(user_service.find_by_id, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    history_data = historical_service.get_paginated_history(user_id, page, per_page)
+    history_data = await run_sync(
+        historical_service.get_paginated_history, user_id, page, per_page
+    )
 
     return {
         "user_id": user_id,
@@ -375,34 +457,43 @@ async def get_user_history_as_admin(
 
 
 @app.get("/admin/stats", tags=["Admin"])
-async def get_global_stats(current_user: TokenData = Depends(require_admin)):
-    """Get global platform statistics (admin only)"""
+async def get_global_stats(
+    refresh: bool = False, current_user: TokenData = Depends(require_admin)
+):
+    """Get global platform statistics (admin only, cached, `refresh` to recompute)"""
     logging.info(f"Admin {current_user.email} fetching global stats")
+    stats = await run_sync(stats_service.get_global_stats, refresh)
+    writer = loaded_history_writer()
+    return {**stats, "history_writer": writer.stats() if writer else None}
 
-    # Get all users
-    all_users = user_service.list_all_users()
 
-    # Count by user type
-    user_counts = {"client": 0, "game_designer": 0, "admin": 0}
-    active_users = 0
-    for user in all_users:
-        if hasattr(user, "user_type"):
-            user_counts[user.user_type] = user_counts.get(user.user_type, 0) + 1
-        if hasattr(user, "is_active") and user.is_active:
-            active_users += 1
+@app.get("/admin/embedding_cache", tags=["Admin"])
+async def get_embedding_cache_stats(current_user: TokenData = Depends(require_admin)):
+    """Get hit/miss counters of the query embedding cache (admin only)"""
+    logging.info(f"Admin {current_user.email} fetching embedding cache stats")
+    batcher = get_embedding_batcher()
+    return {
+        **get_embedding_cache().stats(),
+        "batching": batcher.stats() if batcher else None,
+    }
 
-    # Get total searches across all users
-    total_searches = 0
-    for user in all_users:
-        total_searches += historical_service.get_history_count(user.id)
 
+@app.get("/admin/search_engine", tags=["Admin"])
+async def get_search_engine_stats(current_user: TokenData = Depends(require_admin)):
+    """Get the state of the in-memory search engine (admin only)"""
+    logging.info(f"Admin {current_user.email} fetching search engine stats")
+    engine = loaded_search_engine()
+    name_index = loaded_name_index()
+    engine_refresher = search_engine_refresher()
+    index_refresher = name_index_refresher()
     return {
-        "users": {
-            "total": len(all_users),
-            "active": active_users,
-            "by_type": user_counts,
+        "enabled": search_engine_enabled(),
+        "engine": engine.stats() if engine else None,
+        "name_index": name_index.stats() if name_index else None,
+        "refresh": {
+            "engine": engine_refresher.stats() if engine_refresher else None,
+            "name_index": index_refresher.stats() if index_refresher else None,
         },
-        "searches": {"total": total_searches},
     }
 
 
@@ -410,7 +501,7 @@ async def get_global_stats(current_user: TokenData = Depends(require_admin)):
 async def list_all_users(current_user: TokenData = Depends(require_admin)):
     """List all users (requires admin role)"""
     logging.info(f"Fetching user list by {current_user.email}")
-    return user_service.list_all_users()
+    return await run_sync(user_service.list_all_users)
 
 
 @app.get("/user/{user_id}", tags=["Users"])
@@ -426,7 +517,7 @@ async def find_user(
             status_code=403, detail="You can only view your own profile"
         )
 
-    user = user_service.find_by_id(user_id)
+    user = await run_sync(user_service.find_by_id, user_id)
     if not user:
         raise HTTPException(status_code=404, detail=f"User with ID {user_id} not found")
     return {
@@ -443,7 +534,7 @@ async def find_user(
 async def delete_user(user_id: int, current_user: TokenData = Depends(require_admin)):
     """Delete a user (requires admin role)"""
     logging.info(f"Deleting user ID {user_id} by {current_user.email}")
-    success, message = user_service.delete_account(user_id)
+    success, message = await run_sync(user_service.delete_account, user_id)
     if not success:
         raise HTTPException(status_code=400, detail=message)
     return {"message": message}
@@ -462,7 +553,7 @@ async def add_favorite(
     logging.info(
         f"Adding favorite: user_id={user_id}, card_id={card_id} by {current_user.email}"
     )
-    success, message = favorite_service.add_favorite(user_id, card_id)
+    success, message = await run_sync(favorite_service.add_favorite, user_id, card_id)
     if not success and "Internal error" in message:
         raise HTTPException(status_code=500, detail=message)
     elif not success:
@@ -480,7 +571,9 @@ async def remove_favorite(
     logging.info(
         f"Removing favorite: user_id={user_id}, card_id={card_id} by {current_user.email}"
     )
-    success, message = favorite_service.remove_favorite(user_id, card_id)
+    success, message = await run_sync(
+        favorite_service.remove_favorite, user_id, card_id
+    )
     if not success and "Internal error" in message:
         raise HTTPException(status_code=500, detail=message)
     elif not success:
@@ -494,12 +587,12 @@ async def list_favorites(current_user: TokenData = Depends(require_authenticated
 
     logging.info(f"Retrieving favorites for user_id={current_user.user_id}")
 
-    favorites = favorite_service.list_favorites(current_user.user_id)
+    favorites = await run_sync(favorite_service.list_favorites, current_user.user_id)
 
     if not favorites:
         return {"message": "No cards in favorites"}
 
-    return favorites
+    return [CardModel(id=card.id, name=card.name, text=card.text) for card in favorites]
 
 
 # ==================== OTHER CARD ROUTES ====================
@@ -523,39 +616,46 @@ async def get_optional_user(authorization: Optional[str] = None) -> Optional[Tok
         return None
 
 
-@app.post("/card/semantic_search_with_L2_distance/", tags=["Cards"])
-async def semantic_search_l2(
-    query: str, limit: int = 3, authorization: Optional[str] = None
-):
+async def run_semantic_search(
+    query: str,
+    limit: int,
+    distance: str,
+    authorization: Optional[str],
+    exclude_ids: Optional[list[int]],
+    exclude_favorites: bool,
+) -> dict:
     """
-    Semantic search for cards with L2 distance
+    Shared body of the semantic search routes, for one distance metric
 
-    **Authentication**: Optional
-    - If authenticated (Bearer token in Authorization header), search is saved to history
-    - If not authenticated, search works normally but is not saved
-
-    **Parameters**:
-    - query: Text description of the card you're looking for
-    - limit: Number of results to return (default: 3)
-
-    **Returns**: List of cards with similarity scores
+    Runs the search off the event loop, saves it to the history when the
+    caller is authenticated and maps the errors to HTTP status codes.
     """
     # Get user if authenticated (optional)
     current_user = await get_optional_user(authorization)
     user_id = current_user.user_id if current_user else None
 
-    logging.info(f"L2 semantic search: '{query}' (limit={limit}, user_id={user_id})")
+    logging.info(
+        f"{distance} semantic search: '{query}' (limit={limit}, user_id={user_id})"
+    )
 
     try:
         # Perform search with optional user_id for history
-        result = card_service.semantic_search(query, limit, "L2", user_id=user_id)
+        result = await run_sync(
+            card_service.semantic_search,
+            query,
+            limit,
+            distance,
+            user_id=user_id,
+            exclude_ids=exclude_ids,
+            exclude_favorites=exclude_favorites,
+        )
 
         if not result:
             raise HTTPException(status_code=404, detail="No matching card found")
 
         return {
             "query": query,
-            "distance_metric": "L2",
+            "distance_metric": distance,
             "results_count": len(result),
             "saved_to_history": user_id is not None,
             "results": [
@@ -570,14 +670,50 @@ async def semantic_search_l2(
         }
     except HTTPException:
         raise
+    except (EmbeddingBackendError, requests.RequestException) as e:
+        raise embedding_backend_http_error(e)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logging.error(f"Error in semantic search: {e}")
         raise HTTPException(status_code=500, detail=f"Search error: {str(e)}")
 
 
+@app.post("/card/semantic_search_with_L2_distance/", tags=["Cards"])
+async def semantic_search_l2(
+    query: str,
+    limit: int = 3,
+    authorization: Optional[str] = None,
+    exclude_ids: Optional[list[int]] = Query(None),
+    exclude_favorites: bool = False,
+):
+    """
+    Semantic search for cards with L2 distance
+
+    **Authentication**: Optional
+    - If authenticated (Bearer token in Authorization header), search is saved to history
+    - If not authenticated, search works normally but is not saved
+
+    **Parameters**:
+    - query: Text description of the card you're looking for
+    - limit: Number of results to return, 1 to 100 (default: 3)
+    - exclude_ids: Cards to leave out of the results (repeat the parameter)
+    - exclude_favorites: Leave out your favorite cards (requires authentication)
+
+    **Returns**: List of cards with similarity scores
+    """
+    return await run_semantic_search(
+        query, limit, "L2", authorization, exclude_ids, exclude_favorites
+    )
+
+
 @app.post("/card/semantic_search_with_cosine_distance/", tags=["Cards"])
 async def semantic_search_cosine(
-    query: str, limit: int = 3, authorization: Optional[str] = None
+    query: str,
+    limit: int = 3,
+    authorization: Optional[str] = None,
+    exclude_ids: Optional[list[int]] = Query(None),
+    exclude_favorites: bool = False,
 ):
     """
     Semantic search for cards with cosine distance
@@ -588,28 +724,111 @@ async def semantic_search_cosine(
 
     **Parameters**:
     - query: Text description of the card you're looking for
-    - limit: Number of results to return (default: 3)
+    - limit: Number of results to return, 1 to 100 (default: 3)
+    - exclude_ids: Cards to leave out of the results (repeat the parameter)
+    - exclude_favorites: Leave out your favorite cards (requires authentication)
+
+    **Returns**: List of cards with similarity scores
+    """
+    return await run_semantic_search(
+        query, limit, "cosine", authorization, exclude_ids, exclude_favorites
+    )
+
+
+@app.post("/card/semantic_search_with_inner_product/", tags=["Cards"])
+async def semantic_search_inner_product(
+    query: str,
+    limit: int = 3,
+    authorization: Optional[str] = None,
+    exclude_ids: Optional[list[int]] = Query(None),
+    exclude_favorites: bool = False,
+):
+    """
+    Semantic search for cards with the inner product
+
+    Equivalent to cosine on normalized embeddings, and cheaper to compute.
+
+    **Authentication**: Optional
+    - If authenticated (Bearer token in Authorization header), search is saved to history
+    - If not authenticated, search works normally but is not saved
+
+    **Parameters**:
+    - query: Text description of the card you're looking for
+    - limit: Number of results to return, 1 to 100 (default: 3)
+    - exclude_ids: Cards to leave out of the results (repeat the parameter)
+    - exclude_favorites: Leave out your favorite cards (requires authentication)
+
+    **Returns**: List of cards with similarity scores
+    """
+    return await run_semantic_search(
+        query, limit, "inner_product", authorization, exclude_ids, exclude_favorites
+    )
+
+
+@app.post("/card/hybrid_search/", tags=["Cards"])
+async def hybrid_search(search: HybridSearchModel, authorization: Optional[str] = None):
+    """
+    Semantic search restricted by card characteristics
+
+    **Authentication**: Optional
+    - If authenticated (Bearer token in Authorization header), search is saved to history
+    - If not authenticated, search works normally but is not saved
+
+    **Body**:
+    - query: Text description of the card you're looking for
+    - limit: Number of results to return, 1 to 100 (default: 3)
+    - distance: "L2", "cosine" or "inner_product" (default: "L2")
+    - colors: Colors the card must have, e.g. ["U", "R"]
+    - color_identity: Colors the card identity must fit in
+    - type: Type the card must have, e.g. "Creature"
+    - mana_value_min / mana_value_max: Mana value range
+    - legal_in: Format the card must be legal in, e.g. "modern"
+    - keywords: Keywords the card must have, e.g. ["Flying"]
+    - exclude_ids: Cards to leave out of the results
+    - exclude_favorites: Leave out your favorite cards (requires authentication)
 
     **Returns**: List of cards with similarity scores
     """
-    # Get user if authenticated (optional)
     current_user = await get_optional_user(authorization)
     user_id = current_user.user_id if current_user else None
 
+    try:
+        filters = CardFilter(
+            colors=search.colors,
+            color_identity=search.color_identity,
+            card_type=search.type,
+            mana_value_min=search.mana_value_min,
+            mana_value_max=search.mana_value_max,
+            legal_in=search.legal_in,
+            keywords=search.keywords,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     logging.info(
-        f"Cosine semantic search: '{query}' (limit={limit}, user_id={user_id})"
+        f"Hybrid search: '{search.query}' {filters} "
+        f"(limit={search.limit}, user_id={user_id})"
     )
 
     try:
-        # Perform search with optional user_id for history
-        result = card_service.semantic_search(query, limit, "cosine", user_id=user_id)
+        result = await run_sync(
+            card_service.hybrid_search,
+            search.query,
+            filters,
+            search.limit,
+            search.distance,
+            user_id=user_id,
+            exclude_ids=search.exclude_ids,
+            exclude_favorites=search.exclude_favorites,
+        )
 
         if not result:
             raise HTTPException(status_code=404, detail="No matching card found")
 
         return {
-            "query": query,
-            "distance_metric": "cosine",
+            "query": search.query,
+            "distance_metric": search.distance,
+            "filters": filters.to_dict(),
             "results_count": len(result),
             "saved_to_history": user_id is not None,
             "results": [
@@ -624,8 +843,12 @@ async def semantic_search_cosine(
         }
     except HTTPException:
         raise
+    except (EmbeddingBackendError, requests.RequestException) as e:
+        raise embedding_backend_http_error(e)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        logging.error(f"Error in semantic search: {e}")
+        logging.error(f"Error in hybrid search: {e}")
         raise HTTPException(status_code=500, detail=f"Search error: {str(e)}")
 
 
@@ -634,37 +857,39 @@ async def semantic_search_cosine(
 
 @app.get("/history", tags=["History"])
 async def get_search_history(
-    page: int = 1,
     per_page: int = 20,
+    cursor: Optional[str] = None,
+    include_total: bool = False,
     current_user: TokenData = Depends(require_authenticated),
 ):
     """
-    Get your search history with pagination
+    Get your search history, most recent first, one page at a time
 
     **Authentication**: Required
 
     **Parameters**:
-    - page: Page number (starts at 1)
     - per_page: Number of results per page (max 100)
+    - cursor: `next_cursor` of the previous page (omit for the first page)
+    - include_total: Also count all your searches (one more query)
 
-    **Returns**: Paginated list of searches with metadata
+    **Returns**: Page of searches with the cursor of the next page
     """
-    # Validate pagination parameters
-    if page < 1:
-        raise HTTPException(status_code=400, detail="Page must be >= 1")
-
     if per_page < 1 or per_page > 100:
         raise HTTPException(
             status_code=400, detail="Per_page must be between 1 and 100"
         )
 
     user_id = current_user.user_id
-    logging.info(
-        f"Fetching search history for user_id={user_id} (page={page}, per_page={per_page})"
-    )
+    logging.info(f"Fetching search history for user_id={user_id} (per_page={per_page})")
 
     try:
-        history_data = historical_service.get_paginated_history(user_id, page, per_page)
+        history_data = await run_sync(
+            historical_service.get_history_page,
+            user_id,
+            per_page,
+            cursor,
+            include_total,
+        )
 
         # Format the searches for better readability
         formatted_searches = []
@@ -675,7 +900,7 @@ async def get_search_history(
                     "query": search.query_text,
                     "results_found": search.result_count,
                     "date": search.created_at.isoformat(),
-                    "has_embedding": search.query_embedding is not None,
+                    "has_embedding": search.has_embedding,
                 }
             )
 
@@ -683,14 +908,14 @@ async def get_search_history(
             "user_id": user_id,
             "searches": formatted_searches,
             "pagination": {
-                "total_searches": history_data["total"],
-                "current_page": history_data["page"],
                 "per_page": history_data["per_page"],
-                "total_pages": history_data["total_pages"],
-                "has_next": history_data["page"] < history_data["total_pages"],
-                "has_previous": history_data["page"] > 1,
+                "next_cursor": history_data["next_cursor"],
+                "has_next": history_data["has_next"],
+                "total_searches": history_data["total"],
             },
         }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logging.error(f"Error fetching history: {e}")
         raise HTTPException(status_code=500, detail=f"Error fetching history: {str(e)}")
@@ -705,13 +930,14 @@ async def get_search_statistics(
 
     **Authentication**: Required
 
-    **Returns**: Statistics including total searches, average results, etc.
+    **Returns**: Totals, average and zero-result rate, most repeated queries
+    and searches per day over the last 30 days
     """
     user_id = current_user.user_id
     logging.info(f"Fetching search statistics for user_id={user_id}")
 
     try:
-        stats = historical_service.get_stats(user_id)
+        stats = await run_sync(historical_service.get_stats, user_id)
 
         if not stats or stats.get("total_searches", 0) == 0:
             return {
@@ -721,8 +947,12 @@ async def get_search_statistics(
                     "total_searches": 0,
                     "total_results": 0,
                     "average_results_per_search": 0,
+                    "max_results": None,
+                    "zero_result_rate": 0,
                     "most_recent_search": None,
                     "oldest_search": None,
+                    "top_queries": [],
+                    "searches_per_day": [],
                 },
             }
 
@@ -732,8 +962,12 @@ async def get_search_statistics(
                 "total_searches": stats["total_searches"],
                 "total_results": stats["total_results"],
                 "average_results_per_search": round(stats["avg_results"], 2),
+                "max_results": stats["max_results"],
+                "zero_result_rate": round(stats["zero_result_rate"], 3),
                 "most_recent_search": stats["most_recent"].isoformat(),
                 "oldest_search": stats["oldest"].isoformat(),
+                "top_queries": stats["top_queries"],
+                "searches_per_day": stats["searches_per_day"],
             },
         }
     except Exception as e:
@@ -756,7 +990,7 @@ async def get_search_count(current_user: TokenData = Depends(require_authenticat
     logging.info(f"Counting search history for user_id={user_id}")
 
     try:
-        count = historical_service.get_history_count(user_id)
+        count = await run_sync(historical_service.get_history_count, user_id)
         return {"user_id": user_id, "total_searches": count}
     except Exception as e:
         logging.error(f"Error counting history: {e}")
@@ -781,15 +1015,10 @@ async def get_search_by_id(
     logging.info(f"Fetching search {search_id} for user_id={user_id}")
 
     try:
-        # Get user's history to verify ownership
-        history = historical_service.get_user_history(user_id, limit=1000)
-
-        # Find the specific search
-        search = None
-        for s in history:
-            if s.id == search_id:
-                search = s
-                break
+        # Only found if the search belongs to this user
+        search = await run_sync(
+            historical_service.find_search_for_user, search_id, user_id
+        )
 
         if not search:
             raise HTTPException(
@@ -802,10 +1031,8 @@ async def get_search_by_id(
             "query": search.query_text,
             "results_found": search.result_count,
             "date": search.created_at.isoformat(),
-            "has_embedding": search.query_embedding is not None,
-            "embedding_dimensions": (
-                len(search.query_embedding) if search.query_embedding else None
-            ),
+            "has_embedding": search.has_embedding,
+            "embedding_dimensions": search.embedding_dimensions,
         }
     except HTTPException:
         raise
@@ -827,7 +1054,7 @@ async def repeat_search(
 
     **Parameters**:
     - search_id: ID of the search to repeat
-    - limit: Number of results to return (default: 5)
+    - limit: Number of results to return, 1 to 100 (default: 5)
 
     **Returns**: New search results (this creates a new history entry)
     """
@@ -835,15 +1062,10 @@ async def repeat_search(
     logging.info(f"Repeating search {search_id} for user_id={user_id}")
 
     try:
-        # Get user's history to verify ownership
-        history = historical_service.get_user_history(user_id, limit=1000)
-
-        # Find the specific search
-        search_to_repeat = None
-        for s in history:
-            if s.id == search_id:
-                search_to_repeat = s
-                break
+        # Only found if the search belongs to this user
+        search_to_repeat = await run_sync(
+            historical_service.find_search_for_user, search_id, user_id
+        )
 
         if not search_to_repeat:
             raise HTTPException(
@@ -851,8 +1073,11 @@ async def repeat_search(
             )
 
         # Perform the search again (will create a new history entry)
-        result = card_service.semantic_search(
-            search_to_repeat.query_text, top_k=limit, user_id=user_id
+        result = await run_sync(
+            card_service.semantic_search,
+            search_to_repeat.query_text,
+            top_k=limit,
+            user_id=user_id,
         )
 
         return {
@@ -872,6 +1097,10 @@ async def repeat_search(
         }
     except HTTPException:
         raise
+    except (EmbeddingBackendError, requests.RequestException) as e:
+        raise embedding_backend_http_error(e)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logging.error(f"Error repeating search: {e}")
         raise HTTPException(status_code=500, detail=f"Error repeating search: {str(e)}")
@@ -895,22 +1124,16 @@ async def delete_search(
     logging.info(f"Deleting search {search_id} for user_id={user_id}")
 
     try:
-        # Get user's history to verify ownership
-        history = historical_service.get_user_history(user_id, limit=1000)
+        # Ownership is checked by the DELETE itself
+        deleted = await run_sync(
+            historical_service.delete_search_for_user, search_id, user_id
+        )
 
-        # Verify the search belongs to this user
-        found = any(s.id == search_id for s in history)
-        if not found:
+        if not deleted:
             raise HTTPException(
                 status_code=404, detail=f"Search {search_id} not found in your history"
             )
 
-        # Delete the search
-        success = historical_service.delete_search(search_id)
-
-        if not success:
-            raise HTTPException(status_code=500, detail="Failed to delete search")
-
         return {
             "message": f"Search {search_id} deleted successfully",
             "deleted_search_id": search_id,
@@ -940,10 +1163,10 @@ async def clear_search_history(
 
     try:
         # Get count before deletion
-        count_before = historical_service.get_history_count(user_id)
+        count_before = await run_sync(historical_service.get_history_count, user_id)
 
         # Clear history
-        success = historical_service.clear_user_history(user_id)
+        success = await run_sync(historical_service.clear_user_history, user_id)
 
         if not success:
             raise HTTPException(status_code=500, detail="Failed to clear history")
@@ -986,11 +1209,13 @@ async def get_user_history_as_admin(
 
     try:
         # Verify user exists
-        user = user_service.find_by_id(user_id)
+        user = await run_sync(user_service.find_by_id, user_id)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
 
-        history_data = historical_service.get_paginated_history(user_id, page, per_page)
+        history_data = await run_sync(
+            historical_service.get_paginated_history, user_id, page, per_page
+        )
 
         # Format the searches
         formatted_searches = []
@@ -1029,7 +1254,6 @@ async def get_user_history_as_admin(
 if __name__ == "__main__":
     # Check required environment variables
     required_vars = [
-        "API_TOKEN",
         "POSTGRES_HOST",
         "POSTGRES_DATABASE",
         "POSTGRES_USER",
@@ -1040,6 +1264,9 @@ if __name__ == "__main__":
         "ALGORITHM",
         "ACCESS_TOKEN_EXPIRE_MINUTES",
     ]
+    # Only the remote embedding backend needs an API token
+    if os.getenv("EMBEDDING_BACKEND", "ollama").lower() == "ollama":
+        required_vars.append("API_TOKEN")
     missing = [var for var in required_vars if not os.getenv(var)]
     if missing:
         print(f"❌ Missing environment variables: {', '.join(missing)}")
@@ -1047,7 +1274,7 @@ if __name__ == "__main__":
 
     # Check connection to embeddings API
     try:
-        response = get_embedding("test")
+        response = get_embedding("test", use_cache=False)
         if "embeddings" not in response:
             print("❌ Invalid API_TOKEN")
             exit(1)
@@ -2,6 +2,15 @@
 Business object representing a Magic card
 """
 
+import hashlib
+
+
+def compute_text_hash(text: str | None) -> str | None:
+    """MD5 hex digest of a card text, equal to PostgreSQL md5(text)"""
+    if text is None:
+        return None
+    return hashlib.md5(text.encode("utf-8")).hexdigest()
+
 
 class Card:
     """Represents a Magic: The Gathering card"""
@@ -24,7 +33,7 @@ class Card:
             Card name
         text : str or None
             Card description/rules text
-        embedding_of_text : list[float] or None, optional
+        embedding_of_text : list[float], numpy.ndarray or None, optional
             Vector representation for semantic search (default: None)
         """
         self.id = id
@@ -32,6 +41,18 @@ class Card:
         self.text = text
         self.embedding_of_text = embedding_of_text
 
+    @property
+    def text_hash(self) -> str | None:
+        """
+        Fingerprint of the card text, used to detect stale embeddings
+
+        Returns
+        -------
+        str or None
+            MD5 hex digest of the text, None if the card has no text
+        """
+        return compute_text_hash(self.text)
+
     def __str__(self) -> str:
         """
         Human-readable representation (displayed when using print(card))
@@ -0,0 +1,97 @@
+"""
+Business object holding the structured filters of a hybrid card search
+"""
+
+# Colors as stored in project.cards.colors / color_identity
+COLORS = ("W", "U", "B", "R", "G")
+
+
+class CardFilter:
+    """Structured criteria combined with a semantic search (FO3a)"""
+
+    def __init__(
+        self,
+        colors: list[str] | None = None,
+        color_identity: list[str] | None = None,
+        card_type: str | None = None,
+        mana_value_min: float | None = None,
+        mana_value_max: float | None = None,
+        legal_in: str | None = None,
+        keywords: list[str] | None = None,
+    ):
+        """
+        Initialize the filters; criteria left to None are not applied
+
+        Parameters
+        ----------
+        colors : list[str] or None, optional
+            Colors the card must have, all of them (e.g. ["U", "R"])
+        color_identity : list[str] or None, optional
+            Colors the card identity must fit in (commander deck colors)
+        card_type : str or None, optional
+            Type the card must have (e.g. "Creature")
+        mana_value_min, mana_value_max : float or None, optional
+            Inclusive bounds of the mana value
+        legal_in : str or None, optional
+            Format the card must be legal in (e.g. "modern")
+        keywords : list[str] or None, optional
+            Keywords the card must have, all of them (e.g. ["Flying"])
+
+        Raises
+        ------
+        ValueError
+            If a color is unknown or the mana value range is empty
+        """
+        self.colors = self._check_colors(colors)
+        self.color_identity = self._check_colors(color_identity)
+        self.card_type = card_type.strip().capitalize() if card_type else None
+        self.mana_value_min = mana_value_min
+        self.mana_value_max = mana_value_max
+        self.legal_in = legal_in.strip().lower() if legal_in else None
+        self.keywords = [k.strip().capitalize() for k in keywords] if keywords else None
+
+        if (
+            mana_value_min is not None
+            and mana_value_max is not None
+            and mana_value_min > mana_value_max
+        ):
+            raise ValueError(
+                f"Empty mana value range: {mana_value_min} > {mana_value_max}"
+            )
+
+    @staticmethod
+    def _check_colors(colors: list[str] | None) -> list[str] | None:
+        if colors is None:
+            return None
+        colors = [color.strip().upper() for color in colors]
+        unknown = [color for color in colors if color not in COLORS]
+        if unknown:
+            raise ValueError(
+                f"Unknown colors: {', '.join(unknown)}. Use {', '.join(COLORS)}"
+            )
+        return colors
+
+    def is_empty(self) -> bool:
+        """True if no criterion is set"""
+        return not any(
+            [
+                self.colors,
+                self.color_identity is not None,
+                self.card_type,
+                self.mana_value_min is not None,
+                self.mana_value_max is not None,
+                self.legal_in,
+                self.keywords,
+            ]
+        )
+
+    def to_dict(self) -> dict:
+        """Criteria that are set, by name"""
+        return {
+            key: value
+            for key, value in vars(self).items()
+            if value is not None and value != []
+        }
+
+    def __repr__(self):
+        return f"CardFilter({self.to_dict()})"
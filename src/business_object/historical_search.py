@@ -13,6 +13,7 @@ class HistoricalSearch:
         query_embedding: Optional[list] = None,
         result_count: Optional[int] = None,
         created_at: Optional[datetime] = None,
+        embedding_dimensions: Optional[int] = None,
     ):
         self.id = id
         self.user_id = user_id
@@ -20,6 +21,15 @@ class HistoricalSearch:
         self.query_embedding = query_embedding
         self.result_count = result_count
         self.created_at = created_at or datetime.now()
+        # Reads leave the vector in the database and only report its size
+        if query_embedding is not None:
+            embedding_dimensions = len(query_embedding)
+        self.embedding_dimensions = embedding_dimensions
+
+    @property
+    def has_embedding(self) -> bool:
+        """Whether the search was saved with its query embedding"""
+        return self.embedding_dimensions is not None
 
     def __str__(self):
         date_str = self.created_at.strftime("%Y-%m-%d %H:%M")
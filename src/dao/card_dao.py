@@ -2,23 +2,98 @@
 DAO for Magic cards with pgvector support
 """
 
+from psycopg2 import errors
+from psycopg2.extras import Json
+
+from dao.connection_pool import session_state
 from dao.db_connection import DBConnection
+from dao.vector_index_dao import supports_iterative_scan, vector_search_settings
+from utils.pg_binary_copy import BinaryCopyStream
+from utils.vector_codec import Vector, decode_vector_binary
 from business_object.card import Card
+from business_object.card_filter import CardFilter
 from utils.log_decorator import log
 
+# Search metric -> (pgvector operator, distance to similarity). Scores grow
+# with similarity: 1 / (1 + d) for L2, 1 - d for cosine, and the inner product
+# itself for "inner_product" (<#> returns its negation), which equals the
+# cosine similarity on normalized embeddings.
+SEARCH_METRICS = {
+    "L2": ("<->", lambda distance: 1 / (1 + distance)),
+    "cosine": ("<=>", lambda distance: 1 - distance),
+    "inner_product": ("<#>", lambda distance: -distance),
+}
+
+# Columns of project.cards that map to Card attributes
+CARD_FIELDS = ("id", "name", "text", "embedding_of_text")
+# Default projection of the reads: the embedding (a 1024-float vector, most
+# of the row) is only fetched by callers that ask for it
+LIGHT_COLUMNS = ("id", "name", "text")
+
+
+def card_columns(columns: tuple[str, ...], table: str = "") -> str:
+    """
+    SELECT list of a card projection, always including id and name
+
+    Parameters
+    ----------
+    columns : tuple[str, ...]
+        Card fields to read, among CARD_FIELDS
+    table : str, optional
+        Alias prefixed to the columns, e.g. "c"
+
+    Raises
+    ------
+    ValueError
+        If a column is not a card field
+    """
+    unknown = [column for column in columns if column not in CARD_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown card columns: {', '.join(unknown)}")
+    prefix = f"{table}." if table else ""
+    return ", ".join(
+        prefix + column for column in dict.fromkeys(("id", "name") + tuple(columns))
+    )
+
+
+def card_from_row(row: dict) -> Card:
+    """Card built from a row of any projection; missing fields are None"""
+    return Card(
+        id=row["id"],
+        name=row["name"],
+        text=row.get("text"),
+        embedding_of_text=row.get("embedding_of_text"),
+    )
+
+
+# Filtered searches: keep walking the vector index until enough rows pass the
+# WHERE clause instead of returning fewer than LIMIT. Only run on pgvector
+# 0.8+ (supports_iterative_scan): older versions reject these settings
+ITERATIVE_SCAN_SQL = """
+    SELECT set_config('hnsw.iterative_scan', 'relaxed_order', true),
+           set_config('ivfflat.iterative_scan', 'relaxed_order', true)
+"""
+
+
+# Most ids generated by one random_cards draw, however sparse the ids are
+RANDOM_MAX_DRAWS = 20000
+
 
 class CardDao:
     """Class containing methods to access Cards in the database"""
 
     @log
-    def create(self, card: Card) -> bool:
+    def create(self, card: Card, embedding_model: str | None = None) -> bool:
         """
         Create a card in the database
 
         Parameters
         ----------
         card : Card
-            Card object to insert
+            Card object to insert, its id is set on success
+        embedding_model : str or None, optional
+            Model that produced card.embedding_of_text, stored with the text
+            hash so the re-embedding job can tell when the vector is stale
 
         Returns
         -------
@@ -30,13 +105,23 @@ class CardDao:
                 with connection.cursor() as cursor:
                     # ID is not inserted as it's usually AUTO_INCREMENT
                     # embedding_of_text can be None
+                    embedded = card.embedding_of_text is not None
                     cursor.execute(
                         """
-                        INSERT INTO project.cards (name, text, embedding_of_text)
-                        VALUES (%s, %s, %s)
+                        INSERT INTO project.cards
+                            (name, text, embedding_of_text, text_hash, embedding_model)
+                        VALUES (%s, %s, %s, %s, %s)
+                        RETURNING id
                         """,
-                        (card.name, card.text, card.embedding_of_text),
+                        (
+                            card.name,
+                            card.text,
+                            Vector(card.embedding_of_text) if embedded else None,
+                            card.text_hash if embedded else None,
+                            embedding_model if embedded else None,
+                        ),
                     )
+                    card.id = cursor.fetchone()["id"]
                 connection.commit()
             return True
         except Exception as e:
@@ -182,7 +267,9 @@ class CardDao:
             raise
 
     @log
-    def find_by_id(self, card_id: int) -> Card:
+    def find_by_id(
+        self, card_id: int, columns: tuple[str, ...] = LIGHT_COLUMNS
+    ) -> Card:
         """
         Find a card by its ID
 
@@ -190,6 +277,8 @@ class CardDao:
         ----------
         card_id : int
             ID of the card to find
+        columns : tuple[str, ...], optional
+            Card fields to read (default: LIGHT_COLUMNS, without the embedding)
 
         Returns
         -------
@@ -201,8 +290,8 @@ class CardDao:
         Exception
             If database error occurs
         """
-        sql_query = """
-            SELECT id, name, text, embedding_of_text
+        sql_query = f"""
+            SELECT {card_columns(columns)}
             FROM project.cards
             WHERE id = %s
         """
@@ -217,59 +306,72 @@ class CardDao:
                         print(f"❌ No card found with id {card_id}")
                         return None
 
-                    card = Card(
-                        id=row["id"],
-                        name=row["name"],
-                        text=row["text"],
-                        embedding_of_text=row["embedding_of_text"],
-                    )
-                    return card
+                    return card_from_row(row)
 
         except Exception as e:
             print(f"❌ Database error: {e}")
             raise
 
     @log
-    def search_by_name(self, name: str) -> list[Card]:
+    def search_by_name(
+        self,
+        name: str,
+        limit: int = 20,
+        columns: tuple[str, ...] = LIGHT_COLUMNS,
+    ) -> list[Card]:
         """
         Search for cards whose name contains the given text (case insensitive)
 
+        Served by the pg_trgm GIN indexes on lower(name) and lower(ascii_name):
+        a substring pattern cannot use a B-tree, trigrams can. The closest
+        names come first.
+
         Parameters
         ----------
         name : str
             Name (or partial name) of the card to search for
+        limit : int, optional
+            Maximum number of cards returned (default: 20)
+        columns : tuple[str, ...], optional
+            Card fields to read (default: LIGHT_COLUMNS, without the embedding)
 
         Returns
         -------
         list[Card]
-            List of Card objects matching the search criteria
+            List of Card objects matching the search criteria, best match first
 
         Raises
         ------
+        ValueError
+            If a column is not a card field
         Exception
             If database error occurs
         """
-        sql_query = """
-            SELECT id, name, text, embedding_of_text
+        select = card_columns(columns)
+
+        # Escape the LIKE wildcards typed by the user
+        query = name.lower()
+        escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        sql_query = f"""
+            SELECT {select}
             FROM project.cards
-            WHERE LOWER(name) LIKE LOWER(%s)
+            WHERE lower(name) LIKE %(pattern)s
+            OR lower(ascii_name) LIKE %(pattern)s
+            ORDER BY similarity(lower(name), %(query)s) DESC, name
+            LIMIT %(limit)s
         """
         cards = []
 
         try:
             with DBConnection().connection as connection:
                 with connection.cursor() as cursor:
-                    cursor.execute(sql_query, (f"%{name}%",))
+                    cursor.execute(
+                        sql_query,
+                        {"pattern": f"%{escaped}%", "query": query, "limit": limit},
+                    )
                     rows = cursor.fetchall()
 
-                    for row in rows:
-                        card = Card(
-                            id=row["id"],
-                            name=row["name"],
-                            text=row["text"],
-                            embedding_of_text=row["embedding_of_text"],
-                        )
-                        cards.append(card)
+                    cards = [card_from_row(row) for row in rows]
 
         except Exception as e:
             print(f"❌ Database error: {e}")
@@ -279,11 +381,29 @@ class CardDao:
 
     @log
     def semantic_search(
-        self, query_embedding: list[float], top_k: int = 5, distance: str = "L2"
+        self,
+        query_embedding: list[float],
+        top_k: int = 5,
+        distance: str = "L2",
+        probes: int | None = None,
+        ef_search: int | None = None,
+        exclude_ids: list[int] | None = None,
     ) -> list[tuple[Card, float]]:
         """
         Semantic search using pgvector (optimized)
 
+        The query runs as a statement prepared once per connection: the
+        vector is sent once, bound to $1, and the distance is computed once
+        per row and reused by ORDER BY. The names of the statements a
+        connection prepared are kept in its session_state, so that no
+        round trip is spent checking for them.
+
+        Excluded cards are filtered inside the index scan: hnsw.ef_search is
+        raised by their number (up to MAX_EF_SEARCH), and iterative scans
+        (pgvector 0.8+) keep reading the index until `top_k` cards remain.
+        Without iterative scans, a search that lost results to the
+        exclusions is run again as an exact scan.
+
         Parameters
         ----------
         query_embedding : list[float]
@@ -291,65 +411,104 @@ class CardDao:
         top_k : int, optional
             Number of results to return (default: 5)
         distance : str, optional
-            Distance metric to use: "L2" or "cosine" (default: "L2")
+            Distance metric to use: "L2", "cosine" or "inner_product"
+            (default: "L2")
+        probes : int or None, optional
+            ivfflat.probes for this query (default: VECTOR_SEARCH_PROBES)
+        ef_search : int or None, optional
+            hnsw.ef_search for this query (default: VECTOR_SEARCH_EF_SEARCH)
+        exclude_ids : list[int] or None, optional
+            Cards that must not be returned (FO3b)
 
         Returns
         -------
         list[tuple[Card, float]]
-            List of tuples (Card, similarity_score)
+            List of tuples (Card, similarity_score), see SEARCH_METRICS
 
         Raises
         ------
         Exception
             If database error occurs or invalid distance metric
         """
-        # Convert embedding to pgvector format
-        embedding_str = "[" + ",".join(str(f) for f in query_embedding) + "]"
+        if distance not in SEARCH_METRICS:
+            raise ValueError(
+                f"Invalid distance metric: {distance}. "
+                f"Use one of {', '.join(SEARCH_METRICS)}"
+            )
+        operator, to_similarity = SEARCH_METRICS[distance]
+        statement = f"card_semantic_search_{distance.lower()}"
+        exclude_ids = sorted(set(exclude_ids or []))
 
         try:
             with DBConnection().connection as connection:
                 with connection.cursor() as cursor:
-                    # Use pgvector operators
-                    # Smaller distance = more similar
-                    if distance == "L2":
-                        # <-> is L2 distance operator
+                    # Index search settings, local to this transaction
+                    settings = vector_search_settings(
+                        top_k + len(exclude_ids), probes, ef_search
+                    )
+                    cursor.execute(
+                        """
+                        SELECT set_config('ivfflat.probes', %s, true),
+                               set_config('hnsw.ef_search', %s, true)
+                        """,
+                        (
+                            str(settings["ivfflat.probes"]),
+                            str(settings["hnsw.ef_search"]),
+                        ),
+                    )
+                    prepared = session_state(connection).setdefault(
+                        "prepared_statements", set()
+                    )
+                    if statement not in prepared:
                         cursor.execute(
-                            """
-                            SELECT
-                                id,
-                                name,
-                                text,
-                                1 - (embedding_of_text <-> %s::vector) AS similarity
+                            f"""
+                            PREPARE {statement} (vector, integer, integer[]) AS
+                            SELECT id, name, text,
+                                   embedding_of_text {operator} $1 AS distance
                             FROM project.cards
                             WHERE embedding_of_text IS NOT NULL
-                            ORDER BY embedding_of_text <-> %s::vector ASC
-                            LIMIT %s;
-                            """,
-                            (embedding_str, embedding_str, top_k),
-                        )
-                    elif distance == "cosine":
-                        # <=> is cosine distance operator
-                        cursor.execute(
+                            AND id <> ALL($3)
+                            ORDER BY distance
+                            LIMIT $2
                             """
-                            SELECT
-                                id,
-                                name,
-                                text,
-                                1 - (embedding_of_text <=> %s::vector) AS similarity
-                            FROM project.cards
-                            WHERE embedding_of_text IS NOT NULL
-                            ORDER BY embedding_of_text <=> %s::vector ASC
-                            LIMIT %s;
-                            """,
-                            (embedding_str, embedding_str, top_k),
-                        )
-                    else:
-                        raise ValueError(
-                            f"Invalid distance metric: {distance}. Use 'L2' or 'cosine'"
                         )
+                        prepared.add(statement)
+                    iterative = bool(exclude_ids) and supports_iterative_scan(cursor)
+                    if iterative:
+                        cursor.execute(ITERATIVE_SCAN_SQL)
 
+                    try:
+                        cursor.execute(
+                            f"EXECUTE {statement} (%s, %s, %s::integer[])",
+                            (Vector(query_embedding), top_k, exclude_ids),
+                        )
+                    except errors.InvalidSqlStatementName:
+                        # The session was reset (DISCARD ALL, DEALLOCATE):
+                        # prepare the statements again on the next search
+                        prepared.clear()
+                        raise
                     rows = cursor.fetchall()
 
+                    if exclude_ids and len(rows) < top_k and not iterative:
+                        # The materialized CTE keeps the vector index out
+                        cursor.execute(
+                            f"""
+                            WITH ranked AS MATERIALIZED (
+                                SELECT id, name, text,
+                                       embedding_of_text {operator} %s AS distance
+                                FROM project.cards
+                                WHERE embedding_of_text IS NOT NULL
+                                AND id <> ALL(%s::integer[])
+                            )
+                            SELECT id, name, text, distance
+                            FROM ranked
+                            ORDER BY distance
+                            LIMIT %s
+                            """,
+                            (Vector(query_embedding), exclude_ids, top_k),
+                        )
+                        rows = cursor.fetchall()
+
                     return [
                         (
                             Card(
@@ -357,7 +516,7 @@ class CardDao:
                                 name=row["name"],
                                 text=row["text"],
                             ),
-                            float(row["similarity"]),
+                            to_similarity(float(row["distance"])),
                         )
                         for row in rows
                     ]
@@ -366,11 +525,176 @@ class CardDao:
             print(f"❌ Error during semantic search: {e}")
             raise
 
+    @staticmethod
+    def filter_conditions(filters: CardFilter) -> tuple[list[str], dict]:
+        """
+        SQL conditions and named parameters matching a CardFilter
+
+        Array criteria use containment operators (@>, <@) and legality uses
+        JSONB containment, so they are served by the GIN indexes of
+        init_db.sql; the mana value range uses its B-tree index.
+        """
+        conditions, params = [], {}
+        if filters.colors:
+            conditions.append("colors @> %(colors)s::text[]")
+            params["colors"] = filters.colors
+        if filters.color_identity is not None:
+            conditions.append("color_identity <@ %(color_identity)s::text[]")
+            params["color_identity"] = filters.color_identity
+        if filters.card_type:
+            conditions.append("types @> %(types)s::text[]")
+            params["types"] = [filters.card_type]
+        if filters.keywords:
+            conditions.append("keywords @> %(keywords)s::text[]")
+            params["keywords"] = filters.keywords
+        if filters.mana_value_min is not None:
+            conditions.append("mana_value >= %(mana_value_min)s")
+            params["mana_value_min"] = filters.mana_value_min
+        if filters.mana_value_max is not None:
+            conditions.append("mana_value <= %(mana_value_max)s")
+            params["mana_value_max"] = filters.mana_value_max
+        if filters.legal_in:
+            conditions.append("legalities @> %(legalities)s")
+            params["legalities"] = Json({filters.legal_in: "Legal"})
+        return conditions, params
+
+    @log
+    def hybrid_search(
+        self,
+        query_embedding: list[float],
+        filters: CardFilter,
+        top_k: int = 5,
+        distance: str = "L2",
+        probes: int | None = None,
+        ef_search: int | None = None,
+        exclude_ids: list[int] | None = None,
+    ) -> list[tuple[Card, float]]:
+        """
+        Semantic search restricted to the cards matching structured filters
+
+        The planner picks between two plans: with a selective filter, the
+        GIN / B-tree indexes pre-filter the cards and only those are ranked;
+        otherwise the vector index is walked in distance order. On pgvector
+        0.8+ that walk is an iterative scan, which keeps reading the index
+        until `top_k` cards pass the filter instead of returning fewer. On
+        older versions the walk stops after ef_search / probes candidates:
+        when fewer than `top_k` cards come back, the filtered cards are
+        ranked again with an exact scan.
+
+        Parameters
+        ----------
+        query_embedding : list[float]
+            Embedding of the search text
+        filters : CardFilter
+            Criteria the results must match
+        top_k : int, optional
+            Number of results to return (default: 5)
+        distance : str, optional
+            "L2", "cosine" or "inner_product" (default: "L2")
+        probes, ef_search : int or None, optional
+            Index search effort for this query (see semantic_search)
+        exclude_ids : list[int] or None, optional
+            Cards that must not be returned
+
+        Returns
+        -------
+        list[tuple[Card, float]]
+            List of tuples (Card, similarity_score), see SEARCH_METRICS
+        """
+        if distance not in SEARCH_METRICS:
+            raise ValueError(
+                f"Invalid distance metric: {distance}. "
+                f"Use one of {', '.join(SEARCH_METRICS)}"
+            )
+        operator, to_similarity = SEARCH_METRICS[distance]
+        conditions, params = self.filter_conditions(filters)
+        if exclude_ids:
+            conditions.append("id <> ALL(%(exclude_ids)s::integer[])")
+            params["exclude_ids"] = sorted(set(exclude_ids))
+        where = " AND ".join(["embedding_of_text IS NOT NULL"] + conditions)
+        params.update(vector=Vector(query_embedding), top_k=top_k)
+
+        try:
+            with DBConnection().connection as connection:
+                with connection.cursor() as cursor:
+                    settings = vector_search_settings(top_k, probes, ef_search)
+                    cursor.execute(
+                        """
+                        SELECT set_config('ivfflat.probes', %s, true),
+                               set_config('hnsw.ef_search', %s, true)
+                        """,
+                        (
+                            str(settings["ivfflat.probes"]),
+                            str(settings["hnsw.ef_search"]),
+                        ),
+                    )
+                    iterative = supports_iterative_scan(cursor)
+                    if iterative:
+                        cursor.execute(ITERATIVE_SCAN_SQL)
+
+                    # relaxed_order may return rows slightly out of order:
+                    # the top k are materialized, then sorted exactly
+                    cursor.execute(
+                        f"""
+                        WITH candidates AS MATERIALIZED (
+                            SELECT id, name, text,
+                                   embedding_of_text {operator} %(vector)s AS distance
+                            FROM project.cards
+                            WHERE {where}
+                            ORDER BY distance
+                            LIMIT %(top_k)s
+                        )
+                        SELECT id, name, text, distance
+                        FROM candidates
+                        ORDER BY distance
+                        """,
+                        params,
+                    )
+                    rows = cursor.fetchall()
+
+                    if len(rows) < top_k and not iterative:
+                        # The materialized CTE keeps the vector index out:
+                        # every card passing the filter is ranked
+                        cursor.execute(
+                            f"""
+                            WITH filtered AS MATERIALIZED (
+                                SELECT id, name, text,
+                                       embedding_of_text {operator} %(vector)s
+                                           AS distance
+                                FROM project.cards
+                                WHERE {where}
+                            )
+                            SELECT id, name, text, distance
+                            FROM filtered
+                            ORDER BY distance
+                            LIMIT %(top_k)s
+                            """,
+                            params,
+                        )
+                        rows = cursor.fetchall()
+
+                    return [
+                        (
+                            Card(id=row["id"], name=row["name"], text=row["text"]),
+                            to_similarity(float(row["distance"])),
+                        )
+                        for row in rows
+                    ]
+
+        except Exception as e:
+            print(f"❌ Error during hybrid search: {e}")
+            raise
+
     @log
-    def list_all(self) -> list[Card]:
+    def list_all(self, columns: tuple[str, ...] = LIGHT_COLUMNS) -> list[Card]:
         """
         Retrieve all cards from the project.cards table
 
+        Parameters
+        ----------
+        columns : tuple[str, ...], optional
+            Card fields to read (default: LIGHT_COLUMNS, without the embedding)
+
         Returns
         -------
         list[Card]
@@ -381,7 +705,7 @@ class CardDao:
         Exception
             If database error occurs
         """
-        sql_query = "SELECT id, name, text, embedding_of_text FROM project.cards"
+        sql_query = f"SELECT {card_columns(columns)} FROM project.cards"
         cards = []
 
         try:
@@ -390,14 +714,7 @@ class CardDao:
                     cursor.execute(sql_query)
                     rows = cursor.fetchall()
 
-                    for row in rows:
-                        card = Card(
-                            id=row["id"],
-                            name=row["name"],
-                            text=row["text"],
-                            embedding_of_text=row["embedding_of_text"],
-                        )
-                        cards.append(card)
+                    cards = [card_from_row(row) for row in rows]
 
         except Exception as e:
             print(f"❌ Database error: {e}")
@@ -437,3 +754,371 @@ class CardDao:
             raise
 
         return ids
+
+    @log
+    def random_cards(
+        self, n: int = 1, columns: tuple[str, ...] = LIGHT_COLUMNS
+    ) -> list[Card]:
+        """
+        Draw `n` distinct cards uniformly at random, in a single query
+
+        Ids are drawn in [min(id), max(id)] (two index lookups) and joined on
+        the primary key; ids falling in gaps are simply not found, so every
+        existing card is equally likely. More ids than needed are drawn to
+        cover the gaps, scaled by the id density (planner row estimate over
+        the id range, capped at RANDOM_MAX_DRAWS). The draw is repeated (at
+        most 3 times) in the rare case it is short, then the missing cards
+        are picked with ORDER BY random() among the remaining ones.
+
+        Parameters
+        ----------
+        n : int, optional
+            Number of cards (default: 1)
+        columns : tuple[str, ...], optional
+            Card fields to read (default: LIGHT_COLUMNS, without the embedding)
+
+        Returns
+        -------
+        list[Card]
+            Up to `n` cards, fewer only if the table has fewer cards
+
+        Raises
+        ------
+        Exception
+            If database error occurs
+        """
+        if n <= 0:
+            return []
+
+        sql_query = f"""
+            WITH bounds AS (
+                SELECT min(id) AS low, max(id) - min(id) + 1 AS span,
+                       (SELECT reltuples FROM pg_class
+                        WHERE oid = 'project.cards'::regclass) AS estimate
+                FROM project.cards
+            ),
+            draws AS (
+                SELECT DISTINCT low + floor(random() * span)::int AS id
+                FROM bounds, generate_series(1, LEAST(
+                    ceil(%(draws)s * span / CASE
+                        WHEN estimate > 0 THEN LEAST(estimate, span)
+                        ELSE span  -- never analyzed: assume dense ids
+                    END),
+                    %(max_draws)s
+                )::int)
+                WHERE low IS NOT NULL
+            )
+            SELECT {card_columns(columns)}
+            FROM project.cards
+            JOIN draws USING (id)
+            WHERE NOT (id = ANY(%(exclude)s::integer[]))
+            ORDER BY random()
+            LIMIT %(n)s
+        """
+        cards = []
+
+        try:
+            with DBConnection().connection as connection:
+                with connection.cursor() as cursor:
+                    for _ in range(3):
+                        cursor.execute(
+                            sql_query,
+                            {
+                                "draws": 2 * (n - len(cards)) + 16,
+                                "max_draws": RANDOM_MAX_DRAWS,
+                                "n": n - len(cards),
+                                "exclude": [card.id for card in cards],
+                            },
+                        )
+                        cards += [card_from_row(row) for row in cursor.fetchall()]
+                        if len(cards) >= n:
+                            break
+                    else:
+                        # Stale estimate or very sparse ids: sort what is left
+                        cursor.execute(
+                            f"""
+                            SELECT {card_columns(columns)}
+                            FROM project.cards
+                            WHERE NOT (id = ANY(%(exclude)s::integer[]))
+                            ORDER BY random()
+                            LIMIT %(n)s
+                            """,
+                            {
+                                "n": n - len(cards),
+                                "exclude": [card.id for card in cards],
+                            },
+                        )
+                        cards += [card_from_row(row) for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"❌ Database error: {e}")
+            raise
+
+        return cards
+
+    def list_names(self) -> list[tuple[int, str]]:
+        """
+        Retrieve the id and name of every card (for the name index)
+
+        Returns
+        -------
+        list[tuple[int, str]]
+            (card id, name) pairs
+
+        Raises
+        ------
+        Exception
+            If database error occurs
+        """
+        try:
+            with DBConnection().connection as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT id, name FROM project.cards")
+                    return [(row["id"], row["name"]) for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"❌ Database error: {e}")
+            raise
+
+    def iter_texts_to_embed(
+        self,
+        batch_size: int = 256,
+        after_id: int = 0,
+        only_stale: bool = True,
+        model: str | None = None,
+    ):
+        """
+        Stream the (id, text) pairs of cards that need an embedding
+
+        A card needs one when it has no vector yet, when its text changed since
+        the vector was computed (stored hash differs from md5(text)) or when the
+        vector was produced by another model than `model`.
+
+        Rows are read through a server-side cursor, ordered by id, so the
+        whole table is never loaded in memory.
+
+        Parameters
+        ----------
+        batch_size : int, optional
+            Number of rows per yielded batch (default: 256)
+        after_id : int, optional
+            Only cards with a greater id are returned, to resume a run
+            (default: 0)
+        only_stale : bool, optional
+            If False, return every card with a text (default: True)
+        model : str or None, optional
+            Current embedding model; vectors from other models are stale
+
+        Yields
+        ------
+        list[tuple[int, str]]
+            Batches of (card id, card text)
+        """
+        sql_query = """
+            SELECT id, text
+            FROM project.cards
+            WHERE text IS NOT NULL
+              AND id > %s
+        """
+        params = [after_id]
+        if only_stale:
+            sql_query += """
+              AND (embedding_of_text IS NULL
+                   OR text_hash IS DISTINCT FROM md5(text)"""
+            if model is not None:
+                sql_query += " OR embedding_model IS DISTINCT FROM %s"
+                params.append(model)
+            sql_query += ")"
+        sql_query += " ORDER BY id"
+
+        with DBConnection().connection as connection:
+            with connection.cursor(name="cards_to_embed") as cursor:
+                cursor.itersize = batch_size
+                cursor.execute(sql_query, params)
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield [(row["id"], row["text"]) for row in rows]
+
+    def iter_embeddings(self, batch_size: int = 2000):
+        """
+        Stream every card that has an embedding, ordered by id
+
+        Parameters
+        ----------
+        batch_size : int, optional
+            Number of rows per yielded batch (default: 2000)
+
+        Yields
+        ------
+        list[dict]
+            Batches of rows with id, name, text and embedding_of_text
+        """
+        with DBConnection().connection as connection:
+            with connection.cursor(name="cards_embeddings") as cursor:
+                cursor.itersize = batch_size
+                # vector_send: binary vectors, decoded without text parsing
+                cursor.execute(
+                    """
+                    SELECT id, name, text,
+                           vector_send(embedding_of_text) AS embedding_of_text
+                    FROM project.cards
+                    WHERE embedding_of_text IS NOT NULL
+                    ORDER BY id
+                    """
+                )
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    for row in rows:
+                        row["embedding_of_text"] = decode_vector_binary(
+                            row["embedding_of_text"]
+                        )
+                    yield rows
+
+    def embedding_watermark(self) -> dict:
+        """
+        Fingerprint of the embedded cards, to detect a stale snapshot
+
+        Returns
+        -------
+        dict
+            count and max_id of the cards with an embedding, and an md5 over
+            their id, name, text, text hash and embedding model
+        """
+        with DBConnection().connection as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    """
+                    SELECT COUNT(*) AS count,
+                           MAX(id) AS max_id,
+                           md5(COALESCE(string_agg(
+                               md5(concat_ws('|', id, name, text, text_hash,
+                                             embedding_model)),
+                               '' ORDER BY id
+                           ), '')) AS checksum
+                    FROM project.cards
+                    WHERE embedding_of_text IS NOT NULL
+                    """
+                )
+                return dict(cursor.fetchone())
+
+    def names_watermark(self) -> dict:
+        """
+        Fingerprint of the card names, to detect a stale name index
+
+        Returns
+        -------
+        dict
+            count and max_id of the cards, and an md5 over their id and name
+        """
+        with DBConnection().connection as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    """
+                    SELECT COUNT(*) AS count,
+                           MAX(id) AS max_id,
+                           md5(COALESCE(string_agg(
+                               md5(concat_ws('|', id, name)), '' ORDER BY id
+                           ), '')) AS checksum
+                    FROM project.cards
+                    """
+                )
+                return dict(cursor.fetchone())
+
+    def find_texts_by_ids(self, card_ids: list[int]) -> list[tuple[int, str, str]]:
+        """
+        Read the current name and text of several cards in one query
+
+        Parameters
+        ----------
+        card_ids : list[int]
+            Ids of the cards
+
+        Returns
+        -------
+        list[tuple[int, str, str]]
+            (card id, card name, card text), cards without text are left out
+        """
+        if not card_ids:
+            return []
+        try:
+            with DBConnection().connection as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        """
+                        SELECT id, name, text
+                        FROM project.cards
+                        WHERE id = ANY(%s) AND text IS NOT NULL
+                        ORDER BY id
+                        """,
+                        (list(card_ids),),
+                    )
+                    rows = cursor.fetchall()
+            return [(row["id"], row["name"], row["text"]) for row in rows]
+        except Exception as e:
+            print(f"❌ Error reading card texts: {e}")
+            raise
+
+    def update_embeddings(
+        self,
+        embeddings: list[tuple[int, list[float], str]],
+        model: str | None = None,
+    ) -> int:
+        """
+        Write many card embeddings: binary COPY into a temporary table, then
+        a single UPDATE ... FROM
+
+        Parameters
+        ----------
+        embeddings : list[tuple[int, list[float], str]]
+            (card id, embedding, hash of the embedded text) triples
+        model : str or None, optional
+            Model that produced the embeddings
+
+        Returns
+        -------
+        int
+            Number of updated cards
+        """
+        if not embeddings:
+            return 0
+
+        rows = (
+            (card_id, embedding, text_hash, model)
+            for card_id, embedding, text_hash in embeddings
+        )
+
+        try:
+            with DBConnection().connection as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        """
+                        CREATE TEMP TABLE new_embeddings (
+                            id INTEGER,
+                            embedding vector,
+                            text_hash TEXT,
+                            model TEXT
+                        ) ON COMMIT DROP
+                        """
+                    )
+                    cursor.copy_expert(
+                        "COPY new_embeddings FROM STDIN WITH (FORMAT binary)",
+                        BinaryCopyStream(rows, ["int", "vector", "text", "text"]),
+                    )
+                    cursor.execute(
+                        """
+                        UPDATE project.cards AS c
+                        SET embedding_of_text = v.embedding,
+                            text_hash = v.text_hash,
+                            embedding_model = v.model
+                        FROM new_embeddings AS v
+                        WHERE c.id = v.id
+                        """
+                    )
+                    updated = cursor.rowcount
+                connection.commit()
+            return updated
+        except Exception as e:
+            print(f"❌ Error updating embeddings: {e}")
+            raise
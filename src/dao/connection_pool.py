@@ -0,0 +1,274 @@
+"""
+Thread-safe pool of PostgreSQL connections
+"""
+
+import threading
+import time
+import weakref
+from collections import deque
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.pool import PoolError
+
+# State tied to the server session of each connection (e.g. the names of the
+# statements it prepared), dropped when the connection is closed or reopened
+_sessions = weakref.WeakKeyDictionary()
+
+
+def session_state(connection) -> dict:
+    """
+    Per-connection state that lives as long as the database session
+
+    Parameters
+    ----------
+    connection : connection
+        A psycopg2 connection, pooled or not
+
+    Returns
+    -------
+    dict
+        Mutable state, empty for a connection the pool just opened
+    """
+    return _sessions.setdefault(connection, {})
+
+
+class ConnectionPool:
+    """
+    Pool of psycopg2 connections shared between threads
+
+    Connections are opened lazily up to `max_size`, kept warm once returned,
+    checked before being handed out and replaced when their socket is broken.
+    """
+
+    def __init__(
+        self,
+        min_size: int = 1,
+        max_size: int = 10,
+        timeout: float = 30.0,
+        health_check_interval: float = 30.0,
+        configure=None,
+        **connect_kwargs,
+    ):
+        """
+        Initialize the pool and open `min_size` connections
+
+        Parameters
+        ----------
+        min_size : int, optional
+            Number of connections opened at startup (default: 1)
+        max_size : int, optional
+            Maximum number of simultaneously open connections (default: 10)
+        timeout : float, optional
+            Seconds to wait for a free connection before failing (default: 30)
+        health_check_interval : float, optional
+            Connections idle for longer than this are pinged before reuse
+            (default: 30)
+        configure : callable, optional
+            Called with each new connection, e.g. to register type casters or
+            to initialize its session_state
+        **connect_kwargs
+            Arguments forwarded to psycopg2.connect
+        """
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError(
+                f"Invalid pool size: min_size={min_size}, max_size={max_size}"
+            )
+
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._configure = configure
+        self._connect_kwargs = connect_kwargs
+
+        self._idle = deque()  # (connection, last_used) pairs, most recent last
+        self._size = 0  # open connections, idle or checked out
+        self._closed = False
+        self._condition = threading.Condition()
+
+        for _ in range(min_size):
+            connection = self._open()
+            with self._condition:
+                self._size += 1
+                self._idle.append((connection, time.monotonic()))
+
+    def _open(self):
+        """Open a new connection to the database"""
+        connection = psycopg2.connect(**self._connect_kwargs)
+        _sessions[connection] = {}
+        if self._configure is not None:
+            try:
+                self._configure(connection)
+            except Exception:
+                connection.close()
+                raise
+        return connection
+
+    def _discard(self, connection) -> None:
+        """Close a connection and free its slot in the pool"""
+        _sessions.pop(connection, None)
+        try:
+            if not connection.closed:
+                connection.close()
+        except Exception:
+            pass
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+
+    def _is_healthy(self, connection, last_used: float) -> bool:
+        """Check that an idle connection can still be used"""
+        if connection.closed:
+            return False
+        status = connection.get_transaction_status()
+        if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+            return False
+        if time.monotonic() - last_used < self.health_check_interval:
+            return True
+
+        # Idle for a while: the server may have dropped the socket
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            connection.rollback()
+            return True
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            return False
+
+    def getconn(self):
+        """
+        Check out a connection, waiting for one to be returned if the pool is full
+
+        Returns
+        -------
+        connection
+            A healthy psycopg2 connection
+
+        Raises
+        ------
+        PoolError
+            If the pool is closed or no connection frees up within `timeout`
+        """
+        deadline = time.monotonic() + self.timeout
+
+        while True:
+            with self._condition:
+                while True:
+                    if self._closed:
+                        raise PoolError("connection pool is closed")
+                    if self._idle:
+                        connection, last_used = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        connection, last_used = None, None
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolError(
+                            f"no connection available after {self.timeout}s "
+                            f"(max_size={self.max_size})"
+                        )
+                    self._condition.wait(remaining)
+
+            if connection is None:
+                try:
+                    return self._open()
+                except Exception:
+                    with self._condition:
+                        self._size -= 1
+                        self._condition.notify()
+                    raise
+
+            if self._is_healthy(connection, last_used):
+                return connection
+
+            # Broken socket: drop it and try again (a new one will be opened)
+            self._discard(connection)
+
+    def putconn(self, connection, discard: bool = False) -> None:
+        """
+        Return a connection to the pool
+
+        Parameters
+        ----------
+        connection : connection
+            Connection previously obtained with getconn
+        discard : bool, optional
+            If True, close the connection instead of keeping it (default: False)
+        """
+        if discard or self._closed or connection.closed:
+            self._discard(connection)
+            return
+
+        status = connection.get_transaction_status()
+        if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+            self._discard(connection)
+            return
+        if status != extensions.TRANSACTION_STATUS_IDLE:
+            # Never hand out a connection with a pending or failed transaction
+            try:
+                connection.rollback()
+            except Exception:
+                self._discard(connection)
+                return
+
+        with self._condition:
+            self._idle.append((connection, time.monotonic()))
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self):
+        """
+        Check out a connection for the duration of a `with` block
+
+        The transaction is committed when the block succeeds and rolled back
+        when it raises, like `with psycopg2_connection:`. The connection then
+        goes back to the pool, or is closed if it was broken.
+        """
+        connection = self.getconn()
+        discard = False
+        try:
+            yield connection
+        except BaseException as e:
+            if isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError)):
+                discard = True
+            if not connection.closed:
+                try:
+                    connection.rollback()
+                except Exception:
+                    discard = True
+            raise
+        else:
+            try:
+                if not connection.closed:
+                    connection.commit()
+            except Exception:
+                discard = True
+                raise
+        finally:
+            self.putconn(connection, discard=discard)
+
+    def close_all(self) -> None:
+        """Close every idle connection and refuse further checkouts"""
+        with self._condition:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._condition.notify_all()
+        for connection, _ in idle:
+            self._discard(connection)
+
+    @property
+    def stats(self) -> dict:
+        """Current number of open, idle and checked out connections"""
+        with self._condition:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+            }
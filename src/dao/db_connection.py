@@ -1,30 +1,75 @@
 import os
 import dotenv
-import psycopg2
 
 from psycopg2.extras import RealDictCursor
+from dao.connection_pool import ConnectionPool, session_state
 from utils.singleton import Singleton
+from utils.vector_codec import register_vector
+
+
+def configure_connection(connection) -> None:
+    """
+    Prepare a new pooled connection: vector columns come back as float32
+    arrays instead of strings, and the connection starts without any
+    prepared statement
+    """
+    register_vector(connection)
+    session_state(connection)["prepared_statements"] = set()
 
 
 class DBConnection(metaclass=Singleton):
     """
     Database connection class
-    It allows opening only one single connection
+    It holds one pool of connections shared by every DAO: each
+    `with DBConnection().connection as connection:` block checks out its own
+    connection and gives it back to the pool at the end of the block
     """
 
     def __init__(self):
-        """Opens the connection"""
+        """Opens the connection pool"""
         dotenv.load_dotenv()  # loads variables from .env
 
-        self.__connection = psycopg2.connect(
+        self.__pool = ConnectionPool(
+            min_size=int(os.getenv("PGPOOL_MIN_SIZE", "1")),
+            max_size=int(os.getenv("PGPOOL_MAX_SIZE", "10")),
+            timeout=float(os.getenv("PGPOOL_TIMEOUT", "30")),
+            health_check_interval=float(
+                os.getenv("PGPOOL_HEALTH_CHECK_INTERVAL", "30")
+            ),
             host=os.environ["PGHOST"],
             port=os.environ["PGPORT"],
             database=os.environ["PGDATABASE"],
             user=os.environ["PGUSER"],
             password=os.environ["PGPASSWORD"],
             cursor_factory=RealDictCursor,
+            configure=configure_connection,
         )
 
     @property
     def connection(self):
-        return self.__connection
+        """
+        Context manager checking out a pooled connection
+
+        Commits when the `with` block succeeds, rolls back when it raises,
+        then returns the connection to the pool
+        """
+        return self.__pool.connection()
+
+    @property
+    def pool(self) -> ConnectionPool:
+        return self.__pool
+
+    def close(self):
+        """Closes every connection of the pool"""
+        self.__pool.close_all()
+
+    @classmethod
+    def close_if_open(cls):
+        """
+        Closes the pool if it was ever opened, without opening it first
+
+        The instance is forgotten, so a later DBConnection() opens a new pool
+        """
+        instance = Singleton._instances.pop(cls, None)
+        if instance is not None:
+            instance.close()
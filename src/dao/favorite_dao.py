@@ -1,4 +1,5 @@
 from dao.db_connection import DBConnection
+from dao.card_dao import LIGHT_COLUMNS, card_columns, card_from_row
 from business_object.card import Card
 from utils.log_decorator import log
 
@@ -38,10 +39,25 @@ class FavoriteDAO:
             return False
 
     @log
-    def list_favorites(self, user_id: int) -> list[dict]:
-        """Retrieves all favorite cards of a user"""
-        query = """
-        SELECT f.card_id, c.id, c.name, c.text, c.embedding_of_text
+    def list_favorite_ids(self, user_id: int) -> list[int]:
+        """Retrieves the ids of a user's favorite cards"""
+        query = "SELECT card_id FROM project.favorites WHERE user_id = %s;"
+        try:
+            with DBConnection().connection as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute(query, (user_id,))
+                    return [row["card_id"] for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"❌ Database error: {e}")
+            raise
+
+    @log
+    def list_favorites(
+        self, user_id: int, columns: tuple[str, ...] = LIGHT_COLUMNS
+    ) -> list[Card]:
+        """Retrieves all favorite cards of a user (without embeddings by default)"""
+        query = f"""
+        SELECT {card_columns(columns, "c")}
         FROM project.favorites f
         JOIN project.cards c ON f.card_id = c.id
         WHERE f.user_id = %s
@@ -58,14 +74,7 @@ class FavoriteDAO:
                     if not rows:
                         return []
 
-                    for row in rows:
-                        card = Card(
-                            id=row["id"],
-                            name=row["name"],
-                            text=row["text"],
-                            embedding_of_text=row["embedding_of_text"],
-                        )
-                        cards.append(card)
+                    cards = [card_from_row(row) for row in rows]
 
         except Exception as e:
             print(f"❌ Database error: {e}")
@@ -1,21 +1,31 @@
 from dao.db_connection import DBConnection
 from business_object.historical_search import HistoricalSearch
-from typing import List
+from typing import List, Optional
+from utils.pg_binary_copy import BinaryCopyStream
+from utils.vector_codec import Vector
 
 
 class HistoricalDao:
     """Class to access search history in the database"""
 
+    @staticmethod
+    def _from_row(row) -> HistoricalSearch:
+        return HistoricalSearch(
+            id=row["id"],
+            user_id=row["user_id"],
+            query_text=row["query_text"],
+            query_embedding=row.get("query_embedding"),
+            result_count=row["result_count"],
+            created_at=row["created_at"],
+            embedding_dimensions=row.get("embedding_dimensions"),
+        )
+
     def create(self, historical_search: HistoricalSearch) -> bool:
         """Adds a search to the history"""
         try:
-            embedding_str = None
-            if historical_search.query_embedding:
-                embedding_str = (
-                    "["
-                    + ",".join(str(f) for f in historical_search.query_embedding)
-                    + "]"
-                )
+            embedding = None
+            if historical_search.query_embedding is not None:
+                embedding = Vector(historical_search.query_embedding)
 
             with DBConnection().connection as connection:
                 with connection.cursor() as cursor:
@@ -23,13 +33,13 @@ class HistoricalDao:
                         """
                         INSERT INTO project.search_history 
                         (user_id, query_text, query_embedding, result_count, created_at)
-                        VALUES (%s, %s, %s::vector, %s, %s)
+                        VALUES (%s, %s, %s, %s, %s)
                         RETURNING id
                         """,
                         (
                             historical_search.user_id,
                             historical_search.query_text,
-                            embedding_str,
+                            embedding,
                             historical_search.result_count,
                             historical_search.created_at,
                         ),
@@ -41,6 +51,50 @@ class HistoricalDao:
             print(f"❌ Error adding to history: {e}")
             return False
 
+    def create_many(self, searches: List[HistoricalSearch]) -> int:
+        """
+        Adds several searches in one transaction with a binary COPY
+
+        The ids are not read back: `search.id` stays None.
+
+        Returns
+        -------
+        int
+            Number of searches written
+        """
+        if not searches:
+            return 0
+
+        rows = (
+            (
+                search.user_id,
+                search.query_text,
+                search.query_embedding,
+                search.result_count,
+                search.created_at,
+            )
+            for search in searches
+        )
+        try:
+            with DBConnection().connection as connection:
+                with connection.cursor() as cursor:
+                    stream = BinaryCopyStream(
+                        rows, ["int", "text", "vector", "int", "timestamp"]
+                    )
+                    cursor.copy_expert(
+                        """
+                        COPY project.search_history
+                        (user_id, query_text, query_embedding, result_count, created_at)
+                        FROM STDIN WITH (FORMAT binary)
+                        """,
+                        stream,
+                    )
+                connection.commit()
+            return stream.rows_written
+        except Exception as e:
+            print(f"❌ Error adding to history: {e}")
+            raise
+
     def find_by_user_id(
         self, user_id: int, limit: int = 50, offset: int = 0
     ) -> List[HistoricalSearch]:
@@ -51,29 +105,96 @@ class HistoricalDao:
                 with connection.cursor() as cursor:
                     cursor.execute(
                         """
-                        SELECT id, user_id, query_text, query_embedding, 
+                        SELECT id, user_id, query_text,
+                               vector_dims(query_embedding) AS embedding_dimensions,
                                result_count, created_at
                         FROM project.search_history
                         WHERE user_id = %s
-                        ORDER BY created_at DESC
+                        ORDER BY created_at DESC, id DESC
                         LIMIT %s OFFSET %s
                         """,
                         (user_id, limit, offset),
                     )
-                    for row in cursor.fetchall():
-                        search = HistoricalSearch(
-                            id=row["id"],
-                            user_id=row["user_id"],
-                            query_text=row["query_text"],
-                            query_embedding=row["query_embedding"],
-                            result_count=row["result_count"],
-                            created_at=row["created_at"],
-                        )
-                        searches.append(search)
+                    searches = [self._from_row(row) for row in cursor.fetchall()]
         except Exception as e:
             print(f"❌ Error retrieving history: {e}")
         return searches
 
+    def find_page_by_user_id(
+        self, user_id: int, limit: int = 20, after: Optional[tuple] = None
+    ) -> List[HistoricalSearch]:
+        """
+        Retrieves one page of the history of a user, most recent first
+
+        Keyset pagination: the page starts right after the (created_at, id)
+        of the last search of the previous page, so the index on
+        (user_id, created_at DESC, id DESC) is read from that point on
+        instead of skipping OFFSET rows. Only the size of the query embedding
+        is read, never the vector.
+
+        Parameters
+        ----------
+        user_id : int
+            Owner of the history
+        limit : int, optional
+            Maximum number of searches (default: 20)
+        after : tuple or None, optional
+            (created_at, id) of the last search already seen, None for the
+            first page
+
+        Returns
+        -------
+        List[HistoricalSearch]
+            The searches of the page
+        """
+        condition, params = "", (user_id,)
+        if after is not None:
+            condition = "AND (created_at, id) < (%s, %s)"
+            params += tuple(after)
+        try:
+            with DBConnection().connection as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f"""
+                        SELECT id, user_id, query_text,
+                               vector_dims(query_embedding) AS embedding_dimensions,
+                               result_count, created_at
+                        FROM project.search_history
+                        WHERE user_id = %s {condition}
+                        ORDER BY created_at DESC, id DESC
+                        LIMIT %s
+                        """,
+                        params + (limit,),
+                    )
+                    return [self._from_row(row) for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"❌ Error retrieving history: {e}")
+            raise
+
+    def find_by_id_for_user(
+        self, search_id: int, user_id: int
+    ) -> Optional[HistoricalSearch]:
+        """Retrieves a search if it belongs to the user (one primary key lookup)"""
+        try:
+            with DBConnection().connection as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        """
+                        SELECT id, user_id, query_text,
+                               vector_dims(query_embedding) AS embedding_dimensions,
+                               result_count, created_at
+                        FROM project.search_history
+                        WHERE id = %s AND user_id = %s
+                        """,
+                        (search_id, user_id),
+                    )
+                    row = cursor.fetchone()
+        except Exception as e:
+            print(f"❌ Error retrieving search: {e}")
+            raise
+
+        return self._from_row(row) if row is not None else None
+
     def count_by_user_id(self, user_id: int) -> int:
         """Counts the number of searches for a user"""
         try:
@@ -92,6 +213,83 @@ class HistoricalDao:
             print(f"❌ Error counting history: {e}")
             return 0
 
+    def get_stats_by_user_id(
+        self, user_id: int, top_queries: int = 5, days: int = 30
+    ) -> dict:
+        """
+        Search statistics of a user, aggregated by the database in one query
+
+        Parameters
+        ----------
+        user_id : int
+            Owner of the history
+        top_queries : int, optional
+            Number of most repeated queries returned (default: 5)
+        days : int, optional
+            Number of days, today included, counted in searches_per_day
+            (default: 30)
+
+        Returns
+        -------
+        dict
+            total_searches, total_results, avg_results, max_results,
+            zero_result_searches, most_recent, oldest, top_queries
+            ([{"query", "count"}]) and searches_per_day ([{"day", "count"}])
+        """
+        try:
+            with DBConnection().connection as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        """
+                        SELECT COUNT(*) AS total_searches,
+                               COALESCE(SUM(result_count), 0) AS total_results,
+                               COALESCE(AVG(COALESCE(result_count, 0)), 0)
+                                   AS avg_results,
+                               MAX(result_count) AS max_results,
+                               COUNT(*) FILTER (WHERE result_count = 0)
+                                   AS zero_result_searches,
+                               MAX(created_at) AS most_recent,
+                               MIN(created_at) AS oldest,
+                               (
+                                   SELECT COALESCE(json_agg(
+                                       json_build_object(
+                                           'query', q.query, 'count', q.count
+                                       )
+                                       ORDER BY q.count DESC, q.last_searched DESC
+                                   ), '[]')
+                                   FROM (
+                                       SELECT query_text AS query, COUNT(*) AS count,
+                                              MAX(created_at) AS last_searched
+                                       FROM project.search_history
+                                       WHERE user_id = %(user_id)s
+                                       GROUP BY query_text
+                                       ORDER BY count DESC, last_searched DESC
+                                       LIMIT %(top_queries)s
+                                   ) q
+                               ) AS top_queries,
+                               (
+                                   SELECT COALESCE(json_agg(d ORDER BY d.day), '[]')
+                                   FROM (
+                                       SELECT created_at::date AS day, COUNT(*) AS count
+                                       FROM project.search_history
+                                       WHERE user_id = %(user_id)s
+                                         AND created_at >= CURRENT_DATE - %(days)s + 1
+                                       GROUP BY created_at::date
+                                   ) d
+                               ) AS searches_per_day
+                        FROM project.search_history
+                        WHERE user_id = %(user_id)s
+                        """,
+                        {"user_id": user_id, "top_queries": top_queries, "days": days},
+                    )
+                    row = dict(cursor.fetchone())
+        except Exception as e:
+            print(f"❌ Error computing history statistics: {e}")
+            raise
+
+        row["avg_results"] = float(row["avg_results"])
+        return row
+
     def delete_by_id(self, search_id: int) -> bool:
         """Deletes a specific search by its ID"""
         try:
@@ -108,6 +306,25 @@ class HistoricalDao:
             print(f"❌ Error deleting search: {e}")
             return False
 
+    def delete_by_id_for_user(self, search_id: int, user_id: int) -> bool:
+        """Deletes a search if it belongs to the user, False if it does not"""
+        try:
+            with DBConnection().connection as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        """
+                        DELETE FROM project.search_history
+                        WHERE id = %s AND user_id = %s
+                        """,
+                        (search_id, user_id),
+                    )
+                    deleted = cursor.rowcount > 0
+                connection.commit()
+            return deleted
+        except Exception as e:
+            print(f"❌ Error deleting search: {e}")
+            raise
+
     def delete_all_by_user_id(self, user_id: int) -> bool:
         """Deletes all history for a user"""
         try:
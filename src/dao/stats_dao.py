@@ -0,0 +1,47 @@
+from dao.db_connection import DBConnection
+from utils.log_decorator import log
+
+
+class StatsDao:
+    """Class to compute platform-wide statistics in the database"""
+
+    @log
+    def global_stats(self) -> dict:
+        """
+        Counts the users by type, the active users and all the searches
+
+        One grouped query: no user row leaves the database.
+
+        Returns
+        -------
+        dict
+            users_by_type ({user_type: count}), active_users, total_users
+            and total_searches
+        """
+        try:
+            with DBConnection().connection as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        """
+                        SELECT user_type,
+                               COUNT(*) AS total,
+                               COUNT(*) FILTER (WHERE is_active) AS active,
+                               (SELECT COUNT(*) FROM project.search_history)
+                                   AS total_searches
+                        FROM project.users
+                        GROUP BY user_type
+                        """
+                    )
+                    rows = cursor.fetchall()
+        except Exception as e:
+            print(f"❌ Error computing global statistics: {e}")
+            raise
+
+        users_by_type = {row["user_type"]: row["total"] for row in rows}
+        return {
+            "users_by_type": users_by_type,
+            "active_users": sum(row["active"] for row in rows),
+            "total_users": sum(users_by_type.values()),
+            # Every search belongs to a user: no user, no search
+            "total_searches": rows[0]["total_searches"] if rows else 0,
+        }
@@ -0,0 +1,271 @@
+"""
+Management of the pgvector indexes on project.cards.embedding_of_text
+"""
+
+import math
+import os
+
+import dotenv
+
+from dao.db_connection import DBConnection
+
+# Operator class matching the distance operator of each search route
+OPERATOR_CLASSES = {
+    "L2": "vector_l2_ops",  # <->
+    "cosine": "vector_cosine_ops",  # <=>
+    "inner_product": "vector_ip_ops",  # <#>
+}
+INDEX_TYPES = ("hnsw", "ivfflat")
+
+# Name of the single index created by earlier versions of init_db.sql
+LEGACY_INDEX_NAME = "cards_embedding_idx"
+
+DEFAULT_PROBES = 10
+DEFAULT_EF_SEARCH = 40
+# Upper bound of hnsw.ef_search accepted by pgvector
+MAX_EF_SEARCH = 1000
+
+# First pgvector release with iterative index scans
+ITERATIVE_SCAN_VERSION = (0, 8)
+
+_pgvector_version = None
+
+
+def index_name(metric: str) -> str:
+    """Name of the index serving the `metric` search route"""
+    return f"cards_embedding_{metric.lower()}_idx"
+
+
+def index_parameters(index_type: str, row_count: int) -> dict:
+    """
+    Build parameters of an index sized for `row_count` vectors
+
+    IVFFlat follows the pgvector guideline (rows / 1000 lists up to 1M rows,
+    sqrt(rows) above). HNSW keeps the pgvector defaults on small tables and
+    raises m / ef_construction on larger ones for better recall.
+
+    Parameters
+    ----------
+    index_type : str
+        "hnsw" or "ivfflat"
+    row_count : int
+        Number of cards with an embedding
+
+    Returns
+    -------
+    dict
+        WITH (...) parameters of the index
+    """
+    if index_type == "ivfflat":
+        if row_count <= 1_000_000:
+            lists = row_count // 1000
+        else:
+            lists = int(math.sqrt(row_count))
+        return {"lists": max(1, lists)}
+    if index_type == "hnsw":
+        if row_count < 100_000:
+            return {"m": 16, "ef_construction": 64}
+        if row_count < 1_000_000:
+            return {"m": 24, "ef_construction": 128}
+        return {"m": 32, "ef_construction": 200}
+    raise ValueError(
+        f"Unknown vector index type: {index_type}. Use one of {', '.join(INDEX_TYPES)}"
+    )
+
+
+def vector_search_settings(
+    top_k: int, probes: int | None = None, ef_search: int | None = None
+) -> dict:
+    """
+    Per-query index settings, from the arguments or the environment
+
+    Parameters
+    ----------
+    top_k : int
+        Number of results requested; hnsw.ef_search is never set below it,
+        nor above MAX_EF_SEARCH
+    probes : int or None, optional
+        IVFFlat lists scanned (default: VECTOR_SEARCH_PROBES or 10)
+    ef_search : int or None, optional
+        HNSW candidate list size (default: VECTOR_SEARCH_EF_SEARCH or 40)
+
+    Returns
+    -------
+    dict
+        {setting name: value}, to apply with set_config(..., true)
+    """
+    if probes is None:
+        probes = int(os.getenv("VECTOR_SEARCH_PROBES", DEFAULT_PROBES))
+    if ef_search is None:
+        ef_search = int(os.getenv("VECTOR_SEARCH_EF_SEARCH", DEFAULT_EF_SEARCH))
+    return {
+        "ivfflat.probes": probes,
+        "hnsw.ef_search": min(max(ef_search, top_k), MAX_EF_SEARCH),
+    }
+
+
+def pgvector_version(cursor) -> tuple[int, ...]:
+    """
+    Installed pgvector version, read from the database once per process
+
+    Parameters
+    ----------
+    cursor : cursor
+        Open cursor (RealDictCursor) used for the first lookup
+
+    Returns
+    -------
+    tuple[int, ...]
+        e.g. (0, 8, 0), empty when the extension is not installed
+    """
+    global _pgvector_version
+    if _pgvector_version is None:
+        cursor.execute("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+        row = cursor.fetchone()
+        _pgvector_version = (
+            tuple(int(part) for part in row["extversion"].split(".")) if row else ()
+        )
+    return _pgvector_version
+
+
+def supports_iterative_scan(cursor) -> bool:
+    """Whether hnsw / ivfflat.iterative_scan exist (pgvector 0.8+)"""
+    return pgvector_version(cursor) >= ITERATIVE_SCAN_VERSION
+
+
+class VectorIndexDao:
+    """
+    Create and drop the vector indexes of the cards
+
+    One index is built per search metric, with the operator class of its
+    distance operator; an index built with another operator class is ignored
+    by the planner. Configured by VECTOR_INDEX_TYPE (hnsw or ivfflat, default
+    hnsw) and VECTOR_INDEX_METRICS (default "L2,cosine"). VECTOR_INDEX_LISTS,
+    VECTOR_INDEX_M and VECTOR_INDEX_EF_CONSTRUCTION override the parameters
+    derived from the row count.
+    """
+
+    def __init__(self, index_type: str | None = None, metrics: list[str] | None = None):
+        dotenv.load_dotenv()
+        self.index_type = (index_type or os.getenv("VECTOR_INDEX_TYPE", "hnsw")).lower()
+        if self.index_type not in INDEX_TYPES:
+            raise ValueError(
+                f"Unknown vector index type: {self.index_type}. "
+                f"Use one of {', '.join(INDEX_TYPES)}"
+            )
+        if metrics is None:
+            metrics = os.getenv("VECTOR_INDEX_METRICS", "L2,cosine").split(",")
+        self.metrics = [metric.strip() for metric in metrics if metric.strip()]
+        for metric in self.metrics:
+            if metric not in OPERATOR_CLASSES:
+                raise ValueError(
+                    f"Invalid distance metric: {metric}. "
+                    f"Use one of {', '.join(OPERATOR_CLASSES)}"
+                )
+
+    def parameters(self, row_count: int) -> dict:
+        """Index parameters for `row_count` vectors, with environment overrides"""
+        params = index_parameters(self.index_type, row_count)
+        overrides = {
+            "lists": "VECTOR_INDEX_LISTS",
+            "m": "VECTOR_INDEX_M",
+            "ef_construction": "VECTOR_INDEX_EF_CONSTRUCTION",
+        }
+        for param, env_var in overrides.items():
+            if param in params and os.getenv(env_var):
+                params[param] = int(os.getenv(env_var))
+        return params
+
+    def count_embedded(self) -> int:
+        """Number of cards with an embedding"""
+        with DBConnection().connection as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    """
+                    SELECT COUNT(*) AS n
+                    FROM project.cards
+                    WHERE embedding_of_text IS NOT NULL
+                    """
+                )
+                return cursor.fetchone()["n"]
+
+    def existing(self) -> set[str]:
+        """Names of the indexes of the cards table"""
+        with DBConnection().connection as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    """
+                    SELECT indexname
+                    FROM pg_indexes
+                    WHERE schemaname = 'project' AND tablename = 'cards'
+                    """
+                )
+                return {row["indexname"] for row in cursor.fetchall()}
+
+    def drop(self) -> None:
+        """Drop every vector index of the cards (before a bulk load)"""
+        names = [LEGACY_INDEX_NAME] + [index_name(m) for m in OPERATOR_CLASSES]
+        try:
+            with DBConnection().connection as connection:
+                with connection.cursor() as cursor:
+                    for name in names:
+                        cursor.execute(f"DROP INDEX IF EXISTS project.{name}")
+                connection.commit()
+        except Exception as e:
+            print(f"❌ Error dropping vector indexes: {e}")
+            raise
+
+    def create(self, row_count: int | None = None) -> list[str]:
+        """
+        Create the vector indexes that do not exist yet (after a bulk load)
+
+        Parameters
+        ----------
+        row_count : int or None, optional
+            Number of embedded cards, counted when None
+
+        Returns
+        -------
+        list[str]
+            Names of the created indexes
+        """
+        existing = self.existing()
+        metrics = [m for m in self.metrics if index_name(m) not in existing]
+        if not metrics:
+            return []
+        if row_count is None:
+            row_count = self.count_embedded()
+        params = self.parameters(row_count)
+        with_clause = ", ".join(f"{key} = {value}" for key, value in params.items())
+
+        created = []
+        try:
+            with DBConnection().connection as connection:
+                with connection.cursor() as cursor:
+                    for metric in metrics:
+                        name = index_name(metric)
+                        print(
+                            f"🔧 Creating {self.index_type} index {name} "
+                            f"({OPERATOR_CLASSES[metric]}, {with_clause}, "
+                            f"{row_count} vectors)"
+                        )
+                        cursor.execute(
+                            f"""
+                            CREATE INDEX IF NOT EXISTS {name}
+                            ON project.cards
+                            USING {self.index_type}
+                                (embedding_of_text {OPERATOR_CLASSES[metric]})
+                            WITH ({with_clause})
+                            """
+                        )
+                        created.append(name)
+                connection.commit()
+        except Exception as e:
+            print(f"❌ Error creating vector indexes: {e}")
+            raise
+        return created
+
+    def rebuild(self) -> list[str]:
+        """Drop and recreate the vector indexes, sized for the current data"""
+        self.drop()
+        return self.create()
@@ -2,13 +2,25 @@
 Service layer for card operations with embedding support
 """
 
-import random
 import re
 from technical_components.embedding.ollama_embedding import get_embedding
+from technical_components.embedding.reembedding_queue import get_reembedding_queue
+from technical_components.search.in_memory_search import (
+    get_search_engine,
+    loaded_search_engine,
+)
+from technical_components.search.name_index import get_name_index, loaded_name_index
 from dao.card_dao import CardDao
+from dao.favorite_dao import FavoriteDAO
+from service.history_writer import get_history_writer
 from business_object.card import Card
+from business_object.card_filter import CardFilter
+from business_object.historical_search import HistoricalSearch
 from utils.log_decorator import log
 
+# Most results a single search returns
+MAX_SEARCH_RESULTS = 100
+
 
 class CardService:
     """Service to manage card operations"""
@@ -37,13 +49,23 @@ class CardService:
         card = Card(None, name, text)
         try:
             # Generate embedding if text exists
+            model = None
             if card.text:
                 embedding_response = get_embedding(card.text)
                 card.embedding_of_text = embedding_response["embeddings"][0]
+                model = embedding_response["model"]
 
             # Persist via DAO
             print(f"Creating card: {card.name}")
-            return self.dao.create(card)
+            created = self.dao.create(card, embedding_model=model)
+
+            engine = loaded_search_engine()
+            if created and engine is not None and card.embedding_of_text is not None:
+                engine.upsert(card.id, card.embedding_of_text, card.name, card.text)
+            name_index = loaded_name_index()
+            if created and name_index is not None and card.id is not None:
+                name_index.add(card.id, card.name)
+            return created
 
         except Exception as e:
             print(f"❌ Unable to add card: {e}")
@@ -54,6 +76,9 @@ class CardService:
         """
         Modify specified fields of an existing card
 
+        When the text changes, the card is queued for re-embedding in the
+        background; its old vector is served until the new one is written.
+
         Parameters
         ----------
         card : Card
@@ -70,6 +95,16 @@ class CardService:
         success = self.dao.modify_card(card, updates)
         if success:
             print("✅ Card modified successfully")
+            engine = loaded_search_engine()
+            if engine is not None:
+                engine.upsert(
+                    card.id, name=updates.get("name"), text=updates.get("text")
+                )
+            name_index = loaded_name_index()
+            if name_index is not None and updates.get("name"):
+                name_index.add(card.id, updates["name"])
+            if "text" in updates:
+                get_reembedding_queue().enqueue(card.id)
         else:
             print("❌ Modification failed")
         return success
@@ -90,7 +125,14 @@ class CardService:
             True if deletion succeeded, False otherwise
         """
         print(f"Attempting to delete card: {card.name} (id={card.id})")
-        return self.dao.delete(card)
+        deleted = self.dao.delete(card)
+        engine = loaded_search_engine()
+        if deleted and engine is not None:
+            engine.remove(card.id)
+        name_index = loaded_name_index()
+        if deleted and name_index is not None:
+            name_index.remove(card.id)
+        return deleted
 
     @log
     def describe_card(self, card_id: int) -> str:
@@ -220,7 +262,7 @@ class CardService:
             return f"Error: Could not describe card {card_id}"
 
     @log
-    def search_by_name(self, name: str) -> list[Card]:
+    def search_by_name(self, name: str, limit: int = 20) -> list[Card]:
         """
         Search for cards whose name contains the given text
 
@@ -228,6 +270,8 @@ class CardService:
         ----------
         name : str
             Name (or partial name) of the card to search for
+        limit : int, optional
+            Maximum number of cards returned, best match first (default: 20)
 
         Returns
         -------
@@ -242,7 +286,7 @@ class CardService:
         if not name or not isinstance(name, str):
             raise ValueError("Card name must be a non-empty string")
 
-        cards_found = self.dao.search_by_name(name)
+        cards_found = self.dao.search_by_name(name, limit)
 
         if not cards_found:
             print(f"❌ No cards found for '{name}'")
@@ -250,6 +294,28 @@ class CardService:
 
         return cards_found
 
+    def suggest_names(
+        self, prefix: str, limit: int = 10, fuzzy: bool = True
+    ) -> list[tuple[int, str]]:
+        """
+        Typeahead suggestions of card names, from the in-memory name index
+
+        Parameters
+        ----------
+        prefix : str
+            Beginning of the name typed so far
+        limit : int, optional
+            Maximum number of suggestions (default: 10)
+        fuzzy : bool, optional
+            Fall back to close matches when no name matches (default: True)
+
+        Returns
+        -------
+        list[tuple[int, str]]
+            (card id, name) pairs, see NameIndex.suggest
+        """
+        return get_name_index().suggest(prefix, limit, fuzzy)
+
     @log
     def find_by_id(self, card_id: int) -> Card:
         """
@@ -283,7 +349,15 @@ class CardService:
 
     @log
     def semantic_search(
-        self, text: str, top_k: int = 5, distance: str = "L2", user_id: int = None
+        self,
+        text: str,
+        top_k: int = 5,
+        distance: str = "L2",
+        user_id: int = None,
+        probes: int | None = None,
+        ef_search: int | None = None,
+        exclude_ids: list[int] | None = None,
+        exclude_favorites: bool = False,
     ) -> list[tuple[Card, float]]:
         """
         Optimized semantic search using pgvector
@@ -292,6 +366,9 @@ class CardService:
         BEFORE: Retrieved all cards, calculated in Python (slow)
         AFTER: All computation done in SQL (fast)
 
+        With SEARCH_ENGINE=memory, the exact in-process engine answers first;
+        pgvector is used when it is disabled, not loaded or fails.
+
         Parameters
         ----------
         text : str
@@ -299,9 +376,15 @@ class CardService:
         top_k : int, optional
             Number of results to return (default: 5)
         distance : str, optional
-            Distance metric: "L2" or "cosine" (default: "L2")
+            Distance metric: "L2", "cosine" or "inner_product" (default: "L2")
         user_id : int, optional
             ID of the user (if provided, search is logged to history)
+        probes, ef_search : int or None, optional
+            Index search effort for this query (see CardDao.semantic_search)
+        exclude_ids : list[int] or None, optional
+            Cards to leave out of the results (FO3b)
+        exclude_favorites : bool, optional
+            If True, also leave out the favorites of `user_id`
 
         Returns
         -------
@@ -310,33 +393,44 @@ class CardService:
 
         Raises
         ------
+        ValueError
+            If top_k is out of range or exclude_favorites is set without a user
         Exception
             If embedding generation or database query fails
         """
+        self._check_top_k(top_k)
+        exclude_ids = self._excluded_cards(exclude_ids, exclude_favorites, user_id)
+
         try:
             # Generate embedding for search text
             embedding_response = get_embedding(text)
             query_embedding = embedding_response["embeddings"][0]
 
-            # Direct SQL search via pgvector (FAST!)
-            # No Python loop or pandas needed!
-            results = self.dao.semantic_search(query_embedding, top_k, distance)
-
-            # NOUVEAU: Enregistrer dans l'historique si user_id fourni
-            if user_id is not None:
+            results = None
+            engine = get_search_engine()
+            if engine is not None:
                 try:
-                    from service.historical_service import HistoricalService
-
-                    history_service = HistoricalService()
-                    history_service.add_search(
-                        user_id=user_id,
-                        query_text=text,
-                        result_count=len(results),
-                        query_embedding=None,  # On ne sauvegarde pas l'embedding pour économiser de l'espace
+                    results = engine.search(
+                        query_embedding, top_k, distance, exclude_ids
                     )
                 except Exception as e:
-                    print(f"⚠️  Warning: Could not save to history: {e}")
-                    # Ne pas lever l'erreur, continuer quand même
+                    print(f"⚠️  In-memory search failed, using pgvector: {e}")
+
+            if results is None:
+                # Direct SQL search via pgvector (FAST!)
+                # No Python loop or pandas needed!
+                results = self.dao.semantic_search(
+                    query_embedding,
+                    top_k,
+                    distance,
+                    probes=probes,
+                    ef_search=ef_search,
+                    exclude_ids=exclude_ids,
+                )
+
+            # NOUVEAU: Enregistrer dans l'historique si user_id fourni
+            if user_id is not None:
+                self._save_to_history(user_id, text, len(results))
 
             return results
 
@@ -344,6 +438,125 @@ class CardService:
             print(f"❌ Error during semantic search: {e}")
             raise
 
+    @staticmethod
+    def _check_top_k(top_k: int) -> None:
+        """Reject result counts the search routes do not serve"""
+        if not isinstance(top_k, int) or not 1 <= top_k <= MAX_SEARCH_RESULTS:
+            raise ValueError(
+                f"The number of results must be between 1 and {MAX_SEARCH_RESULTS}"
+            )
+
+    @staticmethod
+    def _excluded_cards(
+        exclude_ids: list[int] | None, exclude_favorites: bool, user_id: int | None
+    ) -> list[int]:
+        """Ids to exclude from a search, with the user favorites if requested"""
+        excluded = set(exclude_ids or [])
+        if exclude_favorites:
+            if user_id is None:
+                raise ValueError("Excluding favorites requires a logged-in user")
+            excluded.update(FavoriteDAO().list_favorite_ids(user_id))
+        return sorted(excluded)
+
+    def _save_to_history(self, user_id: int, text: str, result_count: int) -> None:
+        """Queue a search for the user history, without failing or slowing it"""
+        try:
+            get_history_writer().enqueue(
+                HistoricalSearch(
+                    id=None,
+                    user_id=user_id,
+                    query_text=text,
+                    result_count=result_count,
+                    query_embedding=None,  # On ne sauvegarde pas l'embedding pour économiser de l'espace
+                )
+            )
+        except Exception as e:
+            print(f"⚠️  Warning: Could not save to history: {e}")
+            # Ne pas lever l'erreur, continuer quand même
+
+    @log
+    def hybrid_search(
+        self,
+        text: str,
+        filters: CardFilter,
+        top_k: int = 5,
+        distance: str = "L2",
+        user_id: int = None,
+        probes: int | None = None,
+        ef_search: int | None = None,
+        exclude_ids: list[int] | None = None,
+        exclude_favorites: bool = False,
+    ) -> list[tuple[Card, float]]:
+        """
+        Semantic search combined with structured filters (FO3a)
+
+        The filtering and the ranking both run in SQL (CardDao.hybrid_search).
+        Without any criterion this is a plain semantic_search.
+
+        Parameters
+        ----------
+        text : str
+            Search text
+        filters : CardFilter
+            Colors, type, mana value range, format legality and keywords
+        top_k : int, optional
+            Number of results to return (default: 5)
+        distance : str, optional
+            Distance metric: "L2", "cosine" or "inner_product" (default: "L2")
+        user_id : int, optional
+            ID of the user (if provided, search is logged to history)
+        probes, ef_search : int or None, optional
+            Index search effort for this query (see CardDao.semantic_search)
+        exclude_ids, exclude_favorites : optional
+            Cards to leave out of the results (see semantic_search)
+
+        Returns
+        -------
+        list[tuple[Card, float]]
+            List of tuples (Card, similarity_score)
+
+        Raises
+        ------
+        ValueError
+            If top_k is out of range or exclude_favorites is set without a user
+        """
+        self._check_top_k(top_k)
+        if filters is None or filters.is_empty():
+            return self.semantic_search(
+                text,
+                top_k,
+                distance,
+                user_id,
+                probes=probes,
+                ef_search=ef_search,
+                exclude_ids=exclude_ids,
+                exclude_favorites=exclude_favorites,
+            )
+        exclude_ids = self._excluded_cards(exclude_ids, exclude_favorites, user_id)
+
+        try:
+            embedding_response = get_embedding(text)
+            query_embedding = embedding_response["embeddings"][0]
+
+            results = self.dao.hybrid_search(
+                query_embedding,
+                filters,
+                top_k,
+                distance,
+                probes=probes,
+                ef_search=ef_search,
+                exclude_ids=exclude_ids,
+            )
+
+            if user_id is not None:
+                self._save_to_history(user_id, text, len(results))
+
+            return results
+
+        except Exception as e:
+            print(f"❌ Error during hybrid search: {e}")
+            raise
+
     @log
     def random(self) -> Card:
         """
@@ -354,10 +567,32 @@ class CardService:
         Card or None
             Random Card object, or None if no cards exist
         """
-        ids = self.dao.get_all_ids()
-        if not ids:
+        cards = self.dao.random_cards(1)
+        if not cards:
             print("❌ No cards found in database")
             return None
+        return cards[0]
 
-        random_id = random.choice(ids)
-        return self.dao.find_by_id(random_id)
+    @log
+    def random_cards(self, n: int) -> list[Card]:
+        """
+        Retrieve `n` distinct random cards in a single query
+
+        Parameters
+        ----------
+        n : int
+            Number of cards, between 1 and 100
+
+        Returns
+        -------
+        list[Card]
+            Random cards (fewer if the database holds fewer cards)
+
+        Raises
+        ------
+        ValueError
+            If n is out of range
+        """
+        if not isinstance(n, int) or not 1 <= n <= 100:
+            raise ValueError("The number of random cards must be between 1 and 100")
+        return self.dao.random_cards(n)
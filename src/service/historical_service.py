@@ -1,6 +1,75 @@
 from dao.historical_dao import HistoricalDao
 from business_object.historical_search import HistoricalSearch
 from typing import List, Optional
+import base64
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+
+# Seconds a user's statistics are served from the cache at most
+STATS_CACHE_TTL = 60
+# Users whose statistics are kept in the cache
+STATS_CACHE_SIZE = 256
+
+
+class _StatsCache:
+    """Small LRU cache of statistics by user id, shared by every service"""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # user id -> (stats, stored_at)
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            stats, stored_at = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return stats
+
+    def put(self, user_id: int, stats: dict) -> None:
+        with self._lock:
+            self._entries[user_id] = (stats, time.monotonic())
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: Optional[int] = None) -> None:
+        """Forget one user, or everyone when user_id is None"""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+
+
+_stats_cache = _StatsCache(STATS_CACHE_SIZE, STATS_CACHE_TTL)
+
+
+def encode_history_cursor(search: HistoricalSearch) -> str:
+    """Opaque cursor pointing right after `search` in a history listing"""
+    key = f"{search.created_at.isoformat()}|{search.id}"
+    return base64.urlsafe_b64encode(key.encode()).decode().rstrip("=")
+
+
+def decode_history_cursor(cursor: str) -> tuple:
+    """(created_at, id) of a cursor, ValueError if it is malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, search_id = (
+            base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        )
+        return datetime.fromisoformat(created_at), int(search_id)
+    except Exception:
+        raise ValueError(f"Invalid history cursor: {cursor!r}")
 
 
 class HistoricalService:
@@ -24,7 +93,16 @@ class HistoricalService:
             query_embedding=query_embedding,
             result_count=result_count,
         )
-        return self.dao.create(search)
+        created = self.dao.create(search)
+        _stats_cache.invalidate(user_id)
+        return created
+
+    def add_searches(self, searches: List[HistoricalSearch]) -> int:
+        """Adds several searches at once, returns the number written"""
+        written = self.dao.create_many(searches)
+        for user_id in {search.user_id for search in searches}:
+            _stats_cache.invalidate(user_id)
+        return written
 
     def get_user_history(
         self, user_id: int, limit: int = 50, offset: int = 0
@@ -32,17 +110,34 @@ class HistoricalService:
         """Retrieves a user's history"""
         return self.dao.find_by_user_id(user_id, limit, offset)
 
+    def find_search_for_user(
+        self, search_id: int, user_id: int
+    ) -> Optional[HistoricalSearch]:
+        """Retrieves one search of a user, None if missing or not theirs"""
+        return self.dao.find_by_id_for_user(search_id, user_id)
+
     def get_history_count(self, user_id: int) -> int:
         """Counts the number of searches"""
         return self.dao.count_by_user_id(user_id)
 
     def delete_search(self, search_id: int) -> bool:
         """Deletes a specific search by its ID"""
-        return self.dao.delete_by_id(search_id)
+        deleted = self.dao.delete_by_id(search_id)
+        # The owner is unknown here
+        _stats_cache.invalidate()
+        return deleted
+
+    def delete_search_for_user(self, search_id: int, user_id: int) -> bool:
+        """Deletes one search of a user, False if missing or not theirs"""
+        deleted = self.dao.delete_by_id_for_user(search_id, user_id)
+        _stats_cache.invalidate(user_id)
+        return deleted
 
     def clear_user_history(self, user_id: int) -> bool:
         """Clears all of a user's history"""
-        return self.dao.delete_all_by_user_id(user_id)
+        cleared = self.dao.delete_all_by_user_id(user_id)
+        _stats_cache.invalidate(user_id)
+        return cleared
 
     def get_paginated_history(
         self, user_id: int, page: int = 1, per_page: int = 20
@@ -61,31 +156,73 @@ class HistoricalService:
             "total_pages": total_pages,
         }
 
-    def get_stats(self, user_id: int) -> dict:
-        """Retrieves search statistics for a user"""
-        searches = self.dao.find_by_user_id(user_id, limit=1000)  # Get all searches
-
-        if not searches:
-            return {
-                "total_searches": 0,
-                "total_results": 0,
-                "avg_results": 0,
-                "most_recent": None,
-                "oldest": None,
-            }
-
-        total_searches = len(searches)
-        total_results = sum(s.result_count for s in searches if s.result_count)
-        avg_results = total_results / total_searches if total_searches > 0 else 0
-
-        # Searches are already ordered by created_at DESC
-        most_recent = searches[0].created_at
-        oldest = searches[-1].created_at
+    def get_history_page(
+        self,
+        user_id: int,
+        per_page: int = 20,
+        cursor: Optional[str] = None,
+        include_total: bool = False,
+    ) -> dict:
+        """
+        Retrieves one page of history with keyset pagination
+
+        Parameters
+        ----------
+        user_id : int
+            Owner of the history
+        per_page : int, optional
+            Number of searches per page (default: 20)
+        cursor : str or None, optional
+            `next_cursor` of the previous page, None for the first page
+        include_total : bool, optional
+            Also count all the searches of the user, one more query
+            (default: False)
+
+        Returns
+        -------
+        dict
+            searches, next_cursor (None on the last page), has_next, per_page
+            and total (None unless include_total)
+
+        Raises
+        ------
+        ValueError
+            If the cursor is malformed
+        """
+        after = decode_history_cursor(cursor) if cursor else None
+        # One extra row tells whether another page follows
+        searches = self.dao.find_page_by_user_id(user_id, per_page + 1, after)
+        has_next = len(searches) > per_page
+        searches = searches[:per_page]
 
         return {
-            "total_searches": total_searches,
-            "total_results": total_results,
-            "avg_results": avg_results,
-            "most_recent": most_recent,
-            "oldest": oldest,
+            "searches": searches,
+            "next_cursor": encode_history_cursor(searches[-1]) if has_next else None,
+            "has_next": has_next,
+            "per_page": per_page,
+            "total": self.dao.count_by_user_id(user_id) if include_total else None,
         }
+
+    def get_stats(self, user_id: int) -> dict:
+        """
+        Retrieves search statistics for a user
+
+        Everything is aggregated by the database. Results are cached per user
+        until the user's history changes in this process, or STATS_CACHE_TTL
+        seconds at most (searches recorded by other workers).
+
+        Returns
+        -------
+        dict
+            The aggregates of HistoricalDao.get_stats_by_user_id, plus
+            zero_result_rate (share of searches that found nothing)
+        """
+        stats = _stats_cache.get(user_id)
+        if stats is None:
+            stats = self.dao.get_stats_by_user_id(user_id)
+            total = stats["total_searches"]
+            stats["zero_result_rate"] = (
+                stats["zero_result_searches"] / total if total else 0
+            )
+            _stats_cache.put(user_id, stats)
+        return stats
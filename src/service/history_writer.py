@@ -0,0 +1,198 @@
+"""
+Background writer of the search history, off the request path
+"""
+
+import atexit
+import os
+import threading
+import time
+
+import dotenv
+
+from business_object.historical_search import HistoricalSearch
+from service.historical_service import HistoricalService
+
+_writer = None
+_lock = threading.Lock()
+
+
+class HistoryWriter:
+    """
+    Record searches in the history in batches, from a worker thread
+
+    `enqueue` only appends to an in-memory queue, so a search returns without
+    waiting for a write transaction. The worker writes a batch with one COPY
+    as soon as `batch_size` searches are queued, or when the oldest one has
+    waited `max_wait_ms`. History is best effort: when `max_pending` searches
+    are already queued (database down or too slow), new ones are dropped and
+    counted rather than slowing the searches down or growing without bound.
+    """
+
+    def __init__(
+        self,
+        service: HistoricalService | None = None,
+        batch_size: int = 100,
+        max_wait_ms: float = 200,
+        max_pending: int = 10000,
+    ):
+        """
+        Parameters
+        ----------
+        service : HistoricalService, optional
+            Service writing the batches
+        batch_size : int, optional
+            Maximum number of searches per write (default: 100)
+        max_wait_ms : float, optional
+            Longest time a search waits for its batch to fill (default: 200)
+        max_pending : int, optional
+            Queued searches beyond which new ones are dropped (default: 10000)
+        """
+        if batch_size < 1 or max_pending < 1:
+            raise ValueError("batch_size and max_pending must be >= 1")
+
+        self.service = service or HistoricalService()
+        self.batch_size = batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_pending = max_pending
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+
+        self._pending = []  # (search, queued_at) in arrival order
+        self._busy = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._worker = threading.Thread(
+            target=self._run, name="history-writer", daemon=True
+        )
+        self._worker.start()
+
+    def enqueue(self, search: HistoricalSearch) -> bool:
+        """
+        Schedule the recording of a search
+
+        Returns
+        -------
+        bool
+            False if the search was dropped (queue full)
+        """
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("HistoryWriter is closed")
+            if len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                return False
+            self._pending.append((search, time.monotonic()))
+            if len(self._pending) == 1 or len(self._pending) >= self.batch_size:
+                self._cond.notify_all()
+            return True
+
+    def _next_batch(self) -> list[HistoricalSearch] | None:
+        """Wait for a full or old enough batch, None once closed and drained"""
+        with self._cond:
+            while True:
+                if self._pending:
+                    if self._closed or len(self._pending) >= self.batch_size:
+                        break
+                    waited = time.monotonic() - self._pending[0][1]
+                    if waited >= self.max_wait:
+                        break
+                    self._cond.wait(self.max_wait - waited)
+                elif self._closed:
+                    return None
+                else:
+                    self._cond.wait()
+            batch = [search for search, _ in self._pending[: self.batch_size]]
+            del self._pending[: self.batch_size]
+            self._busy = True
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            try:
+                self.written += self.service.add_searches(batch)
+                self.batches += 1
+            except Exception as e:
+                self.failed += len(batch)
+                print(f"⚠️  Warning: Could not save {len(batch)} searches: {e}")
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """
+        Write the queued searches now and wait until they are written
+
+        Returns
+        -------
+        bool
+            True if the queue is empty, False if the timeout expired
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            # Make the queued searches old enough to be written right away
+            self._pending = [(search, 0) for search, _ in self._pending]
+            self._cond.notify_all()
+            while self._pending or self._busy:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def stats(self) -> dict:
+        """Queue counters"""
+        with self._cond:
+            return {
+                "pending": len(self._pending),
+                "written": self.written,
+                "batches": self.batches,
+                "dropped": self.dropped,
+                "failed": self.failed,
+            }
+
+    def close(self, timeout: float | None = None) -> None:
+        """Write the queued searches, then stop the worker"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._worker.join(timeout)
+
+
+def get_history_writer() -> HistoryWriter:
+    """
+    Shared history writer, started on first use and configured from the
+    environment: HISTORY_BATCH_SIZE (default 100), HISTORY_FLUSH_MS (default
+    200) and HISTORY_MAX_PENDING (default 10000)
+    """
+    global _writer
+    with _lock:
+        if _writer is None:
+            dotenv.load_dotenv()
+            _writer = HistoryWriter(
+                batch_size=int(os.getenv("HISTORY_BATCH_SIZE", "100")),
+                max_wait_ms=float(os.getenv("HISTORY_FLUSH_MS", "200")),
+                max_pending=int(os.getenv("HISTORY_MAX_PENDING", "10000")),
+            )
+            # The CLI has no shutdown hook: write what is left on exit
+            atexit.register(close_history_writer)
+        return _writer
+
+
+def loaded_history_writer() -> HistoryWriter | None:
+    """Shared writer if it is already started, without starting it"""
+    return _writer
+
+
+def close_history_writer(timeout: float | None = 30.0) -> None:
+    """Write the queued searches, if the writer was ever started"""
+    global _writer
+    with _lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.close(timeout)
@@ -0,0 +1,74 @@
+import os
+import threading
+import time
+from typing import Optional
+
+import dotenv
+
+from dao.stats_dao import StatsDao
+
+
+class StatsService:
+    """Service computing the platform statistics of the admin dashboard"""
+
+    def __init__(self, cache_ttl: Optional[float] = None):
+        """
+        Parameters
+        ----------
+        cache_ttl : float or None, optional
+            Seconds the statistics are reused before being computed again,
+            ADMIN_STATS_CACHE_TTL by default (60; 0 disables the cache)
+        """
+        if cache_ttl is None:
+            dotenv.load_dotenv()
+            cache_ttl = float(os.getenv("ADMIN_STATS_CACHE_TTL", "60"))
+        self.cache_ttl = cache_ttl
+        self.dao = StatsDao()
+        self._cached = None  # (stats, computed_at)
+        self._lock = threading.Lock()
+
+    def get_global_stats(self, refresh: bool = False) -> dict:
+        """
+        Users by type, active users and total searches
+
+        The figures are computed by one query and cached for `cache_ttl`
+        seconds, so the dashboard costs the same whatever the number of
+        users. Concurrent requests on an expired cache wait for a single
+        computation.
+
+        Parameters
+        ----------
+        refresh : bool, optional
+            Compute the statistics even if the cache is fresh (default: False)
+
+        Returns
+        -------
+        dict
+            users (total, active, by_type), searches (total) and computed_at
+            (Unix time)
+        """
+        with self._lock:
+            if not refresh and self._cached is not None:
+                stats, computed_at = self._cached
+                if time.time() - computed_at < self.cache_ttl:
+                    return stats
+
+            counts = self.dao.global_stats()
+            computed_at = time.time()
+            stats = {
+                "users": {
+                    "total": counts["total_users"],
+                    "active": counts["active_users"],
+                    # Every type is listed, even without users
+                    "by_type": {
+                        "client": 0,
+                        "game_designer": 0,
+                        "admin": 0,
+                        **counts["users_by_type"],
+                    },
+                },
+                "searches": {"total": counts["total_searches"]},
+                "computed_at": computed_at,
+            }
+            self._cached = (stats, computed_at)
+            return stats
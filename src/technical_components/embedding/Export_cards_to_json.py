@@ -129,20 +129,11 @@ def export_cards_to_json(output_file: str = "data/AtomicCardsWithEmbeddings.json
                 "leadershipSkills": row["leadership_skills"],
             }
 
-            # Convert embedding from pgvector to list of floats
-            if row["embedding_of_text"] is not None:
-                # pgvector returns a string like "[0.1,0.2,0.3]"
-                embedding_str = row["embedding_of_text"]
-                if isinstance(embedding_str, str):
-                    # Remove brackets and split by comma
-                    embedding_str = embedding_str.strip("[]")
-                    card_data["embedding_of_text"] = [
-                        float(x) for x in embedding_str.split(",")
-                    ]
-                else:
-                    card_data["embedding_of_text"] = embedding_str
-            else:
-                card_data["embedding_of_text"] = None
+            # Vectors come back as float32 arrays (see utils.vector_codec)
+            embedding = row["embedding_of_text"]
+            if embedding is not None and hasattr(embedding, "tolist"):
+                embedding = embedding.tolist()
+            card_data["embedding_of_text"] = embedding
 
             # Remove None values to keep JSON clean
             card_data = {k: v for k, v in card_data.items() if v is not None}
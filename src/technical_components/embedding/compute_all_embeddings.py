@@ -1,51 +1,275 @@
-from dao.db_connection import DBConnection
-from service.card_service import CardService
+"""
+Compute the embeddings of the cards that do not have an up-to-date one
+
+A card is (re-)embedded when it has no vector, when its text changed since the
+vector was computed (text hash mismatch) or when the configured model changed.
+
+Cards are streamed from the database in batches, embedded by N concurrent
+workers and written back with one bulk UPDATE per batch. Progress is saved in
+a checkpoint file, so an interrupted run resumes where it stopped.
+
+Usage:
+    python src/technical_components/embedding/compute_all_embeddings.py
+    python src/technical_components/embedding/compute_all_embeddings.py \\
+        --batch-size 128 --workers 8
+    python src/technical_components/embedding/compute_all_embeddings.py --all
+    python src/technical_components/embedding/compute_all_embeddings.py --reindex
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import dotenv
+
+from business_object.card import compute_text_hash
 from dao.card_dao import CardDao
-from technical_components.embedding.ollama_embedding import get_embedding
+from dao.vector_index_dao import VectorIndexDao
+from technical_components.embedding.embedding_client import EmbeddingBackendError
+from technical_components.embedding.ollama_embedding import (
+    embed_texts,
+    get_embedding_backend,
+)
 
+DEFAULT_CHECKPOINT = "data/embedding_checkpoint.json"
 
-def float_list_to_pg_array(floats):
+
+class Checkpoint:
     """
-    Convert list of floats to PostgreSQL array literal.
+    Highest card id below which every card has been embedded and saved
+
+    Batches finish out of order when several workers run, so the saved id only
+    moves past a batch once every earlier batch is done as well.
     """
-    return "[" + ",".join(str(f) for f in floats) + "]"
 
+    def __init__(self, path: str | None):
+        self.path = path
+        self.last_id = 0
+        self._pending = {}  # batch index -> last id of the batch
+        self._next_index = 0
+        self._lock = threading.Lock()
+
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.last_id = json.load(f).get("last_id", 0)
+
+    def done(self, index: int, last_id: int) -> None:
+        """Mark batch number `index` (ending at card `last_id`) as saved"""
+        with self._lock:
+            self._pending[index] = last_id
+            advanced = False
+            while self._next_index in self._pending:
+                self.last_id = self._pending.pop(self._next_index)
+                self._next_index += 1
+                advanced = True
+            if advanced:
+                self._save()
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"last_id": self.last_id, "updated_at": time.time()}, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self) -> None:
+        """Forget the saved progress"""
+        self.last_id = 0
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class EmbeddingPipeline:
+    """Embed the cards in parallel batches and write the vectors in bulk"""
+
+    def __init__(
+        self,
+        batch_size: int = 256,
+        workers: int = 4,
+        checkpoint_path: str | None = DEFAULT_CHECKPOINT,
+        only_stale: bool = True,
+        dao: CardDao | None = None,
+        embed=embed_texts,
+        model: str | None = None,
+        index_dao: VectorIndexDao | None = None,
+    ):
+        """
+        Parameters
+        ----------
+        batch_size : int, optional
+            Number of cards embedded per call (default: 256)
+        workers : int, optional
+            Number of batches processed concurrently (default: 4)
+        checkpoint_path : str or None, optional
+            Progress file, None to disable checkpointing
+        only_stale : bool, optional
+            If False, also re-embed cards whose vector is up to date
+            (default: True)
+        dao : CardDao, optional
+            DAO used to read texts and write vectors
+        embed : callable, optional
+            Function embedding a list of texts (default: configured backend)
+        model : str or None, optional
+            Name stored with the vectors (default: configured backend model
+            when `embed` is the default)
+        index_dao : VectorIndexDao or None, optional
+            Builds the missing vector indexes once cards were embedded
+            (default: on the database, unless a `dao` is given)
+        """
+        self.batch_size = batch_size
+        self.workers = workers
+        self.only_stale = only_stale
+        self.checkpoint = Checkpoint(checkpoint_path)
+        if index_dao is None and dao is None:
+            index_dao = VectorIndexDao()
+        self.index_dao = index_dao
+        self.dao = dao or CardDao()
+        self.embed = embed
+        if model is None and embed is embed_texts:
+            model = get_embedding_backend().model
+        self.model = model
+
+    def _process(self, index: int, batch: list[tuple[int, str]]) -> int:
+        """Embed one batch, save it and record the progress"""
+        texts = [text for _, text in batch]
+        embeddings = self.embed(texts)
+        if len(embeddings) != len(batch):
+            raise EmbeddingBackendError(
+                f"Expected {len(batch)} embeddings, got {len(embeddings)}"
+            )
+        rows = [
+            (card_id, embedding, compute_text_hash(text))
+            for (card_id, text), embedding in zip(batch, embeddings)
+        ]
+        self.dao.update_embeddings(rows, model=self.model)
+        self.checkpoint.done(index, batch[-1][0])
+        return len(batch)
+
+    def run(self) -> int:
+        """
+        Run the pipeline until every card is embedded
+
+        Returns
+        -------
+        int
+            Number of cards embedded during this run
+        """
+        start_id = self.checkpoint.last_id
+        if start_id:
+            print(f"↪️  Resuming after card id {start_id}")
+
+        done = 0
+        started = time.monotonic()
+        in_flight = set()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            batches = self.dao.iter_texts_to_embed(
+                batch_size=self.batch_size,
+                after_id=start_id,
+                only_stale=self.only_stale,
+                model=self.model,
+            )
+            for index, batch in enumerate(batches):
+                in_flight.add(executor.submit(self._process, index, batch))
+
+                # Bound memory: never read far ahead of the workers
+                if len(in_flight) >= 2 * self.workers:
+                    finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    done += sum(future.result() for future in finished)
+                    self._report(done, started)
+
+            for future in in_flight:
+                done += future.result()
 
-def launch():
-    cards = CardDao().list_all()
+        self._report(done, started)
+        if done == 0:
+            print("⚠️ No cards to embed.")
+        else:
+            print(f"✅ Updated embeddings for {done} cards.")
+        self.checkpoint.clear()
 
-    if not cards:
-        print("⚠️ No cards found in database.")
-        return
+        # A database loaded without embeddings has no vector index yet
+        if done and self.index_dao is not None:
+            created = self.index_dao.create()
+            if created:
+                print(f"✅ Vector indexes built: {', '.join(created)}")
+        return done
 
-    # Filter only cards with text
-    cards_with_text = [card for card in cards if card.text is not None]
+    @staticmethod
+    def _report(done: int, started: float) -> None:
+        elapsed = time.monotonic() - started
+        rate = done / elapsed if elapsed > 0 else 0.0
+        print(f"📊 {done} cards embedded ({rate:.1f} cards/sec)")
 
-    if not cards_with_text:
-        print("⚠️ No cards with text to process.")
-        return
 
-    list_of_texts = [card.text for card in cards_with_text]
+def launch(
+    batch_size: int = 256,
+    workers: int = 4,
+    checkpoint_path: str | None = DEFAULT_CHECKPOINT,
+    only_stale: bool = True,
+) -> int:
+    """Embed every card that needs it (see EmbeddingPipeline)"""
+    return EmbeddingPipeline(
+        batch_size=batch_size,
+        workers=workers,
+        checkpoint_path=checkpoint_path,
+        only_stale=only_stale,
+    ).run()
 
-    # So that the get_embeddings API doesn't have to process too many texts at once,
-    # we split into batches of 10000.
-    size_of_slice = 10000
-    list_of_embeddings = []
-    for i in range(0, len(list_of_texts), size_of_slice):
-        print("card", i)
-        # Get embeddings from the API
-        response = get_embedding(list_of_texts[i : i + size_of_slice])
-        list_of_embeddings.extend(response["embeddings"])
-    print("✅ End of embeddings generation.")
 
-    # update
-    for card, emb in zip(cards_with_text, list_of_embeddings):
-        pg_array = float_list_to_pg_array(emb)
-        success = CardDao().modify(card.id, "embedding_of_text", pg_array)
-        if not success:
-            print(f"⚠️ Failed to update card {card.id}")
+def main():
+    """Main function with argument parsing"""
+    parser = argparse.ArgumentParser(
+        description="Compute the embeddings of the cards (resumable, parallel)"
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=256, help="Cards per embedding call"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=4, help="Batches processed concurrently"
+    )
+    parser.add_argument(
+        "--checkpoint",
+        default=DEFAULT_CHECKPOINT,
+        help=f"Progress file (default: {DEFAULT_CHECKPOINT})",
+    )
+    parser.add_argument(
+        "--all",
+        action="store_true",
+        help="Re-embed every card, not only those with a missing or stale embedding",
+    )
+    parser.add_argument(
+        "--reindex",
+        action="store_true",
+        help="Rebuild the vector indexes afterwards (after a full embedding run)",
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Ignore the checkpoint and start from the first card",
+    )
+    args = parser.parse_args()
 
-    print(f"✅ Updated embeddings for {len(cards_with_text)} cards.")
+    dotenv.load_dotenv()
+    pipeline = EmbeddingPipeline(
+        batch_size=args.batch_size,
+        workers=args.workers,
+        checkpoint_path=args.checkpoint,
+        only_stale=not args.all,
+    )
+    if args.restart:
+        pipeline.checkpoint.clear()
+    pipeline.run()
+    if args.reindex:
+        VectorIndexDao().rebuild()
 
 
-launch()
+if __name__ == "__main__":
+    main()
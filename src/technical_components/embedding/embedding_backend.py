@@ -0,0 +1,177 @@
+"""
+Interchangeable embedding backends: remote Ollama API, local in-process model
+and a deterministic hashing stand-in for tests and benchmarks
+"""
+
+import hashlib
+import math
+import os
+import re
+from abc import ABC, abstractmethod
+
+import dotenv
+
+from technical_components.embedding.embedding_client import (
+    DEFAULT_MODEL,
+    DEFAULT_URL,
+    EmbeddingBackendError,
+    EmbeddingClient,
+)
+
+
+class EmbeddingBackend(ABC):
+    """
+    Base class of the embedding backends
+    A backend turns a list of texts into one vector per text
+    """
+
+    #: Name used in cache keys and stored next to the vectors
+    model: str
+
+    @abstractmethod
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        """
+        Embed a list of texts
+
+        Parameters
+        ----------
+        texts : list[str]
+            Texts to embed
+
+        Returns
+        -------
+        list[list[float]]
+            One vector per text, in the same order
+        """
+        pass
+
+
+class OllamaBackend(EmbeddingBackend):
+    """Remote Ollama /api/embed endpoint (SSPCloud by default)"""
+
+    def __init__(self, client: EmbeddingClient):
+        self.client = client
+        self.model = client.model
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        response = self.client.embed(texts)
+        embeddings = response.get("embeddings")
+        if not isinstance(embeddings, list) or len(embeddings) != len(texts):
+            raise EmbeddingBackendError(f"Invalid embedding API response: {response}")
+        return embeddings
+
+
+class SentenceTransformerBackend(EmbeddingBackend):
+    """
+    Local in-process model (sentence-transformers, CPU by default)
+
+    Requires the optional `sentence-transformers` package. The default model,
+    BAAI/bge-m3, produces the same 1024-dimension space as the Ollama bge-m3.
+    """
+
+    def __init__(self, model_name: str = "BAAI/bge-m3", device: str = "cpu"):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError(
+                "The local embedding backend requires sentence-transformers: "
+                "pip install sentence-transformers"
+            ) from e
+
+        self.model = model_name
+        self._model = SentenceTransformer(model_name, device=device)
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        vectors = self._model.encode(
+            texts, normalize_embeddings=True, convert_to_numpy=True
+        )
+        return vectors.tolist()
+
+
+class HashingBackend(EmbeddingBackend):
+    """
+    Deterministic, dependency-free stand-in for a real model
+
+    Words and word bigrams are hashed into `dimension` signed buckets and the
+    vector is L2-normalized, so texts sharing words are close to each other.
+    Same text, same vector, on every machine: useful for tests and for
+    benchmarking search without a network hop.
+    """
+
+    def __init__(self, dimension: int = 1024):
+        self.dimension = dimension
+        self.model = f"hashing-{dimension}"
+
+    def _bucket(self, token: str) -> tuple[int, float]:
+        digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        return value % self.dimension, 1.0 if (value >> 63) & 1 else -1.0
+
+    def embed_one(self, text: str) -> list[float]:
+        vector = [0.0] * self.dimension
+        words = re.findall(r"\w+", (text or "").lower())
+        tokens = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        for token in tokens or [""]:
+            index, sign = self._bucket(token)
+            vector[index] += sign
+
+        norm = math.sqrt(sum(x * x for x in vector))
+        if norm == 0:
+            # Opposite tokens cancelled out: fall back to a fixed unit vector
+            vector[self._bucket("")[0]] = 1.0
+            return vector
+        return [x / norm for x in vector]
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        return [self.embed_one(text) for text in texts]
+
+
+BACKENDS = ("ollama", "local", "hashing")
+
+
+def create_backend(name: str | None = None) -> EmbeddingBackend:
+    """
+    Build the embedding backend selected by configuration
+
+    Parameters
+    ----------
+    name : str or None, optional
+        "ollama", "local" or "hashing"; read from EMBEDDING_BACKEND when None
+        (default: "ollama")
+
+    Returns
+    -------
+    EmbeddingBackend
+        The configured backend
+
+    Raises
+    ------
+    ValueError
+        If the backend name is unknown
+    """
+    dotenv.load_dotenv()
+    name = (name or os.getenv("EMBEDDING_BACKEND", "ollama")).lower()
+
+    if name == "ollama":
+        client = EmbeddingClient(
+            token=os.getenv("API_TOKEN"),
+            url=os.getenv("EMBEDDING_API_URL", DEFAULT_URL),
+            model=os.getenv("EMBEDDING_MODEL", DEFAULT_MODEL),
+            connect_timeout=float(os.getenv("EMBEDDING_CONNECT_TIMEOUT", "3.05")),
+            read_timeout=float(os.getenv("EMBEDDING_READ_TIMEOUT", "60")),
+            max_retries=int(os.getenv("EMBEDDING_MAX_RETRIES", "3")),
+        )
+        return OllamaBackend(client)
+    if name == "local":
+        return SentenceTransformerBackend(
+            model_name=os.getenv("EMBEDDING_LOCAL_MODEL", "BAAI/bge-m3"),
+            device=os.getenv("EMBEDDING_DEVICE", "cpu"),
+        )
+    if name == "hashing":
+        return HashingBackend(
+            dimension=int(os.getenv("EMBEDDING_HASHING_DIMENSION", "1024"))
+        )
+
+    raise ValueError(
+        f"Unknown embedding backend: {name}. Use one of {', '.join(BACKENDS)}"
+    )
@@ -0,0 +1,171 @@
+"""
+Micro-batching of concurrent single-text embedding requests
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+
+from technical_components.embedding.embedding_client import EmbeddingBackendError
+
+
+class EmbeddingBatcher:
+    """
+    Collect concurrent embedding requests and send them as one batched call
+
+    A dispatcher thread waits for a first text, then keeps collecting for at
+    most `max_wait_ms` milliseconds or until `max_batch_size` texts are queued.
+    The batch is embedded with a single call to `embed_many` and each vector is
+    handed back to the caller waiting for it. Up to `max_concurrent_batches`
+    batches are in flight at the same time.
+    """
+
+    def __init__(
+        self,
+        embed_many: Callable[[list[str]], list[list[float]]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        max_concurrent_batches: int = 4,
+    ):
+        """
+        Parameters
+        ----------
+        embed_many : callable
+            Function embedding a list of texts, returning one vector per text
+        max_batch_size : int, optional
+            Maximum number of distinct texts per call (default: 32)
+        max_wait_ms : float, optional
+            Maximum time the first text of a batch waits for others (default: 5)
+        max_concurrent_batches : int, optional
+            Batched calls allowed in flight at once (default: 4)
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+
+        self.embed_many = embed_many
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.batches_sent = 0
+        self.texts_embedded = 0
+
+        self._stats_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._workers = ThreadPoolExecutor(
+            max_workers=max_concurrent_batches, thread_name_prefix="embedding-batch"
+        )
+        self._closed = False
+        self._dispatcher = threading.Thread(
+            target=self._dispatch, name="embedding-batcher", daemon=True
+        )
+        self._dispatcher.start()
+
+    def submit(self, text: str) -> Future:
+        """
+        Queue a text and return a Future resolved with its embedding
+
+        Raises
+        ------
+        RuntimeError
+            If the batcher was closed
+        """
+        if self._closed:
+            raise RuntimeError("EmbeddingBatcher is closed")
+        future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def embed(self, text: str, timeout: float | None = None) -> list[float]:
+        """
+        Embed one text, sharing the API call with concurrent callers
+
+        Parameters
+        ----------
+        text : str
+            Text to embed
+        timeout : float or None, optional
+            Seconds to wait for the result (default: no limit)
+
+        Returns
+        -------
+        list[float]
+            Embedding of the text
+        """
+        return self.submit(text).result(timeout=timeout)
+
+    def _collect(self) -> list | None:
+        """Block for a first request, then gather a batch around it"""
+        first = self._queue.get()
+        if first is None:
+            return None
+
+        batch = [first]
+        distinct = {first[0]}
+        deadline = time.monotonic() + self.max_wait
+        while len(distinct) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = (
+                    self._queue.get(timeout=remaining)
+                    if remaining > 0
+                    else self._queue.get_nowait()
+                )
+            except queue.Empty:
+                break
+            if item is None:
+                # Close requested: send what we have, stop afterwards
+                self._queue.put(None)
+                break
+            batch.append(item)
+            distinct.add(item[0])
+        return batch
+
+    def _dispatch(self) -> None:
+        """Dispatcher thread loop"""
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            self._workers.submit(self._run_batch, batch)
+
+    def _run_batch(self, batch: list) -> None:
+        """Embed a batch (identical texts only once) and resolve its futures"""
+        texts = list(dict.fromkeys(text for text, _ in batch))
+        try:
+            embeddings = self.embed_many(texts)
+            if len(embeddings) != len(texts):
+                raise EmbeddingBackendError(
+                    f"Expected {len(texts)} embeddings, got {len(embeddings)}"
+                )
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        with self._stats_lock:
+            self.batches_sent += 1
+            self.texts_embedded += len(texts)
+        by_text = dict(zip(texts, embeddings))
+        for text, future in batch:
+            future.set_result(by_text[text])
+
+    def stats(self) -> dict:
+        """Number of batched calls and texts embedded so far"""
+        return {
+            "batches_sent": self.batches_sent,
+            "texts_embedded": self.texts_embedded,
+            "average_batch_size": (
+                self.texts_embedded / self.batches_sent if self.batches_sent else 0.0
+            ),
+            "pending": self._queue.qsize(),
+        }
+
+    def close(self) -> None:
+        """Flush pending requests and stop the dispatcher"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._dispatcher.join()
+        self._workers.shutdown(wait=True)
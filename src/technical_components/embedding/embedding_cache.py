@@ -0,0 +1,232 @@
+"""
+Bounded LRU cache for query embeddings, with optional TTL and SQLite persistence
+"""
+
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize a query so that trivially different spellings share a cache entry
+
+    Unicode is NFC-normalized and whitespace is collapsed. Case is kept because
+    the embedding model is case-sensitive.
+    """
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class EmbeddingCache:
+    """
+    Thread-safe LRU cache of embeddings keyed by (model, normalized text)
+
+    Entries older than `ttl` seconds are ignored. When `path` is given, entries
+    are also written to a SQLite file so they survive restarts and are shared
+    between workers. If that file cannot be used (locked, full, read-only),
+    the cache carries on in memory only rather than failing the search.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        ttl: float | None = None,
+        path: str | None = None,
+    ):
+        """
+        Parameters
+        ----------
+        max_size : int, optional
+            Maximum number of embeddings kept in memory (default: 1024)
+        ttl : float or None, optional
+            Lifetime of an entry in seconds, None for no expiry (default: None)
+        path : str or None, optional
+            SQLite file used as persistent second level (default: None)
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be >= 1")
+
+        self.max_size = max_size
+        self.ttl = ttl
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()  # key -> (embedding, stored_at)
+        self._lock = threading.Lock()
+        self._db = None
+
+        if path:
+            try:
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS embeddings (
+                        model TEXT NOT NULL,
+                        text TEXT NOT NULL,
+                        vector BLOB NOT NULL,
+                        stored_at REAL NOT NULL,
+                        PRIMARY KEY (model, text)
+                    )
+                    """
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                self._disable_db(e)
+            self.purge_expired()
+
+    def _disable_db(self, error: sqlite3.Error) -> None:
+        """Stop using the SQLite file after an error, keep the memory level"""
+        print(f"⚠️  Embedding cache file {self.path} disabled: {error}")
+        if self._db is not None:
+            try:
+                self._db.close()
+            except sqlite3.Error:
+                pass
+        self._db = None
+
+    def _is_expired(self, stored_at: float) -> bool:
+        return self.ttl is not None and time.time() - stored_at > self.ttl
+
+    def _remember(self, key: tuple, embedding: list[float], stored_at: float):
+        """Insert an entry in memory and evict the least recently used ones"""
+        self._entries[key] = (embedding, stored_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def _load(self, key: tuple):
+        """Read an entry from the SQLite file"""
+        row = self._db.execute(
+            "SELECT vector, stored_at FROM embeddings WHERE model = ? AND text = ?",
+            key,
+        ).fetchone()
+        if row is None:
+            return None
+        return array("f", row[0]).tolist(), row[1]
+
+    def get(self, model: str, text: str) -> list[float] | None:
+        """
+        Look up the embedding of a text
+
+        Parameters
+        ----------
+        model : str
+            Embedding model name
+        text : str
+            Query text (normalized before lookup)
+
+        Returns
+        -------
+        list[float] or None
+            Cached embedding, or None on a miss
+        """
+        key = (model, normalize_text(text))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._db is not None:
+                try:
+                    entry = self._load(key)
+                except sqlite3.Error as e:
+                    self._disable_db(e)
+                if entry is not None:
+                    self._remember(key, *entry)
+
+            if entry is None or self._is_expired(entry[1]):
+                if entry is not None and self._db is not None:
+                    # Expired rows would otherwise stay in the file forever
+                    try:
+                        self._db.execute(
+                            "DELETE FROM embeddings WHERE model = ? AND text = ?", key
+                        )
+                        self._db.commit()
+                    except sqlite3.Error as e:
+                        self._disable_db(e)
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, model: str, text: str, embedding: list[float]) -> None:
+        """
+        Store the embedding of a text
+
+        Parameters
+        ----------
+        model : str
+            Embedding model name
+        text : str
+            Query text (normalized before storage)
+        embedding : list[float]
+            Embedding returned by the model
+        """
+        key = (model, normalize_text(text))
+        stored_at = time.time()
+        with self._lock:
+            self._remember(key, embedding, stored_at)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)",
+                        (*key, array("f", embedding).tobytes(), stored_at),
+                    )
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    self._disable_db(e)
+
+    def purge_expired(self) -> int:
+        """
+        Delete the expired entries from the SQLite file (run when it is opened)
+
+        Returns
+        -------
+        int
+            Number of deleted entries
+        """
+        if self._db is None or self.ttl is None:
+            return 0
+        with self._lock:
+            try:
+                deleted = self._db.execute(
+                    "DELETE FROM embeddings WHERE stored_at < ?",
+                    (time.time() - self.ttl,),
+                ).rowcount
+                self._db.commit()
+            except sqlite3.Error as e:
+                self._disable_db(e)
+                return 0
+        return deleted
+
+    def clear(self) -> None:
+        """Empty the in-memory cache and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """
+        Cache counters
+
+        Returns
+        -------
+        dict
+            size, max_size, hits, misses, hit_rate and persistent path
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "persistent_path": self.path if self._db is not None else None,
+            }
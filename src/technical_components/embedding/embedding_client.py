@@ -0,0 +1,220 @@
+"""
+HTTP client for the Ollama embedding API: keep-alive connection pool,
+timeouts, retries with exponential backoff and a circuit breaker
+"""
+
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.async_runner import run_sync
+
+DEFAULT_URL = "https://llm.lab.sspcloud.fr/ollama/api/embed"
+DEFAULT_MODEL = "bge-m3:latest"
+
+
+class EmbeddingBackendError(Exception):
+    """Raised when the embedding backend fails or answers something unusable"""
+
+
+class CircuitOpenError(EmbeddingBackendError):
+    """Raised when the embedding backend is considered down"""
+
+
+class CircuitBreaker:
+    """
+    Stop calling a failing backend for a while
+
+    After `failure_threshold` consecutive failed calls the circuit opens and
+    calls fail immediately. Once `reset_timeout` seconds have passed, a single
+    trial call is let through (half-open) while the others keep failing fast:
+    its success closes the circuit again, its failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """'closed', 'open' or 'half_open'"""
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half_open"
+            return "open"
+
+    def allow(self) -> bool:
+        """
+        Whether a call may be attempted now
+
+        In the half-open state the first caller claims the trial slot and the
+        others are refused until it records its result.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def release(self) -> None:
+        """End a call that says nothing of the backend health (e.g. a 4xx)"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._trial_in_flight = False
+            self._failures += 1
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                # (re)open: also restarts the wait after a failed half-open trial
+                self._opened_at = time.monotonic()
+
+
+class EmbeddingClient:
+    """Client for the Ollama /api/embed endpoint, reusing its connections"""
+
+    def __init__(
+        self,
+        token: str | None,
+        url: str = DEFAULT_URL,
+        model: str = DEFAULT_MODEL,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 60.0,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        pool_maxsize: int = 10,
+        circuit_breaker: CircuitBreaker | None = None,
+    ):
+        """
+        Parameters
+        ----------
+        token : str or None
+            Bearer token of the API (read once, not at every call)
+        url : str, optional
+            Embedding endpoint
+        model : str, optional
+            Embedding model name (default: bge-m3:latest)
+        connect_timeout : float, optional
+            Seconds to establish the connection (default: 3.05)
+        read_timeout : float, optional
+            Seconds to wait for the response (default: 60)
+        max_retries : int, optional
+            Retries after a timeout, connection error or 5xx response (default: 3)
+        backoff_factor : float, optional
+            Retry n waits backoff_factor * 2**n seconds (default: 0.5)
+        pool_maxsize : int, optional
+            Number of keep-alive connections kept open (default: 10)
+        circuit_breaker : CircuitBreaker, optional
+            Breaker shared by the calls (default: 5 failures, 30 s)
+        """
+        self.url = url
+        self.model = model
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(
+            {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+        )
+
+    def embed(self, text: str | list[str]) -> dict:
+        """
+        Embed a text or a list of texts
+
+        Parameters
+        ----------
+        text : str or list[str]
+            Input(s) of the model
+
+        Returns
+        -------
+        dict
+            JSON response of the API ("embeddings" holds one vector per input)
+
+        Raises
+        ------
+        CircuitOpenError
+            If the backend failed too often recently
+        EmbeddingBackendError
+            If the request is rejected (4xx, e.g. unknown model or bad token)
+        requests.RequestException
+            If every attempt failed
+        """
+        payload = {"model": self.model, "input": text}
+
+        if not self.circuit_breaker.allow():
+            raise CircuitOpenError(
+                f"Embedding API unavailable, retry in "
+                f"{self.circuit_breaker.reset_timeout}s"
+            )
+
+        # One call is one success or failure for the breaker, whatever the
+        # number of attempts it took
+        try:
+            response = self._post_with_retries(payload)
+        except BaseException:
+            self.circuit_breaker.record_failure()
+            raise
+        if response.status_code >= 400:
+            # Not retried, and not a failure of the backend either: the
+            # request itself is wrong (model name, token)
+            self.circuit_breaker.release()
+            raise EmbeddingBackendError(
+                f"Embedding API rejected the request "
+                f"({response.status_code}): {response.text[:200]}"
+            )
+        self.circuit_breaker.record_success()
+        return response.json()
+
+    def _post_with_retries(self, payload: dict) -> requests.Response:
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.session.post(
+                    self.url, json=payload, timeout=self.timeout
+                )
+                if response.status_code >= 500:
+                    response.raise_for_status()
+            except (
+                requests.Timeout,
+                requests.ConnectionError,
+                requests.HTTPError,
+            ) as e:
+                if attempt == self.max_retries:
+                    raise
+                print(f"⚠️  Embedding API error ({e}), retrying...")
+                time.sleep(self.backoff_factor * 2**attempt)
+                continue
+
+            # 4xx (e.g. invalid token) are not retried: it won't help
+            return response
+
+    async def aembed(self, text: str | list[str]) -> dict:
+        """Async variant of embed, run on the shared I/O thread pool"""
+        return await run_sync(self.embed, text)
+
+    def close(self) -> None:
+        """Close the keep-alive connections"""
+        self.session.close()
@@ -1,14 +1,121 @@
 import os
-import requests
+import threading
+import dotenv
 
+from technical_components.embedding.embedding_backend import (
+    EmbeddingBackend,
+    create_backend,
+)
+from technical_components.embedding.embedding_batcher import EmbeddingBatcher
+from technical_components.embedding.embedding_cache import EmbeddingCache
 
-def get_embedding(text):
-    token = os.getenv("API_TOKEN")
-    url = "https://llm.lab.sspcloud.fr/ollama/api/embed"
+_cache = None
+_backend = None
+_batcher = None
+_batcher_configured = False
+_lock = threading.Lock()
 
-    headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
 
-    data = {"model": "bge-m3:latest", "input": text}
+def get_embedding_cache() -> EmbeddingCache:
+    """
+    Shared cache of query embeddings, configured from the environment:
+    EMBEDDING_CACHE_SIZE (default 1024), EMBEDDING_CACHE_TTL (seconds, no expiry
+    by default) and EMBEDDING_CACHE_PATH (SQLite file, memory only by default)
+    """
+    global _cache
+    with _lock:
+        if _cache is not None:
+            return _cache
+        dotenv.load_dotenv()
+        ttl = os.getenv("EMBEDDING_CACHE_TTL")
+        _cache = EmbeddingCache(
+            max_size=int(os.getenv("EMBEDDING_CACHE_SIZE", "1024")),
+            ttl=float(ttl) if ttl else None,
+            path=os.getenv("EMBEDDING_CACHE_PATH") or None,
+        )
+        return _cache
 
-    response = requests.post(url, headers=headers, json=data)
-    return response.json()
+
+def get_embedding_backend() -> EmbeddingBackend:
+    """
+    Shared embedding backend selected by EMBEDDING_BACKEND: "ollama" (remote
+    API, default), "local" (in-process model) or "hashing" (offline stand-in)
+    """
+    global _backend
+    with _lock:
+        if _backend is None:
+            _backend = create_backend()
+        return _backend
+
+
+def embed_texts(texts: list[str]) -> list[list[float]]:
+    """Embed a list of texts in one backend call"""
+    return get_embedding_backend().embed(texts)
+
+
+def get_embedding_batcher() -> EmbeddingBatcher | None:
+    """
+    Shared micro-batcher of concurrent query embeddings, configured from the
+    environment: EMBEDDING_BATCH_MAX_SIZE (default 32, 1 disables batching) and
+    EMBEDDING_BATCH_MAX_WAIT_MS (default 5)
+    """
+    global _batcher, _batcher_configured
+    with _lock:
+        if _batcher_configured:
+            return _batcher
+        dotenv.load_dotenv()
+        max_batch_size = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "32"))
+        if max_batch_size > 1:
+            _batcher = EmbeddingBatcher(
+                embed_texts,
+                max_batch_size=max_batch_size,
+                max_wait_ms=float(os.getenv("EMBEDDING_BATCH_MAX_WAIT_MS", "5")),
+            )
+        _batcher_configured = True
+        return _batcher
+
+
+def request_embedding(text):
+    """Embed a text or a list of texts with the backend, bypassing the cache"""
+    backend = get_embedding_backend()
+    texts = [text] if isinstance(text, str) else list(text)
+    return {"model": backend.model, "embeddings": backend.embed(texts)}
+
+
+def get_embedding(text, use_cache: bool = True):
+    """
+    Embed a text (or a list of texts) with the configured backend
+
+    Single query strings go through the shared embedding cache, so repeated
+    queries skip the backend. Lists (bulk jobs) are always sent to the backend.
+
+    Parameters
+    ----------
+    text : str or list[str]
+        Text(s) to embed
+    use_cache : bool, optional
+        Set to False to always call the backend (default: True)
+
+    Returns
+    -------
+    dict
+        {"model": ..., "embeddings": [...]}, one vector per input text
+    """
+    if not use_cache or not isinstance(text, str):
+        return request_embedding(text)
+
+    model = get_embedding_backend().model
+    cache = get_embedding_cache()
+    embedding = cache.get(model, text)
+    if embedding is not None:
+        return {"model": model, "embeddings": [embedding]}
+
+    batcher = get_embedding_batcher()
+    if batcher is None:
+        embedding = request_embedding(text)["embeddings"][0]
+    else:
+        # Concurrent queries share one batched backend call
+        embedding = batcher.embed(text)
+
+    cache.put(model, text, embedding)
+    return {"model": model, "embeddings": [embedding]}
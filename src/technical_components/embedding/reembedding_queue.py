@@ -0,0 +1,175 @@
+"""
+Background re-embedding of cards whose text was modified
+"""
+
+import threading
+import time
+from typing import Callable
+
+from business_object.card import compute_text_hash
+from dao.card_dao import CardDao
+from technical_components.embedding.ollama_embedding import (
+    embed_texts,
+    get_embedding_backend,
+)
+from technical_components.search.in_memory_search import loaded_search_engine
+
+_queue = None
+_lock = threading.Lock()
+
+
+class ReembeddingQueue:
+    """
+    Re-embed modified cards off the request path
+
+    Card ids are queued by `enqueue` and a worker thread embeds them in batches
+    of up to `batch_size`. The text is read when the batch runs, so a card
+    edited several times in a row is embedded once, with its latest text.
+    Cards missed here (failed batch, process stopped) still have a stale text
+    hash and are picked up by compute_all_embeddings.
+    """
+
+    def __init__(
+        self,
+        dao: CardDao | None = None,
+        embed: Callable[[list[str]], list[list[float]]] = embed_texts,
+        model: str | None = None,
+        batch_size: int = 32,
+    ):
+        """
+        Parameters
+        ----------
+        dao : CardDao, optional
+            DAO used to read texts and write vectors
+        embed : callable, optional
+            Function embedding a list of texts (default: configured backend)
+        model : str or None, optional
+            Name stored with the vectors (default: configured backend model
+            when `embed` is the default)
+        batch_size : int, optional
+            Maximum number of cards embedded per call (default: 32)
+        """
+        self.dao = dao or CardDao()
+        self.embed = embed
+        if model is None and embed is embed_texts:
+            model = get_embedding_backend().model
+        self.model = model
+        self.batch_size = batch_size
+        self.embedded = 0
+        self.failed = 0
+
+        self._pending = []  # ids in arrival order, without duplicates
+        self._pending_set = set()
+        self._busy = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._worker = threading.Thread(
+            target=self._run, name="card-reembedding", daemon=True
+        )
+        self._worker.start()
+
+    def enqueue(self, card_id: int) -> None:
+        """Schedule the re-embedding of a card"""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("ReembeddingQueue is closed")
+            if card_id not in self._pending_set:
+                self._pending.append(card_id)
+                self._pending_set.add(card_id)
+                self._cond.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                batch = self._pending[: self.batch_size]
+                del self._pending[: self.batch_size]
+                self._pending_set.difference_update(batch)
+                self._busy = True
+
+            try:
+                self._process(batch)
+            except Exception as e:
+                self.failed += len(batch)
+                print(f"❌ Re-embedding failed for cards {batch}: {e}")
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def _process(self, card_ids: list[int]) -> None:
+        cards = self.dao.find_texts_by_ids(card_ids)
+        if not cards:
+            return
+        embeddings = self.embed([text for _, _, text in cards])
+        rows = [
+            (card_id, embedding, compute_text_hash(text))
+            for (card_id, _, text), embedding in zip(cards, embeddings)
+        ]
+        self.dao.update_embeddings(rows, model=self.model)
+        self.embedded += len(rows)
+
+        engine = loaded_search_engine()
+        if engine is not None:
+            # Names too: cards the engine does not hold yet are added
+            engine.upsert_many(
+                [card_id for card_id, _, _ in cards],
+                embeddings,
+                names=[name for _, name, _ in cards],
+                texts=[text for _, _, text in cards],
+            )
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """
+        Wait until every queued card is processed
+
+        Returns
+        -------
+        bool
+            True if the queue is empty, False if the timeout expired
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._pending or self._busy:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def stats(self) -> dict:
+        """Queue counters"""
+        with self._cond:
+            return {
+                "pending": len(self._pending),
+                "embedded": self.embedded,
+                "failed": self.failed,
+            }
+
+    def close(self, timeout: float | None = None) -> None:
+        """Process the queued cards, then stop the worker"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._worker.join(timeout)
+
+
+def get_reembedding_queue() -> ReembeddingQueue:
+    """Shared re-embedding queue, started on first use"""
+    global _queue
+    with _lock:
+        if _queue is None:
+            _queue = ReembeddingQueue()
+        return _queue
+
+
+def close_reembedding_queue(timeout: float | None = 30.0) -> None:
+    """Finish the queued re-embeddings, if the queue was ever started"""
+    global _queue
+    with _lock:
+        queue, _queue = _queue, None
+    if queue is not None:
+        queue.close(timeout)
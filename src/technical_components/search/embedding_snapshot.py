@@ -0,0 +1,284 @@
+"""
+Binary snapshot of the card embeddings, memory-mapped by the search engine
+
+Layout of a snapshot file (little-endian):
+
+    0       magic b"MSEMBED1", header length (uint32), JSON header
+    4096    unit-length vectors, float32, count x dimension
+    ...     vector lengths, float32, count
+    ...     card ids, int64, count
+    ...     name offsets, int64, count + 1, then UTF-8 names
+    ...     text offsets, int64, count + 1, then UTF-8 texts
+
+The JSON header records the model, the dimension, the count, the offset
+of every section and the database watermark (CardDao.embedding_watermark)
+taken at export time, so that a stale snapshot is detected when loaded. Sections are read with np.memmap: workers mapping the same
+file share its pages through the OS page cache, and a cold start only maps
+the file instead of loading every vector from PostgreSQL.
+
+Usage:
+    python src/technical_components/search/embedding_snapshot.py
+    python src/technical_components/search/embedding_snapshot.py --output data/cards.emb
+"""
+
+import argparse
+import json
+import os
+import struct
+import time
+
+import dotenv
+
+from dao.card_dao import CardDao
+from technical_components.embedding.ollama_embedding import get_embedding_backend
+from technical_components.search.in_memory_search import np, parse_vector
+
+MAGIC = b"MSEMBED1"
+FORMAT_VERSION = 1
+HEADER_SIZE = 4096  # the matrix starts on a page boundary
+DEFAULT_SNAPSHOT_PATH = "data/embeddings_snapshot.emb"
+
+
+class StringTable:
+    """Read-only list of strings stored as an offset table and a UTF-8 blob"""
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row: int) -> str:
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        return bytes(self.blob[start:end]).decode("utf-8")
+
+    def __iter__(self):
+        return (self[row] for row in range(len(self)))
+
+
+class EmbeddingSnapshot:
+    """Sections of a snapshot file, mapped in memory"""
+
+    def __init__(self, path: str):
+        """
+        Parameters
+        ----------
+        path : str
+            Snapshot file written by SnapshotWriter
+
+        Raises
+        ------
+        ValueError
+            If the file is not a snapshot or has an unsupported version
+        """
+        if np is None:
+            raise ImportError("Embedding snapshots require numpy: pip install numpy")
+
+        with open(path, "rb") as f:
+            magic = f.read(len(MAGIC))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not an embedding snapshot")
+            (header_length,) = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(header_length))
+        if header.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot version: {header.get('version')}")
+
+        self.path = path
+        self.header = header
+        self.model = header["model"]
+        self.dimension = header["dimension"]
+        self.count = header["count"]
+        self.watermark = header.get("watermark")
+
+        sections = header["sections"]
+
+        def section(name, dtype, shape):
+            if not shape or shape[0] == 0:
+                return np.zeros(shape, dtype=dtype)
+            return np.memmap(
+                path, dtype=dtype, mode="r", offset=sections[name], shape=shape
+            )
+
+        n, d = self.count, self.dimension
+        self.unit = section("unit", "<f4", (n, d))
+        self.norms = section("norms", "<f4", (n,))
+        self.ids = section("ids", "<i8", (n,))
+        self.names = StringTable(
+            section("name_offsets", "<i8", (n + 1,)),
+            section("names", "u1", (header["names_size"],)),
+        )
+        self.texts = StringTable(
+            section("text_offsets", "<i8", (n + 1,)),
+            section("texts", "u1", (header["texts_size"],)),
+        )
+
+
+class SnapshotWriter:
+    """
+    Write a snapshot file row by row
+
+    Vectors go straight to disk; only ids, lengths and strings are kept in
+    memory until `close`. The file is written next to its final path and
+    renamed at the end, so readers never map a partial snapshot.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        model: str | None,
+        dimension: int,
+        watermark: dict | None = None,
+    ):
+        self.path = path
+        self.model = model
+        self.dimension = dimension
+        self.watermark = watermark
+        self.ids = []
+        self.norms = []
+        self.names = []
+        self.texts = []
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._tmp_path = path + ".tmp"
+        self._file = open(self._tmp_path, "wb")
+        self._file.write(b"\0" * HEADER_SIZE)
+
+    def add(self, card_id: int, embedding, name: str, text: str | None) -> None:
+        """Append one card"""
+        vector = parse_vector(embedding)
+        if vector.shape != (self.dimension,):
+            raise ValueError(
+                f"Card {card_id}: expected {self.dimension} dimensions, "
+                f"got {vector.shape[0]}"
+            )
+        norm = float(np.linalg.norm(vector))
+        unit = vector / norm if norm else vector
+        self._file.write(unit.astype("<f4").tobytes())
+        self.ids.append(card_id)
+        self.norms.append(norm)
+        self.names.append(name or "")
+        self.texts.append(text or "")
+
+    def _write_array(self, array) -> int:
+        offset = self._file.tell()
+        self._file.write(array.tobytes())
+        return offset
+
+    def _write_strings(self, strings: list[str]) -> tuple[int, int, int]:
+        encoded = [s.encode("utf-8") for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype="<i8")
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        offsets_at = self._write_array(offsets)
+        blob_at = self._file.tell()
+        blob = b"".join(encoded)
+        self._file.write(blob)
+        return offsets_at, blob_at, len(blob)
+
+    def close(self) -> dict:
+        """Write the tables and the header, then publish the file"""
+        sections = {"unit": HEADER_SIZE}
+        sections["norms"] = self._write_array(np.asarray(self.norms, dtype="<f4"))
+        sections["ids"] = self._write_array(np.asarray(self.ids, dtype="<i8"))
+        sections["name_offsets"], sections["names"], names_size = self._write_strings(
+            self.names
+        )
+        sections["text_offsets"], sections["texts"], texts_size = self._write_strings(
+            self.texts
+        )
+
+        header = {
+            "version": FORMAT_VERSION,
+            "model": self.model,
+            "dimension": self.dimension,
+            "count": len(self.ids),
+            "created_at": time.time(),
+            "watermark": self.watermark,
+            "sections": sections,
+            "names_size": names_size,
+            "texts_size": texts_size,
+        }
+        encoded = json.dumps(header).encode("utf-8")
+        if len(MAGIC) + 4 + len(encoded) > HEADER_SIZE:
+            raise ValueError("Snapshot header too large")
+        self._file.seek(0)
+        self._file.write(MAGIC + struct.pack("<I", len(encoded)) + encoded)
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+        return header
+
+
+def export_snapshot(
+    path: str = DEFAULT_SNAPSHOT_PATH,
+    model: str | None = None,
+    dao: CardDao | None = None,
+    batch_size: int = 2000,
+) -> dict:
+    """
+    Export every card embedding of the database to a snapshot file
+
+    Parameters
+    ----------
+    path : str, optional
+        Output file (default: data/embeddings_snapshot.emb)
+    model : str or None, optional
+        Model recorded in the header (default: configured backend model)
+    dao : CardDao, optional
+        DAO used to read the embeddings
+    batch_size : int, optional
+        Rows fetched per round trip (default: 2000)
+
+    Returns
+    -------
+    dict
+        Header of the written snapshot
+    """
+    if model is None:
+        model = get_embedding_backend().model
+
+    dao = dao or CardDao()
+    # Taken before reading: a change during the export makes the snapshot
+    # look stale (reloaded from the database), never the other way round
+    watermark = dao.embedding_watermark()
+    writer = None
+    started = time.monotonic()
+    for rows in dao.iter_embeddings(batch_size=batch_size):
+        for row in rows:
+            if writer is None:
+                dimension = len(parse_vector(row["embedding_of_text"]))
+                writer = SnapshotWriter(path, model, dimension, watermark)
+            writer.add(row["id"], row["embedding_of_text"], row["name"], row["text"])
+    if writer is None:
+        raise ValueError("No card embeddings found in the database")
+
+    header = writer.close()
+    size_mb = os.path.getsize(path) / 2**20
+    print(
+        f"✅ Exported {header['count']} embeddings to {path} "
+        f"({size_mb:.1f} MB, {time.monotonic() - started:.1f}s)"
+    )
+    return header
+
+
+def main():
+    """Main function with argument parsing"""
+    parser = argparse.ArgumentParser(
+        description="Export the card embeddings to a memory-mappable snapshot"
+    )
+    parser.add_argument(
+        "--output",
+        default=None,
+        help=f"Snapshot file (default: EMBEDDING_SNAPSHOT_PATH or {DEFAULT_SNAPSHOT_PATH})",
+    )
+    args = parser.parse_args()
+
+    dotenv.load_dotenv()
+    export_snapshot(
+        args.output or os.getenv("EMBEDDING_SNAPSHOT_PATH") or DEFAULT_SNAPSHOT_PATH
+    )
+
+
+if __name__ == "__main__":
+    main()
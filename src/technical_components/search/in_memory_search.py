@@ -0,0 +1,493 @@
+"""
+Exact in-process vector search over the card embeddings
+
+The ~30k x 1024 card vectors fit in about 120 MB of float32. Holding them in
+one contiguous matrix answers a query with a single matrix product, without a
+round trip to PostgreSQL. Requires the optional `numpy` package.
+"""
+
+import os
+import threading
+import time
+from typing import NamedTuple
+
+import dotenv
+
+from business_object.card import Card
+from dao.card_dao import CardDao
+from technical_components.embedding.ollama_embedding import get_embedding_backend
+from technical_components.search.refresher import start_refresher
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+DISTANCES = ("L2", "cosine", "inner_product")
+
+_engine = None
+_engine_configured = False
+_refresher = None
+_lock = threading.Lock()
+
+
+class _State(NamedTuple):
+    """Immutable snapshot of the index, swapped as a whole on updates"""
+
+    ids: "np.ndarray"  # (n,) int64
+    unit: "np.ndarray"  # (n, d) float32, rows scaled to unit length
+    norms: "np.ndarray"  # (n,) float32, original row lengths
+    names: list
+    texts: list
+    positions: dict  # card id -> row
+
+
+def parse_vector(value) -> "np.ndarray":
+    """Convert a pgvector value (text '[0.1,0.2]' or a sequence) to float32"""
+    if isinstance(value, str):
+        return np.array(value.strip("[]").split(","), dtype=np.float32)
+    return np.asarray(value, dtype=np.float32)
+
+
+class InMemorySearchEngine:
+    """
+    Exact top-k search over a float32 matrix of card embeddings
+
+    Rows are stored pre-normalized together with their lengths, so one
+    product `queries @ unit.T` gives the cosine similarity and, with the
+    lengths, the L2 distance (|q - x|^2 = |q|^2 + |x|^2 - 2 |x| q.u) and the
+    inner product (|x| q.u). Top-k is selected with `argpartition` and only
+    the k best rows are sorted. Scores follow CardDao.SEARCH_METRICS.
+    """
+
+    def __init__(
+        self,
+        ids: list[int],
+        vectors,
+        names: list[str] | None = None,
+        texts: list[str | None] | None = None,
+        model: str | None = None,
+    ):
+        """
+        Parameters
+        ----------
+        ids : list[int]
+            Card ids, one per row of `vectors`
+        vectors : array-like
+            (n, d) matrix of embeddings
+        names, texts : list, optional
+            Card names and texts returned with the results
+        model : str or None, optional
+            Model that produced the vectors
+        """
+        if np is None:
+            raise ImportError(
+                "The in-memory search engine requires numpy: pip install numpy"
+            )
+        # Own copy: rows are normalized in place
+        matrix = np.array(vectors, dtype=np.float32, order="C")
+        if matrix.ndim != 2 or len(matrix) != len(ids):
+            raise ValueError("vectors must be a (len(ids), dimension) matrix")
+
+        self._setup(
+            model,
+            matrix.shape[1],
+            self._build_state(
+                np.asarray(ids, dtype=np.int64),
+                matrix,
+                list(names) if names is not None else [None] * len(ids),
+                list(texts) if texts is not None else [None] * len(ids),
+            ),
+        )
+
+    def _setup(self, model: str | None, dimension: int, state: _State) -> None:
+        self.model = model
+        self.dimension = dimension
+        self.loaded_at = time.time()
+        # CardDao.embedding_watermark of the cards the engine was loaded from
+        self.watermark = None
+        self._write_lock = threading.Lock()
+        self._state = state
+
+    @staticmethod
+    def _build_state(ids, matrix, names, texts) -> _State:
+        norms = np.linalg.norm(matrix, axis=1).astype(np.float32)
+        safe = np.where(norms == 0, 1, norms)[:, None]
+        # Divide in place: the raw matrix is not kept
+        matrix /= safe
+        positions = {int(card_id): row for row, card_id in enumerate(ids)}
+        return _State(ids, matrix, norms, names, texts, positions)
+
+    @classmethod
+    def from_dao(
+        cls, dao: CardDao | None = None, batch_size: int = 2000
+    ) -> "InMemorySearchEngine":
+        """Load every card embedding from the database"""
+        dao = dao or CardDao()
+        ids, names, texts, vectors = [], [], [], []
+        for rows in dao.iter_embeddings(batch_size=batch_size):
+            for row in rows:
+                ids.append(row["id"])
+                names.append(row["name"])
+                texts.append(row["text"])
+                vectors.append(parse_vector(row["embedding_of_text"]))
+        if not vectors:
+            raise ValueError("No card embeddings found in the database")
+        return cls(ids, np.vstack(vectors), names, texts)
+
+    @classmethod
+    def from_snapshot(cls, path: str) -> "InMemorySearchEngine":
+        """
+        Map a snapshot file written by embedding_snapshot.export_snapshot
+
+        The vectors are already normalized on disk and are used in place
+        (np.memmap, read-only): nothing is copied, and processes mapping the
+        same file share its pages.
+        """
+        from technical_components.search.embedding_snapshot import (
+            EmbeddingSnapshot,
+        )
+
+        snapshot = EmbeddingSnapshot(path)
+        positions = {card_id: row for row, card_id in enumerate(snapshot.ids.tolist())}
+        engine = cls.__new__(cls)
+        engine._setup(
+            snapshot.model,
+            snapshot.dimension,
+            _State(
+                snapshot.ids,
+                snapshot.unit,
+                snapshot.norms,
+                snapshot.names,
+                snapshot.texts,
+                positions,
+            ),
+        )
+        engine.snapshot_path = path
+        engine.snapshot_watermark = snapshot.watermark
+        return engine
+
+    def __len__(self) -> int:
+        return len(self._state.ids)
+
+    def search_batch(
+        self,
+        query_embeddings,
+        top_k: int = 5,
+        distance: str = "L2",
+        exclude_ids: list[int] | None = None,
+    ) -> list[list[tuple[Card, float]]]:
+        """
+        Top-k cards for several queries with one matrix product
+
+        Parameters
+        ----------
+        query_embeddings : array-like
+            (b, d) matrix or list of query vectors
+        top_k : int, optional
+            Number of results per query (default: 5)
+        distance : str, optional
+            "L2", "cosine" or "inner_product" (default: "L2")
+        exclude_ids : list[int] or None, optional
+            Cards never returned: a boolean mask over the rows sets their
+            scores to -inf before the top-k selection
+
+        Returns
+        -------
+        list[list[tuple[Card, float]]]
+            For each query, (Card, similarity) pairs, best first
+        """
+        if distance not in DISTANCES:
+            raise ValueError(
+                f"Invalid distance metric: {distance}. "
+                f"Use one of {', '.join(DISTANCES)}"
+            )
+        state = self._state
+        queries = np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32))
+        if queries.shape[1] != self.dimension:
+            raise ValueError(
+                f"Query dimension {queries.shape[1]} does not match the index "
+                f"dimension {self.dimension}"
+            )
+        if len(state.ids) == 0 or top_k <= 0:
+            return [[] for _ in queries]
+
+        dots = queries @ state.unit.T  # (b, n)
+        if distance == "cosine":
+            query_norms = np.linalg.norm(queries, axis=1, keepdims=True)
+            query_norms[query_norms == 0] = 1
+            scores = dots / query_norms
+        elif distance == "inner_product":
+            scores = dots * state.norms[None, :]
+        else:
+            squared = (
+                np.einsum("ij,ij->i", queries, queries)[:, None]
+                + (state.norms**2)[None, :]
+                - 2 * state.norms[None, :] * dots
+            )
+            scores = 1 / (1 + np.sqrt(np.maximum(squared, 0)))
+
+        available = len(state.ids)
+        if exclude_ids:
+            excluded = np.zeros(len(state.ids), dtype=bool)
+            rows = [state.positions[i] for i in exclude_ids if i in state.positions]
+            excluded[rows] = True
+            scores[:, excluded] = -np.inf
+            available -= int(excluded.sum())
+        if available <= 0:
+            return [[] for _ in queries]
+
+        k = min(top_k, available)
+        best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for query_scores, rows in zip(scores, best):
+            rows = rows[np.argsort(-query_scores[rows])]
+            results.append(
+                [
+                    (
+                        Card(
+                            id=int(state.ids[row]),
+                            name=state.names[row],
+                            text=state.texts[row],
+                        ),
+                        float(query_scores[row]),
+                    )
+                    for row in rows
+                ]
+            )
+        return results
+
+    def search(
+        self,
+        query_embedding: list[float],
+        top_k: int = 5,
+        distance: str = "L2",
+        exclude_ids: list[int] | None = None,
+    ) -> list[tuple[Card, float]]:
+        """Top-k cards for one query (see search_batch)"""
+        return self.search_batch([query_embedding], top_k, distance, exclude_ids)[0]
+
+    def upsert(
+        self,
+        card_id: int,
+        embedding: list[float] | None = None,
+        name: str | None = None,
+        text: str | None = None,
+    ) -> None:
+        """Add a card or update it, fields left to None are kept (see upsert_many)"""
+        if embedding is not None:
+            self.upsert_many([card_id], [embedding], [name], [text])
+            return
+        with self._write_lock:
+            state = self._state
+            row = state.positions.get(card_id)
+            if row is None:
+                return
+            names, texts = list(state.names), list(state.texts)
+            if name is not None:
+                names[row] = name
+            if text is not None:
+                texts[row] = text
+            self._state = state._replace(names=names, texts=texts)
+
+    def upsert_many(
+        self,
+        card_ids: list[int],
+        embeddings,
+        names: list[str | None] | None = None,
+        texts: list[str | None] | None = None,
+    ) -> None:
+        """
+        Add or update several cards with one swap of the index
+
+        Only the given vectors are normalized; the other rows are copied as
+        they are. The copy keeps searches running meanwhile on the previous
+        snapshot, so a batch of k cards costs one copy of the matrix, not k.
+
+        Parameters
+        ----------
+        card_ids : list[int]
+            Cards to add or update (the last occurrence of an id wins)
+        embeddings : array-like
+            (k, d) matrix, one vector per card
+        names, texts : list or None, optional
+            New names and texts, None entries keep the current values
+        """
+        vectors = np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+        if len(vectors) != len(card_ids) or vectors.shape[1] != self.dimension:
+            raise ValueError("embeddings must be a (len(card_ids), dimension) matrix")
+        names = names if names is not None else [None] * len(card_ids)
+        texts = texts if texts is not None else [None] * len(card_ids)
+
+        latest = {int(card_id): i for i, card_id in enumerate(card_ids)}
+        batch = list(latest.values())
+        vectors = vectors[batch]
+        norms = np.linalg.norm(vectors, axis=1).astype(np.float32)
+        unit = vectors / np.where(norms == 0, 1, norms)[:, None]
+
+        with self._write_lock:
+            state = self._state
+            rows = [state.positions.get(int(card_ids[i])) for i in batch]
+            updated = [k for k, row in enumerate(rows) if row is not None]
+            added = [k for k, row in enumerate(rows) if row is None]
+
+            all_unit = np.array(state.unit, dtype=np.float32)
+            all_norms = np.array(state.norms, dtype=np.float32)
+            all_names, all_texts = list(state.names), list(state.texts)
+            if updated:
+                updated_rows = [rows[k] for k in updated]
+                all_unit[updated_rows] = unit[updated]
+                all_norms[updated_rows] = norms[updated]
+                for k in updated:
+                    i = batch[k]
+                    if names[i] is not None:
+                        all_names[rows[k]] = names[i]
+                    if texts[i] is not None:
+                        all_texts[rows[k]] = texts[i]
+
+            ids, positions = state.ids, state.positions
+            if added:
+                new_ids = [int(card_ids[batch[k]]) for k in added]
+                positions = dict(positions)
+                for offset, card_id in enumerate(new_ids):
+                    positions[card_id] = len(ids) + offset
+                ids = np.append(ids, np.asarray(new_ids, dtype=np.int64))
+                all_unit = np.vstack([all_unit, unit[added]])
+                all_norms = np.append(all_norms, norms[added])
+                all_names += [names[batch[k]] for k in added]
+                all_texts += [texts[batch[k]] for k in added]
+
+            self._state = _State(
+                ids, all_unit, all_norms, all_names, all_texts, positions
+            )
+
+    def remove(self, card_id: int) -> bool:
+        """Remove a card, return False if it was not indexed"""
+        with self._write_lock:
+            state = self._state
+            row = state.positions.get(card_id)
+            if row is None:
+                return False
+            keep = np.ones(len(state.ids), dtype=bool)
+            keep[row] = False
+            ids = state.ids[keep]
+            # Rows are already normalized: copy them without rescaling
+            self._state = _State(
+                ids,
+                np.ascontiguousarray(state.unit[keep]),
+                state.norms[keep],
+                state.names[:row] + state.names[row + 1 :],
+                state.texts[:row] + state.texts[row + 1 :],
+                {int(card_id): i for i, card_id in enumerate(ids)},
+            )
+            return True
+
+    def stats(self) -> dict:
+        """Size of the index"""
+        state = self._state
+        return {
+            "cards": len(state.ids),
+            "dimension": self.dimension,
+            "memory_mb": round(state.unit.nbytes / 2**20, 1),
+            "memory_mapped": isinstance(state.unit, np.memmap),
+            "snapshot_path": getattr(self, "snapshot_path", None),
+            "model": self.model,
+            "loaded_at": self.loaded_at,
+        }
+
+
+def search_engine_enabled() -> bool:
+    """True when SEARCH_ENGINE=memory"""
+    dotenv.load_dotenv()
+    return os.getenv("SEARCH_ENGINE", "pgvector").lower() == "memory"
+
+
+def _load_engine() -> InMemorySearchEngine:
+    """
+    Map the snapshot file when it matches the current model and the cards in
+    the database (same watermark), else read the embeddings from the DB
+    """
+    # Taken before reading: a change during the load triggers another one
+    watermark = CardDao().embedding_watermark()
+    path = os.getenv("EMBEDDING_SNAPSHOT_PATH")
+    if path and os.path.exists(path):
+        engine = InMemorySearchEngine.from_snapshot(path)
+        model = get_embedding_backend().model
+        if engine.model != model:
+            reason = f"was built with {engine.model}, not {model}"
+        elif engine.snapshot_watermark != watermark:
+            reason = "does not match the cards in the database (re-export it)"
+        else:
+            engine.watermark = watermark
+            return engine
+        print(f"⚠️  Snapshot {path} {reason}: loading the embeddings from the database")
+    engine = InMemorySearchEngine.from_dao()
+    engine.watermark = watermark
+    return engine
+
+
+def get_search_engine() -> InMemorySearchEngine | None:
+    """
+    Shared in-memory engine, loaded on first use when SEARCH_ENGINE=memory
+
+    The vectors are mapped from EMBEDDING_SNAPSHOT_PATH when that file exists,
+    and read from the database otherwise. Returns None when the engine is
+    disabled or could not be loaded (numpy missing, database error): callers
+    then search with pgvector. Once loaded, refresh_search_engine runs every
+    SEARCH_REFRESH_INTERVAL seconds to pick up changes made by other workers.
+    """
+    global _engine, _engine_configured, _refresher
+    with _lock:
+        if _engine_configured:
+            return _engine
+        if search_engine_enabled():
+            try:
+                started = time.monotonic()
+                _engine = _load_engine()
+                print(
+                    f"✅ In-memory search engine loaded: {len(_engine)} cards "
+                    f"in {time.monotonic() - started:.1f}s"
+                )
+            except Exception as e:
+                print(f"⚠️  In-memory search disabled, using pgvector: {e}")
+                _engine = None
+            if _engine is not None:
+                _refresher = start_refresher(
+                    "search-engine-refresh", refresh_search_engine
+                )
+        _engine_configured = True
+        return _engine
+
+
+def refresh_search_engine() -> bool:
+    """
+    Reload the shared engine when the embedded cards changed in the database
+
+    Catches edits served by other workers and external runs of
+    compute_all_embeddings. Searches keep using the current engine during
+    the reload, which is swapped in at the end.
+
+    Returns
+    -------
+    bool
+        True if the engine was reloaded
+    """
+    global _engine
+    engine = _engine
+    if engine is None or CardDao().embedding_watermark() == engine.watermark:
+        return False
+    fresh = _load_engine()
+    with _lock:
+        _engine = fresh
+    print(f"🔄 In-memory search engine reloaded: {len(fresh)} cards")
+    return True
+
+
+def search_engine_refresher():
+    """Refresher of the shared engine, None if not started"""
+    return _refresher
+
+
+def loaded_search_engine() -> InMemorySearchEngine | None:
+    """Shared engine if it is already loaded, without loading it"""
+    return _engine
@@ -0,0 +1,316 @@
+"""
+In-memory prefix index of the card names, for typeahead suggestions
+
+Names are kept in a sorted array of normalized keys (lower case, accents
+removed) searched with bisect: a prefix lookup is two binary searches over
+~30k keys plus a slice, a few microseconds, without a database round trip.
+Each name is indexed from the start of every word, so "bolt" suggests
+"Lightning Bolt" after the names starting with "bolt".
+"""
+
+import bisect
+import difflib
+import threading
+import time
+import unicodedata
+from collections import deque
+from typing import NamedTuple
+
+from dao.card_dao import CardDao
+from technical_components.search.refresher import start_refresher
+
+# Latency objective of a suggestion, checked by NameIndex.stats
+SUGGEST_P99_TARGET_MS = 1.0
+# Names compared to the prefix by the fuzzy fallback, at most
+FUZZY_CANDIDATES = 200
+
+_index = None
+_refresher = None
+_lock = threading.Lock()
+
+
+def normalize(text: str) -> str:
+    """Lower case, without accents"""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+class _Keys(NamedTuple):
+    """Sorted keys with the (card id, name) entry of each key"""
+
+    keys: list
+    entries: list
+
+
+class _State(NamedTuple):
+    """Index content, swapped as a whole on updates"""
+
+    full: _Keys  # normalized names
+    words: _Keys  # normalized names from their second, third... word
+    names: dict  # card id -> name
+
+
+def _later_words(key: str) -> list[str]:
+    """Suffixes of a normalized name starting at its second, third... word"""
+    return [key[i:] for i in range(1, len(key)) if key[i - 1] == " " and key[i] != " "]
+
+
+def _sorted_keys(rows) -> _Keys:
+    rows = sorted(rows)
+    return _Keys(
+        [key for key, _, _ in rows], [(card_id, name) for _, card_id, name in rows]
+    )
+
+
+class NameIndex:
+    """Prefix search over card names with a fuzzy fallback"""
+
+    def __init__(self, cards: list[tuple[int, str]]):
+        """
+        Parameters
+        ----------
+        cards : list[tuple[int, str]]
+            (card id, name) pairs
+        """
+        self._write_lock = threading.Lock()
+        self._latencies = deque(maxlen=1000)
+        self._state = self._build_state(dict(cards))
+        self.loaded_at = time.time()
+        # CardDao.names_watermark of the cards the index was built from
+        self.watermark = None
+
+    @staticmethod
+    def _build_state(names: dict) -> _State:
+        keys = {card_id: normalize(name.strip()) for card_id, name in names.items()}
+        full = _sorted_keys(
+            (keys[card_id], card_id, name) for card_id, name in names.items()
+        )
+        words = _sorted_keys(
+            (word, card_id, name)
+            for card_id, name in names.items()
+            for word in _later_words(keys[card_id])
+        )
+        return _State(full, words, names)
+
+    @classmethod
+    def from_dao(cls, dao: CardDao | None = None) -> "NameIndex":
+        """Build the index from the names in the database"""
+        dao = dao or CardDao()
+        # Taken before reading: a change during the build triggers another one
+        watermark = dao.names_watermark()
+        index = cls(dao.list_names())
+        index.watermark = watermark
+        return index
+
+    def __len__(self) -> int:
+        return len(self._state.names)
+
+    def suggest(
+        self, prefix: str, limit: int = 10, fuzzy: bool = True
+    ) -> list[tuple[int, str]]:
+        """
+        Card names starting with `prefix`, or with one of its words
+
+        Names starting with the prefix come first, then names with a later
+        word starting with it, each group in alphabetical order. When nothing
+        matches and `fuzzy` is set, the prefix is shortened until it matches
+        and the closest names are returned (typos such as "lightnig").
+
+        Parameters
+        ----------
+        prefix : str
+            Beginning of the name typed so far
+        limit : int, optional
+            Maximum number of suggestions (default: 10)
+        fuzzy : bool, optional
+            Fall back to close matches when no name matches (default: True)
+
+        Returns
+        -------
+        list[tuple[int, str]]
+            (card id, name) pairs
+        """
+        started = time.perf_counter()
+        state = self._state
+        key = normalize(prefix.lstrip())
+        results = []
+        if key and limit > 0:
+            results = self._prefix_matches(state, key, limit)
+            if not results and fuzzy:
+                results = self._fuzzy_matches(state, key, limit)
+        self._latencies.append(time.perf_counter() - started)
+        return results
+
+    @staticmethod
+    def _range(keys: _Keys, key: str) -> tuple[int, int]:
+        start = bisect.bisect_left(keys.keys, key)
+        # Every key starting with `key` sorts before key + U+10FFFF
+        end = bisect.bisect_left(keys.keys, key + "\U0010ffff", start)
+        return start, end
+
+    def _prefix_matches(self, state: _State, key: str, limit: int) -> list:
+        start, end = self._range(state.full, key)
+        results = state.full.entries[start : min(end, start + limit)]
+        if len(results) < limit:
+            seen = {card_id for card_id, _ in results}
+            start, end = self._range(state.words, key)
+            for card_id, name in state.words.entries[start:end]:
+                if card_id not in seen:
+                    seen.add(card_id)
+                    results.append((card_id, name))
+                    if len(results) >= limit:
+                        break
+        return results
+
+    def _fuzzy_matches(self, state: _State, key: str, limit: int) -> list:
+        # Shorten the prefix until some names match, then rank a bounded
+        # number of candidates by similarity with the typed prefix
+        for length in range(len(key) - 1, 0, -1):
+            start, end = self._range(state.full, key[:length])
+            if start < end:
+                break
+        else:
+            return []
+
+        scored = []
+        matcher = difflib.SequenceMatcher(b=key)
+        for i in range(start, min(end, start + FUZZY_CANDIDATES)):
+            # Same length as the prefix, give or take a missed or extra letter
+            score = 0.0
+            for length in (len(key) - 1, len(key), len(key) + 1):
+                matcher.set_seq1(state.full.keys[i][:length])
+                score = max(score, matcher.ratio())
+            scored.append((-score, state.full.entries[i][1], i))
+        scored.sort()
+        return [state.full.entries[i] for _, _, i in scored[:limit]]
+
+    @staticmethod
+    def _updated(keys: _Keys, remove: list, insert: list) -> _Keys:
+        """Copy of `keys` without the `remove` rows and with the `insert` rows"""
+        new_keys, new_entries = list(keys.keys), list(keys.entries)
+        for key, entry in remove:
+            i = bisect.bisect_left(new_keys, key)
+            while new_entries[i] != entry:
+                i += 1
+            del new_keys[i], new_entries[i]
+        for key, entry in insert:
+            i = bisect.bisect_left(new_keys, key)
+            while i < len(new_keys) and (new_keys[i], new_entries[i]) < (key, entry):
+                i += 1
+            new_keys.insert(i, key)
+            new_entries.insert(i, entry)
+        return _Keys(new_keys, new_entries)
+
+    @staticmethod
+    def _rows(card_id: int, name: str) -> tuple[list, list]:
+        key = normalize(name.strip())
+        entry = (card_id, name)
+        return [(key, entry)], [(word, entry) for word in _later_words(key)]
+
+    def _replace(self, card_id: int, name: str | None) -> None:
+        state = self._state
+        old_full, old_words = [], []
+        if card_id in state.names:
+            old_full, old_words = self._rows(card_id, state.names[card_id])
+        new_full, new_words = [], []
+        names = dict(state.names)
+        if name is None:
+            names.pop(card_id, None)
+        else:
+            names[card_id] = name
+            new_full, new_words = self._rows(card_id, name)
+        self._state = _State(
+            self._updated(state.full, old_full, new_full),
+            self._updated(state.words, old_words, new_words),
+            names,
+        )
+
+    def add(self, card_id: int, name: str) -> None:
+        """
+        Add a card or rename it
+
+        Only the keys of this card are inserted into copies of the sorted
+        arrays, which are then swapped: no full rebuild, and suggestions
+        running meanwhile keep reading the previous arrays.
+        """
+        with self._write_lock:
+            self._replace(card_id, name)
+
+    def remove(self, card_id: int) -> bool:
+        """Remove a card, return False if it was not indexed"""
+        with self._write_lock:
+            if card_id not in self._state.names:
+                return False
+            self._replace(card_id, None)
+            return True
+
+    def stats(self) -> dict:
+        """Size of the index and latency percentiles of recent suggestions"""
+        latencies = sorted(self._latencies)
+
+        def percentile(p):
+            if not latencies:
+                return None
+            return round(latencies[int(p * (len(latencies) - 1))] * 1000, 4)
+
+        p99 = percentile(0.99)
+        return {
+            "cards": len(self._state.names),
+            "keys": len(self._state.full.keys) + len(self._state.words.keys),
+            "loaded_at": self.loaded_at,
+            "p50_ms": percentile(0.50),
+            "p99_ms": p99,
+            "p99_target_ms": SUGGEST_P99_TARGET_MS,
+            "within_target": p99 is None or p99 <= SUGGEST_P99_TARGET_MS,
+        }
+
+
+def get_name_index() -> NameIndex:
+    """
+    Shared name index, built from the database on first use
+
+    Once built, refresh_name_index runs every SEARCH_REFRESH_INTERVAL seconds
+    to pick up cards created, renamed or deleted by other workers.
+    """
+    global _index, _refresher
+    with _lock:
+        if _index is None:
+            started = time.monotonic()
+            _index = NameIndex.from_dao()
+            print(
+                f"✅ Name index loaded: {len(_index)} cards "
+                f"in {time.monotonic() - started:.1f}s"
+            )
+            if _refresher is None:
+                _refresher = start_refresher("name-index-refresh", refresh_name_index)
+        return _index
+
+
+def refresh_name_index() -> bool:
+    """
+    Rebuild the shared index when the card names changed in the database
+
+    Returns
+    -------
+    bool
+        True if the index was rebuilt
+    """
+    global _index
+    index = _index
+    if index is None or CardDao().names_watermark() == index.watermark:
+        return False
+    fresh = NameIndex.from_dao()
+    with _lock:
+        _index = fresh
+    print(f"🔄 Name index reloaded: {len(fresh)} cards")
+    return True
+
+
+def name_index_refresher():
+    """Refresher of the shared index, None if not started"""
+    return _refresher
+
+
+def loaded_name_index() -> NameIndex | None:
+    """Shared index if it is already built, without building it"""
+    return _index
@@ -0,0 +1,104 @@
+"""
+Periodic reload of the per-process search structures
+
+Every API worker holds its own in-memory engine and name index. Edits served
+by another worker, or a run of compute_all_embeddings, only reach the
+database: a daemon thread compares a watermark of the cards with the one the
+structure was built from, and rebuilds it when they differ.
+"""
+
+import os
+import threading
+
+import dotenv
+
+DEFAULT_REFRESH_INTERVAL = 60.0
+
+_refreshers = []
+_lock = threading.Lock()
+
+
+def refresh_interval() -> float:
+    """Seconds between two watermark checks (SEARCH_REFRESH_INTERVAL, 0 disables)"""
+    dotenv.load_dotenv()
+    return float(os.getenv("SEARCH_REFRESH_INTERVAL", DEFAULT_REFRESH_INTERVAL))
+
+
+class Refresher:
+    """Call `refresh` every `interval` seconds from a daemon thread"""
+
+    def __init__(self, name: str, refresh, interval: float):
+        """
+        Parameters
+        ----------
+        name : str
+            Name of the thread, used in the logs
+        refresh : callable
+            Returns True when it rebuilt its structure
+        interval : float
+            Seconds between two calls
+        """
+        if interval <= 0:
+            raise ValueError("interval must be > 0")
+
+        self.name = name
+        self.refresh = refresh
+        self.interval = interval
+        self.checks = 0
+        self.reloads = 0
+        self.errors = 0
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                if self.refresh():
+                    self.reloads += 1
+            except Exception as e:
+                self.errors += 1
+                print(f"⚠️  {self.name} failed, keeping the current data: {e}")
+            self.checks += 1
+
+    def stats(self) -> dict:
+        """Check counters"""
+        return {
+            "interval": self.interval,
+            "checks": self.checks,
+            "reloads": self.reloads,
+            "errors": self.errors,
+        }
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Stop the checks, waiting for a running one to finish"""
+        self._stop.set()
+        self._thread.join(timeout)
+
+
+def start_refresher(name: str, refresh) -> Refresher | None:
+    """
+    Start checking `refresh` every SEARCH_REFRESH_INTERVAL seconds
+
+    Returns
+    -------
+    Refresher or None
+        None when the interval is 0 (single worker, no external writer)
+    """
+    interval = refresh_interval()
+    if interval <= 0:
+        return None
+    refresher = Refresher(name, refresh, interval)
+    with _lock:
+        _refreshers.append(refresher)
+    return refresher
+
+
+def stop_refreshers(timeout: float | None = 10.0) -> None:
+    """Stop every refresher started in this process"""
+    with _lock:
+        refreshers = list(_refreshers)
+        _refreshers.clear()
+    for refresher in refreshers:
+        refresher.stop(timeout)
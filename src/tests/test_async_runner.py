@@ -0,0 +1,48 @@
+import asyncio
+import threading
+
+import pytest
+
+from utils.async_runner import run_sync
+
+
+def test_run_sync_returns_result_off_the_event_loop():
+    # GIVEN
+    def blocking(a, b=0):
+        return a + b, threading.current_thread().name
+
+    async def main():
+        return await run_sync(blocking, 1, b=2), threading.current_thread().name
+
+    # WHEN
+    (result, worker_thread), loop_thread = asyncio.run(main())
+
+    # THEN
+    assert result == 3
+    assert worker_thread != loop_thread
+    assert worker_thread.startswith("magicsearch-io")
+
+
+def test_run_sync_propagates_exceptions():
+    # GIVEN
+    def failing():
+        raise ValueError("boom")
+
+    # WHEN / THEN
+    with pytest.raises(ValueError):
+        asyncio.run(run_sync(failing))
+
+
+def test_concurrent_calls_overlap():
+    # GIVEN
+    barrier = threading.Barrier(2, timeout=2)
+
+    def wait_for_other():
+        barrier.wait()
+        return True
+
+    async def main():
+        return await asyncio.gather(run_sync(wait_for_other), run_sync(wait_for_other))
+
+    # WHEN / THEN: both calls must run at the same time to pass the barrier
+    assert asyncio.run(main()) == [True, True]
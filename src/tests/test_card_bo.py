@@ -79,3 +79,16 @@ class TestCard:
         assert repr_str.startswith("Card(")
         assert name in repr_str
         assert text in repr_str
+
+    def test_card_text_hash(self):
+        # GIVEN
+        card = Card(id=3, name="Shock", text="Shock deals 2 damage to any target.")
+
+        # WHEN
+        first = card.text_hash
+        card.text = "Shock deals 3 damage to any target."
+
+        # THEN: hex md5, changes with the text, None without text
+        assert len(first) == 32
+        assert card.text_hash != first
+        assert Card(id=4, name="Forest", text=None).text_hash is None
@@ -1,6 +1,11 @@
 import pytest
-from dao.card_dao import CardDao
+from psycopg2 import errors
+from unittest.mock import MagicMock, patch
+
+from dao.card_dao import CARD_FIELDS, SEARCH_METRICS, CardDao, card_columns
+from dao.connection_pool import session_state
 from business_object.card import Card
+from business_object.card_filter import CardFilter
 
 
 @pytest.fixture
@@ -8,6 +13,13 @@ def dao():
     return CardDao()
 
 
+@pytest.fixture(autouse=True)
+def iterative_scan():
+    """pgvector 0.8+ unless a test says otherwise, without a version query"""
+    with patch("dao.card_dao.supports_iterative_scan", return_value=True) as mock:
+        yield mock
+
+
 @pytest.fixture
 def sample_card():
     # Passer id=None pour que la DB l'assigne automatiquement
@@ -59,3 +71,319 @@ def test_search_by_name(dao, sample_card):
     dao.create(sample_card)
     results = dao.search_by_name("Test")
     assert any(c.name == sample_card.name for c in results)
+
+
+def mock_search_cursor(prepared, rows):
+    connection = MagicMock()
+    cursor = connection.cursor.return_value.__enter__.return_value
+    session_state(connection)["prepared_statements"] = (
+        {f"card_semantic_search_{distance.lower()}" for distance in SEARCH_METRICS}
+        if prepared
+        else set()
+    )
+    cursor.fetchall.return_value = rows
+    db = MagicMock()
+    db.connection.__enter__.return_value = connection
+    return db, cursor
+
+
+def test_semantic_search_prepares_once_and_binds_vector_once(dao):
+    # GIVEN: a connection that has not prepared the statement yet
+    db, cursor = mock_search_cursor(
+        False, [{"id": 1, "name": "Opt", "text": "Scry 1.", "distance": 0.25}]
+    )
+
+    # WHEN
+    with patch("dao.card_dao.DBConnection", return_value=db):
+        results = dao.semantic_search([0.1, 0.2], top_k=3, distance="cosine")
+
+    # THEN
+    statements = [call.args[0] for call in cursor.execute.call_args_list]
+    assert "PREPARE card_semantic_search_cosine" in statements[1]
+    assert "<=> $1 AS distance" in statements[1]
+    assert statements[2].startswith("EXECUTE card_semantic_search_cosine (%s, %s,")
+    assert cursor.execute.call_args_list[2].args[1][1:] == (3, [])
+    assert results[0][0].name == "Opt"
+    assert results[0][1] == pytest.approx(0.75)
+    assert "pg_prepared_statements" not in statements[0]
+    assert (
+        "card_semantic_search_cosine"
+        in session_state(db.connection.__enter__.return_value)["prepared_statements"]
+    )
+
+
+def test_semantic_search_reuses_prepared_statement(dao):
+    # GIVEN
+    db, cursor = mock_search_cursor(
+        True, [{"id": 1, "name": "Opt", "text": None, "distance": 1.0}]
+    )
+
+    # WHEN
+    with patch("dao.card_dao.DBConnection", return_value=db):
+        results = dao.semantic_search([0.1, 0.2], distance="L2")
+
+    # THEN: no PREPARE, L2 similarity is 1 / (1 + distance)
+    assert cursor.execute.call_count == 2
+    assert results[0][1] == pytest.approx(0.5)
+
+
+def test_semantic_search_forgets_deallocated_statements(dao):
+    # GIVEN: the session lost its prepared statements behind our back
+    db, cursor = mock_search_cursor(True, [])
+    cursor.execute.side_effect = [
+        None,
+        errors.InvalidSqlStatementName("prepared statement does not exist"),
+    ]
+
+    # WHEN
+    with patch("dao.card_dao.DBConnection", return_value=db):
+        with pytest.raises(errors.InvalidSqlStatementName):
+            dao.semantic_search([0.1, 0.2], distance="L2")
+
+    # THEN: the next search prepares the statement again
+    connection = db.connection.__enter__.return_value
+    assert session_state(connection)["prepared_statements"] == set()
+
+
+def test_semantic_search_inner_product_score(dao):
+    # GIVEN: <#> returns the negative inner product
+    db, _ = mock_search_cursor(
+        True, [{"id": 1, "name": "Opt", "text": None, "distance": -0.9}]
+    )
+
+    # WHEN
+    with patch("dao.card_dao.DBConnection", return_value=db):
+        results = dao.semantic_search([0.1, 0.2], distance="inner_product")
+
+    # THEN
+    assert results[0][1] == pytest.approx(0.9)
+
+
+def test_semantic_search_excludes_inside_the_index_scan(dao):
+    # GIVEN
+    db, cursor = mock_search_cursor(True, [])
+
+    # WHEN
+    with patch("dao.card_dao.DBConnection", return_value=db):
+        dao.semantic_search([0.1, 0.2], top_k=5, exclude_ids=[9, 3, 9], ef_search=4)
+
+    # THEN: ef_search covers the excluded cards, iterative scan is enabled
+    settings_params = cursor.execute.call_args_list[0].args[1]
+    assert settings_params[1] == "7"
+    assert "iterative_scan" in cursor.execute.call_args_list[1].args[0]
+    assert cursor.execute.call_args_list[2].args[1][2] == [3, 9]
+
+
+def test_semantic_search_exact_scan_when_exclusions_lose_results(dao, iterative_scan):
+    # GIVEN: pgvector < 0.8, the excluded cards filled the candidate list
+    iterative_scan.return_value = False
+    db, cursor = mock_search_cursor(True, [])
+    cursor.fetchall.side_effect = [
+        [],
+        [{"id": 4, "name": "Opt", "text": None, "distance": 1.0}],
+    ]
+
+    # WHEN
+    with patch("dao.card_dao.DBConnection", return_value=db):
+        results = dao.semantic_search([0.1, 0.2], top_k=1, exclude_ids=[3])
+
+    # THEN
+    sql, params = cursor.execute.call_args_list[-1].args
+    assert "WITH ranked AS MATERIALIZED" in sql
+    assert params[1:] == ([3], 1)
+    assert [card.id for card, _ in results] == [4]
+
+
+def test_semantic_search_invalid_metric(dao):
+    with pytest.raises(ValueError):
+        dao.semantic_search([0.1, 0.2], distance="manhattan")
+
+
+def test_filter_conditions():
+    # GIVEN
+    filters = CardFilter(colors=["U"], mana_value_max=3, legal_in="modern")
+
+    # WHEN
+    conditions, params = CardDao.filter_conditions(filters)
+
+    # THEN
+    assert conditions == [
+        "colors @> %(colors)s::text[]",
+        "mana_value <= %(mana_value_max)s",
+        "legalities @> %(legalities)s",
+    ]
+    assert params["colors"] == ["U"]
+    assert params["legalities"].adapted == {"modern": "Legal"}
+
+
+def test_hybrid_search_filters_and_sorts_candidates(dao):
+    # GIVEN
+    db, cursor = mock_search_cursor(
+        True, [{"id": 7, "name": "Opt", "text": None, "distance": 0.1}]
+    )
+    filters = CardFilter(card_type="Instant", keywords=["Scry"])
+
+    # WHEN
+    with patch("dao.card_dao.DBConnection", return_value=db):
+        results = dao.hybrid_search([0.1, 0.2], filters, top_k=4, distance="cosine")
+
+    # THEN: the vector is bound once, next to the filter parameters
+    sql, params = cursor.execute.call_args_list[-1].args
+    assert "types @> %(types)s::text[]" in sql
+    assert "keywords @> %(keywords)s::text[]" in sql
+    assert sql.count("%(vector)s") == 1
+    assert params["types"] == ["Instant"]
+    assert params["top_k"] == 4
+    assert results[0][0].id == 7
+    assert results[0][1] == pytest.approx(0.9)
+    assert cursor.execute.call_count == 3
+
+
+def test_hybrid_search_exact_scan_without_iterative_scan(dao, iterative_scan):
+    # GIVEN: pgvector < 0.8, the index walk lost candidates to the filter
+    iterative_scan.return_value = False
+    db, cursor = mock_search_cursor(True, [])
+    cursor.fetchall.side_effect = [
+        [{"id": 7, "name": "Opt", "text": None, "distance": 0.1}],
+        [
+            {"id": 7, "name": "Opt", "text": None, "distance": 0.1},
+            {"id": 8, "name": "Ponder", "text": None, "distance": 0.2},
+        ],
+    ]
+    filters = CardFilter(card_type="Instant")
+
+    # WHEN
+    with patch("dao.card_dao.DBConnection", return_value=db):
+        results = dao.hybrid_search([0.1, 0.2], filters, top_k=2, distance="L2")
+
+    # THEN: no iterative scan setting, the filtered cards are ranked exactly
+    statements = [call.args[0] for call in cursor.execute.call_args_list]
+    assert not any("iterative_scan" in sql for sql in statements)
+    assert "WITH filtered AS MATERIALIZED" in statements[-1]
+    assert "types @> %(types)s::text[]" in statements[-1]
+    assert [card.id for card, _ in results] == [7, 8]
+
+
+def test_search_by_name_uses_trigram_pattern_and_projection(dao):
+    # GIVEN
+    db, cursor = mock_search_cursor(True, [{"id": 1, "name": "100% Cotton"}])
+
+    # WHEN
+    with patch("dao.card_dao.DBConnection", return_value=db):
+        cards = dao.search_by_name("100%_C", limit=5, columns=("id", "name"))
+
+    # THEN: wildcards are escaped, the embedding is not read
+    sql, params = cursor.execute.call_args.args
+    assert "embedding_of_text" not in sql
+    assert "lower(name) LIKE %(pattern)s" in sql
+    assert params == {"pattern": "%100\\%\\_c%", "query": "100%_c", "limit": 5}
+    assert cards[0].name == "100% Cotton"
+    assert cards[0].text is None
+
+
+def test_search_by_name_rejects_unknown_columns(dao):
+    with pytest.raises(ValueError):
+        dao.search_by_name("Opt", columns=("id", "password"))
+
+
+def test_reads_skip_the_embedding_by_default(dao):
+    # GIVEN
+    db, cursor = mock_search_cursor(True, [])
+    cursor.fetchone.return_value = {"id": 1, "name": "Opt", "text": "Scry 1."}
+
+    # WHEN
+    with patch("dao.card_dao.DBConnection", return_value=db):
+        card = dao.find_by_id(1)
+        dao.list_all()
+
+    # THEN
+    for call in cursor.execute.call_args_list:
+        assert "embedding_of_text" not in call.args[0]
+    assert card.text == "Scry 1."
+    assert card.embedding_of_text is None
+
+
+def test_find_by_id_full_projection(dao):
+    # GIVEN
+    db, cursor = mock_search_cursor(True, [])
+    cursor.fetchone.return_value = {
+        "id": 1,
+        "name": "Opt",
+        "text": None,
+        "embedding_of_text": [0.5],
+    }
+
+    # WHEN
+    with patch("dao.card_dao.DBConnection", return_value=db):
+        card = dao.find_by_id(1, columns=CARD_FIELDS)
+
+    # THEN
+    assert "embedding_of_text" in cursor.execute.call_args.args[0]
+    assert card.embedding_of_text == [0.5]
+
+
+def test_card_columns_with_alias():
+    assert card_columns(("text",), "c") == "c.id, c.name, c.text"
+
+
+def test_random_cards_single_query(dao):
+    # GIVEN
+    db, cursor = mock_search_cursor(True, [{"id": 4, "name": "Opt", "text": None}])
+
+    # WHEN
+    with patch("dao.card_dao.DBConnection", return_value=db):
+        cards = dao.random_cards(1)
+
+    # THEN: one round trip, no id list transferred
+    assert cursor.execute.call_count == 1
+    sql, params = cursor.execute.call_args.args
+    assert "JOIN draws USING (id)" in sql
+    assert params["n"] == 1 and params["exclude"] == []
+    assert [card.id for card in cards] == [4]
+
+
+def test_random_cards_draws_again_when_short(dao):
+    # GIVEN: the first draw hit gaps in the ids
+    db, cursor = mock_search_cursor(True, [])
+    cursor.fetchall.side_effect = [
+        [{"id": 1, "name": "Opt", "text": None}],
+        [{"id": 9, "name": "Shock", "text": None}],
+    ]
+
+    # WHEN
+    with patch("dao.card_dao.DBConnection", return_value=db):
+        cards = dao.random_cards(2)
+
+    # THEN: the second draw excludes the cards already drawn
+    assert [card.id for card in cards] == [1, 9]
+    assert cursor.execute.call_args.args[1]["exclude"] == [1]
+    assert cursor.execute.call_args.args[1]["n"] == 1
+
+
+def test_random_cards_sparse_ids(dao):
+    # GIVEN: a few cards spread over a wide id range, every draw misses
+    db, cursor = mock_search_cursor(True, [])
+    cursor.fetchall.side_effect = [
+        [{"id": 5, "name": "Opt", "text": None}],
+        [],
+        [],
+        [{"id": 900_000, "name": "Shock", "text": None}],
+    ]
+
+    # WHEN
+    with patch("dao.card_dao.DBConnection", return_value=db):
+        cards = dao.random_cards(2)
+
+    # THEN: draws scale with the id density, then the rest is sorted
+    draw_sql, draw_params = cursor.execute.call_args_list[0].args
+    assert "reltuples" in draw_sql and "span /" in draw_sql
+    assert draw_params["max_draws"] == 20000
+    sql, params = cursor.execute.call_args.args
+    assert cursor.execute.call_count == 4
+    assert "generate_series" not in sql and "ORDER BY random()" in sql
+    assert params == {"n": 1, "exclude": [5]}
+    assert [card.id for card in cards] == [5, 900_000]
+
+
+def test_random_cards_zero(dao):
+    assert dao.random_cards(0) == []
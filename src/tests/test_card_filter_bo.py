@@ -0,0 +1,40 @@
+import pytest
+
+from business_object.card_filter import CardFilter
+
+
+def test_empty_filter():
+    assert CardFilter().is_empty()
+    assert CardFilter().to_dict() == {}
+
+
+def test_values_are_normalized():
+    # WHEN
+    filters = CardFilter(
+        colors=["u", " r"], card_type="creature", legal_in="Modern", keywords=["flying"]
+    )
+
+    # THEN
+    assert filters.colors == ["U", "R"]
+    assert filters.card_type == "Creature"
+    assert filters.legal_in == "modern"
+    assert filters.keywords == ["Flying"]
+    assert not filters.is_empty()
+
+
+def test_colorless_identity_is_a_criterion():
+    # GIVEN: an empty identity means colorless cards only
+    filters = CardFilter(color_identity=[])
+
+    # THEN
+    assert not filters.is_empty()
+
+
+def test_unknown_color_raises():
+    with pytest.raises(ValueError):
+        CardFilter(colors=["X"])
+
+
+def test_empty_mana_value_range_raises():
+    with pytest.raises(ValueError):
+        CardFilter(mana_value_min=5, mana_value_max=2)
@@ -1,5 +1,5 @@
 import pytest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 
 # MOCKS pour éviter les dépendances externes
@@ -100,3 +100,17 @@ def test_get_card_details(card_service):
     # THEN
     assert details["id"] == 1
     assert details["name"] == "Lightning Bolt"
+
+
+@pytest.mark.parametrize("top_k", [0, 101, -3])
+def test_search_rejects_out_of_range_limit(top_k):
+    # GIVEN
+    from service.card_service import CardService as RealCardService
+
+    # WHEN / THEN: rejected before the query is embedded
+    with patch("service.card_service.get_embedding") as get_embedding:
+        with pytest.raises(ValueError, match="between 1 and 100"):
+            RealCardService().semantic_search("flying dragon", top_k=top_k)
+        with pytest.raises(ValueError, match="between 1 and 100"):
+            RealCardService().hybrid_search("flying dragon", None, top_k=top_k)
+    get_embedding.assert_not_called()
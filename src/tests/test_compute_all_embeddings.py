@@ -1,141 +1,180 @@
 # tests/test_compute_all_embeddings.py
 
-import sys
-import os
+import json
+
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import MagicMock
 
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from business_object.card import compute_text_hash
+from technical_components.embedding import compute_all_embeddings as cae
 
-os.environ.update(
-    {
-        "POSTGRES_HOST": "localhost",
-        "POSTGRES_DATABASE": "x",
-        "POSTGRES_USER": "x",
-        "POSTGRES_PASSWORD": "x",
-        "POSTGRES_SCHEMA": "x",
-        "POSTGRES_PORT": "5432",
-    }
-)
 
+def make_dao(batches):
+    dao = MagicMock()
+    dao.iter_texts_to_embed.side_effect = lambda **kwargs: iter(batches)
+    dao.update_embeddings.side_effect = lambda rows, model=None: len(rows)
+    return dao
 
-class MockCard:
-    def __init__(self, id, text):
-        self.id = id
-        self.text = text
 
+def fake_embed(texts):
+    return [[float(len(text))] for text in texts]
 
-with patch("psycopg2.connect") as mock_connect:
-    mock_connect.return_value = MagicMock()
-    from technical_components.embedding import compute_all_embeddings as cae
 
 # Tests unitaires
 # -------------------------------
 
 
-def test_launch_nominal():
+def test_run_nominal(tmp_path):
     # GIVEN
-    cards = [MockCard(1, "texte1"), MockCard(2, "texte2")]
-
-    with patch(
-        "technical_components.embedding.compute_all_embeddings.CardDao"
-    ) as MockCardDao:
-        instance = MockCardDao.return_value
-        instance.list_all.return_value = cards
-
-        with patch(
-            "technical_components.embedding.compute_all_embeddings.get_embedding"
-        ) as mock_get:
-            mock_get.return_value = {"embeddings": [[0.1, 0.2], [0.3, 0.4]]}
+    batches = [[(1, "texte1"), (2, "texte22")], [(5, "t")]]
+    dao = make_dao(batches)
+    pipeline = cae.EmbeddingPipeline(
+        batch_size=2,
+        workers=2,
+        checkpoint_path=str(tmp_path / "checkpoint.json"),
+        dao=dao,
+        embed=fake_embed,
+    )
+
+    # WHEN
+    done = pipeline.run()
+
+    # THEN
+    assert done == 3
+    written = [call.args[0] for call in dao.update_embeddings.call_args_list]
+    assert sorted(row for rows in written for row in rows) == [
+        (1, [6.0], compute_text_hash("texte1")),
+        (2, [7.0], compute_text_hash("texte22")),
+        (5, [1.0], compute_text_hash("t")),
+    ]
+    # A finished run leaves no checkpoint behind
+    assert not (tmp_path / "checkpoint.json").exists()
+
+
+def test_run_builds_missing_vector_indexes(tmp_path):
+    # GIVEN: a database loaded without embeddings has no vector index
+    dao = make_dao([[(1, "texte1")]])
+    index_dao = MagicMock()
+    pipeline = cae.EmbeddingPipeline(
+        checkpoint_path=None, dao=dao, embed=fake_embed, index_dao=index_dao
+    )
+
+    # WHEN
+    pipeline.run()
+
+    # THEN
+    index_dao.create.assert_called_once_with()
+
+
+def test_run_no_cards(tmp_path):
+    # GIVEN
+    dao = make_dao([])
+    index_dao = MagicMock()
+    pipeline = cae.EmbeddingPipeline(
+        checkpoint_path=str(tmp_path / "c.json"),
+        dao=dao,
+        embed=fake_embed,
+        index_dao=index_dao,
+    )
 
-            # WHEN
-            cae.launch()
+    # WHEN
+    done = pipeline.run()
 
-            # THEN
-            instance.list_all.assert_called_once()
+    # THEN
+    assert done == 0
+    dao.update_embeddings.assert_not_called()
+    index_dao.create.assert_not_called()
 
 
-def test_launch_no_cards():
+def test_run_streams_only_stale_by_default(tmp_path):
     # GIVEN
-    with patch(
-        "technical_components.embedding.compute_all_embeddings.CardDao"
-    ) as MockCardDao:
-        instance = MockCardDao.return_value
-        instance.list_all.return_value = []
+    dao = make_dao([])
+    pipeline = cae.EmbeddingPipeline(
+        batch_size=64, checkpoint_path=None, dao=dao, embed=fake_embed, model="m1"
+    )
 
-        # WHEN
-        cae.launch()
+    # WHEN
+    pipeline.run()
 
-        # THEN
-        instance.list_all.assert_called_once()
+    # THEN
+    dao.iter_texts_to_embed.assert_called_once_with(
+        batch_size=64, after_id=0, only_stale=True, model="m1"
+    )
 
 
-def test_launch_cards_without_text():
+def test_run_records_model_with_vectors(tmp_path):
     # GIVEN
-    cards = [MockCard(1, None), MockCard(2, None)]
+    dao = make_dao([[(3, "Flying")]])
+    pipeline = cae.EmbeddingPipeline(
+        checkpoint_path=None, dao=dao, embed=fake_embed, model="bge-m3:latest"
+    )
 
-    with patch(
-        "technical_components.embedding.compute_all_embeddings.CardDao"
-    ) as MockCardDao:
-        instance = MockCardDao.return_value
-        instance.list_all.return_value = cards
+    # WHEN
+    pipeline.run()
 
-        # WHEN
-        cae.launch()
+    # THEN
+    assert dao.update_embeddings.call_args.kwargs["model"] == "bge-m3:latest"
 
-        # THEN
-        instance.list_all.assert_called_once()
 
-
-def test_launch_bad_embedding_format():
+def test_run_bad_embedding_format(tmp_path):
     # GIVEN
-    cards = [MockCard(1, "texte1")]
+    dao = make_dao([[(1, "texte1"), (2, "texte2")]])
+    pipeline = cae.EmbeddingPipeline(
+        checkpoint_path=None, dao=dao, embed=lambda texts: [[0.1]]
+    )
 
-    with patch(
-        "technical_components.embedding.compute_all_embeddings.CardDao"
-    ) as MockCardDao:
-        instance = MockCardDao.return_value
-        instance.list_all.return_value = cards
+    # WHEN / THEN
+    with pytest.raises(cae.EmbeddingBackendError):
+        pipeline.run()
+    dao.update_embeddings.assert_not_called()
 
-        with patch(
-            "technical_components.embedding.compute_all_embeddings.get_embedding"
-        ) as mock_get:
-            mock_get.return_value = {"wrong_key": []}
-            with pytest.raises(KeyError):
-                cae.launch()
 
+def test_run_resumes_from_checkpoint_after_failure(tmp_path):
+    # GIVEN: the second batch fails to be written
+    path = str(tmp_path / "checkpoint.json")
+    dao = make_dao([[(1, "a"), (2, "b")], [(3, "c")]])
+    dao.update_embeddings.side_effect = [2, Exception("DB update failed")]
+    pipeline = cae.EmbeddingPipeline(
+        workers=1, checkpoint_path=path, dao=dao, embed=fake_embed
+    )
 
-def test_launch_modify_failure():
-    # GIVEN
-    cards = [MockCard(1, "texte1")]
+    # WHEN
+    with pytest.raises(Exception):
+        pipeline.run()
 
-    with patch(
-        "technical_components.embedding.compute_all_embeddings.CardDao"
-    ) as MockCardDao:
-        instance = MockCardDao.return_value
-        instance.list_all.return_value = cards
-        instance.modify.side_effect = Exception("DB update failed")
-        with pytest.raises(Exception):
-            cae.launch()
+    # THEN: the first batch is recorded, the next run starts after it
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f)["last_id"] == 2
 
+    dao = make_dao([])
+    cae.EmbeddingPipeline(checkpoint_path=path, dao=dao, embed=fake_embed).run()
+    assert dao.iter_texts_to_embed.call_args.kwargs["after_id"] == 2
 
-def test_launch_batches_of_10000():
+
+def test_checkpoint_waits_for_earlier_batches(tmp_path):
     # GIVEN
-    cards = [MockCard(i, f"texte{i}") for i in range(25000)]
+    checkpoint = cae.Checkpoint(str(tmp_path / "c.json"))
 
-    with patch(
-        "technical_components.embedding.compute_all_embeddings.CardDao"
-    ) as MockCardDao:
-        instance = MockCardDao.return_value
-        instance.list_all.return_value = cards
+    # WHEN: batch 1 finishes before batch 0
+    checkpoint.done(1, 20)
 
-        with patch(
-            "technical_components.embedding.compute_all_embeddings.get_embedding"
-        ) as mock_get:
-            mock_get.return_value = {"embeddings": [[0.1, 0.2]] * 10000}
+    # THEN
+    assert checkpoint.last_id == 0
+    checkpoint.done(0, 10)
+    assert checkpoint.last_id == 20
 
-            # WHEN
-            cae.launch()
 
-            # THEN
-            instance.list_all.assert_called_once()
+def test_many_batches_with_bounded_read_ahead():
+    # GIVEN
+    batches = [[(i, f"texte{i}")] for i in range(1, 101)]
+    dao = make_dao(batches)
+    pipeline = cae.EmbeddingPipeline(
+        workers=3, checkpoint_path=None, dao=dao, embed=fake_embed
+    )
+
+    # WHEN
+    done = pipeline.run()
+
+    # THEN
+    assert done == 100
+    assert dao.update_embeddings.call_count == 100
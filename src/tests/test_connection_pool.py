@@ -0,0 +1,235 @@
+import threading
+
+import psycopg2
+import pytest
+from unittest.mock import MagicMock, patch
+from psycopg2 import extensions
+from psycopg2.pool import PoolError
+
+from dao.connection_pool import ConnectionPool, session_state
+
+
+def make_connection():
+    connection = MagicMock()
+    connection.closed = 0
+    connection.get_transaction_status.return_value = (
+        extensions.TRANSACTION_STATUS_IDLE
+    )
+    return connection
+
+
+@pytest.fixture
+def mock_connect():
+    with patch("dao.connection_pool.psycopg2.connect") as connect:
+        connect.side_effect = lambda **kwargs: make_connection()
+        yield connect
+
+
+def test_opens_min_size_connections(mock_connect):
+    # GIVEN / WHEN
+    pool = ConnectionPool(min_size=2, max_size=5)
+
+    # THEN
+    assert mock_connect.call_count == 2
+    assert pool.stats["size"] == 2
+    assert pool.stats["idle"] == 2
+
+
+def test_invalid_sizes_raise(mock_connect):
+    with pytest.raises(ValueError):
+        ConnectionPool(min_size=3, max_size=2)
+
+
+def test_connection_is_reused(mock_connect):
+    # GIVEN
+    pool = ConnectionPool(min_size=1, max_size=5)
+
+    # WHEN
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+
+    # THEN
+    assert first is second
+    assert mock_connect.call_count == 1
+    first.commit.assert_called()
+
+
+def test_concurrent_checkouts_get_distinct_connections(mock_connect):
+    # GIVEN
+    pool = ConnectionPool(min_size=0, max_size=3)
+
+    # WHEN
+    connections = [pool.getconn() for _ in range(3)]
+
+    # THEN
+    assert len({id(c) for c in connections}) == 3
+    assert pool.stats["in_use"] == 3
+
+
+def test_checkout_times_out_when_exhausted(mock_connect):
+    # GIVEN
+    pool = ConnectionPool(min_size=1, max_size=1, timeout=0.05)
+    pool.getconn()
+
+    # WHEN / THEN
+    with pytest.raises(PoolError):
+        pool.getconn()
+
+
+def test_waiting_checkout_gets_returned_connection(mock_connect):
+    # GIVEN
+    pool = ConnectionPool(min_size=1, max_size=1, timeout=2)
+    held = pool.getconn()
+    result = {}
+
+    def worker():
+        result["connection"] = pool.getconn()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+
+    # WHEN
+    pool.putconn(held)
+    thread.join(timeout=2)
+
+    # THEN
+    assert result["connection"] is held
+
+
+def test_exception_rolls_back(mock_connect):
+    # GIVEN
+    pool = ConnectionPool(min_size=1, max_size=1)
+
+    # WHEN
+    with pytest.raises(ValueError):
+        with pool.connection() as connection:
+            raise ValueError("boom")
+
+    # THEN
+    connection.rollback.assert_called()
+    connection.commit.assert_not_called()
+    assert pool.stats["idle"] == 1
+
+
+def test_operational_error_discards_connection(mock_connect):
+    # GIVEN
+    pool = ConnectionPool(min_size=1, max_size=1)
+
+    # WHEN
+    with pytest.raises(psycopg2.OperationalError):
+        with pool.connection() as broken:
+            raise psycopg2.OperationalError("server closed the connection")
+
+    # THEN
+    broken.close.assert_called_once()
+    assert pool.stats["size"] == 0
+    with pool.connection() as fresh:
+        assert fresh is not broken
+
+
+def test_broken_idle_connection_is_replaced(mock_connect):
+    # GIVEN
+    pool = ConnectionPool(min_size=1, max_size=1)
+    broken = pool.getconn()
+    pool.putconn(broken)
+    broken.closed = 1
+
+    # WHEN
+    connection = pool.getconn()
+
+    # THEN
+    assert connection is not broken
+    assert mock_connect.call_count == 2
+
+
+def test_idle_connection_is_pinged(mock_connect):
+    # GIVEN
+    pool = ConnectionPool(min_size=1, max_size=1, health_check_interval=0)
+    connection = pool.getconn()
+    pool.putconn(connection)
+
+    # WHEN
+    again = pool.getconn()
+
+    # THEN
+    assert again is connection
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.execute.assert_called_with("SELECT 1")
+
+
+def test_close_all(mock_connect):
+    # GIVEN
+    pool = ConnectionPool(min_size=2, max_size=2)
+
+    # WHEN
+    pool.close_all()
+
+    # THEN
+    assert pool.stats["size"] == 0
+    with pytest.raises(PoolError):
+        pool.getconn()
+
+
+def test_configure_runs_on_new_connections(mock_connect):
+    # GIVEN
+    configure = MagicMock()
+
+    # WHEN
+    pool = ConnectionPool(min_size=2, max_size=5, configure=configure)
+
+    # THEN
+    assert configure.call_count == 2
+    assert pool.stats["size"] == 2
+
+
+def test_session_state_follows_the_connection(mock_connect):
+    # GIVEN: the configure hook attaches the per-session state
+    def configure(connection):
+        session_state(connection)["prepared_statements"] = set()
+
+    pool = ConnectionPool(min_size=1, max_size=1, configure=configure)
+    with pool.connection() as connection:
+        session_state(connection)["prepared_statements"].add("stmt")
+
+    # WHEN: reused, then discarded and replaced
+    with pool.connection() as again:
+        kept = set(session_state(again)["prepared_statements"])
+    pool.putconn(pool.getconn(), discard=True)
+    with pool.connection() as fresh:
+        reset = session_state(fresh)["prepared_statements"]
+
+    # THEN
+    assert again is connection and kept == {"stmt"}
+    assert fresh is not connection and reset == set()
+
+
+def test_close_if_open_does_not_open_the_pool():
+    # GIVEN
+    from dao.db_connection import DBConnection
+    from utils.singleton import Singleton
+
+    env = {
+        "PGHOST": "h",
+        "PGPORT": "5432",
+        "PGDATABASE": "d",
+        "PGUSER": "u",
+        "PGPASSWORD": "p",
+    }
+    with patch.dict(Singleton._instances, clear=True), patch.dict(
+        "os.environ", env
+    ), patch("dao.db_connection.ConnectionPool") as pool_class:
+        # WHEN: never used
+        DBConnection.close_if_open()
+
+        # THEN
+        pool_class.assert_not_called()
+
+        # WHEN: opened, then closed
+        DBConnection()
+        DBConnection.close_if_open()
+
+        # THEN
+        pool_class.return_value.close_all.assert_called_once()
+        assert DBConnection not in Singleton._instances
@@ -0,0 +1,84 @@
+import math
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+from technical_components.embedding.embedding_backend import (
+    HashingBackend,
+    OllamaBackend,
+    create_backend,
+)
+from technical_components.embedding.embedding_client import EmbeddingBackendError
+
+
+def cosine(a, b):
+    return sum(x * y for x, y in zip(a, b))
+
+
+def test_hashing_backend_is_deterministic_and_normalized():
+    # GIVEN
+    backend = HashingBackend(dimension=64)
+
+    # WHEN
+    first, second = backend.embed(["Flying dragon", "Flying dragon"])
+
+    # THEN
+    assert first == second
+    assert len(first) == 64
+    assert math.isclose(math.sqrt(sum(x * x for x in first)), 1.0)
+
+
+def test_hashing_backend_similar_texts_are_closer():
+    # GIVEN
+    backend = HashingBackend()
+
+    # WHEN
+    dragon, flying_dragon, land = backend.embed(
+        ["red dragon with flying", "flying red dragon", "tap to add mana"]
+    )
+
+    # THEN
+    assert cosine(dragon, flying_dragon) > cosine(dragon, land)
+
+
+def test_hashing_backend_handles_empty_text():
+    # WHEN
+    vector = HashingBackend(dimension=8).embed_one("")
+
+    # THEN
+    assert math.isclose(math.sqrt(sum(x * x for x in vector)), 1.0)
+
+
+def test_ollama_backend_unwraps_embeddings():
+    # GIVEN
+    client = MagicMock(model="bge-m3:latest")
+    client.embed.return_value = {"embeddings": [[0.1], [0.2]]}
+    backend = OllamaBackend(client)
+
+    # WHEN
+    vectors = backend.embed(["a", "b"])
+
+    # THEN
+    assert vectors == [[0.1], [0.2]]
+    assert backend.model == "bge-m3:latest"
+
+
+def test_ollama_backend_invalid_response():
+    # GIVEN
+    client = MagicMock(model="bge-m3:latest")
+    client.embed.return_value = {"detail": "Invalid token"}
+
+    # WHEN / THEN
+    with pytest.raises(EmbeddingBackendError):
+        OllamaBackend(client).embed(["a"])
+
+
+def test_create_backend_from_environment():
+    with patch.dict("os.environ", {"EMBEDDING_BACKEND": "hashing"}):
+        assert isinstance(create_backend(), HashingBackend)
+    assert isinstance(create_backend("ollama"), OllamaBackend)
+
+
+def test_create_backend_unknown():
+    with pytest.raises(ValueError):
+        create_backend("word2vec")
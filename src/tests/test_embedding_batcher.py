@@ -0,0 +1,110 @@
+import threading
+
+import pytest
+
+from technical_components.embedding.embedding_batcher import EmbeddingBatcher
+from technical_components.embedding.embedding_client import EmbeddingBackendError
+
+
+def fake_embed_many(calls):
+    def embed_many(texts):
+        calls.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+    return embed_many
+
+
+def test_single_request():
+    # GIVEN
+    calls = []
+    batcher = EmbeddingBatcher(fake_embed_many(calls), max_wait_ms=1)
+
+    # WHEN
+    embedding = batcher.embed("goblin", timeout=2)
+    batcher.close()
+
+    # THEN
+    assert embedding == [6.0]
+    assert calls == [["goblin"]]
+
+
+def test_concurrent_requests_share_one_call():
+    # GIVEN
+    calls = []
+    batcher = EmbeddingBatcher(fake_embed_many(calls), max_wait_ms=200)
+    texts = ["a", "bb", "ccc", "bb"]
+
+    # WHEN
+    futures = [batcher.submit(text) for text in texts]
+    results = [future.result(timeout=2) for future in futures]
+    batcher.close()
+
+    # THEN: one call, duplicates embedded once, each caller gets its own vector
+    assert calls == [["a", "bb", "ccc"]]
+    assert results == [[1.0], [2.0], [3.0], [2.0]]
+    assert batcher.stats()["batches_sent"] == 1
+
+
+def test_batches_are_capped_at_max_batch_size():
+    # GIVEN
+    calls = []
+    batcher = EmbeddingBatcher(
+        fake_embed_many(calls), max_batch_size=2, max_wait_ms=200
+    )
+
+    # WHEN
+    futures = [batcher.submit(text) for text in ["a", "b", "c"]]
+    for future in futures:
+        future.result(timeout=2)
+    batcher.close()
+
+    # THEN
+    assert sorted(len(call) for call in calls) == [1, 2]
+
+
+def test_errors_reach_every_waiting_caller():
+    # GIVEN
+    def failing(texts):
+        raise ConnectionError("down")
+
+    batcher = EmbeddingBatcher(failing, max_wait_ms=50)
+
+    # WHEN
+    futures = [batcher.submit(text) for text in ["a", "b"]]
+
+    # THEN
+    for future in futures:
+        with pytest.raises(ConnectionError):
+            future.result(timeout=2)
+    batcher.close()
+
+
+def test_wrong_number_of_vectors_is_an_error():
+    # GIVEN
+    batcher = EmbeddingBatcher(lambda texts: [], max_wait_ms=1)
+
+    # WHEN / THEN
+    with pytest.raises(EmbeddingBackendError):
+        batcher.embed("a", timeout=2)
+    batcher.close()
+
+
+def test_close_flushes_pending_requests():
+    # GIVEN
+    release = threading.Event()
+
+    def slow(texts):
+        release.wait(2)
+        return [[1.0] for _ in texts]
+
+    batcher = EmbeddingBatcher(slow, max_wait_ms=1)
+    future = batcher.submit("a")
+
+    # WHEN
+    release.set()
+    batcher.close()
+
+    # THEN
+    assert future.result(timeout=0) == [1.0]
+    with pytest.raises(RuntimeError):
+        batcher.submit("b")
@@ -0,0 +1,176 @@
+import sqlite3
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+from technical_components.embedding.embedding_cache import (
+    EmbeddingCache,
+    normalize_text,
+)
+from technical_components.embedding import ollama_embedding
+from technical_components.embedding.embedding_backend import HashingBackend
+
+
+def test_normalize_text_collapses_whitespace():
+    assert normalize_text("  flying   dragon\n") == "flying dragon"
+    assert normalize_text("Flying") != normalize_text("flying")
+
+
+def test_get_miss_then_hit():
+    # GIVEN
+    cache = EmbeddingCache(max_size=10)
+
+    # WHEN
+    first = cache.get("model", "query")
+    cache.put("model", "query", [0.1, 0.2])
+    second = cache.get("model", " query ")
+
+    # THEN
+    assert first is None
+    assert second == [0.1, 0.2]
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["hit_rate"] == 0.5
+
+
+def test_key_includes_model():
+    # GIVEN
+    cache = EmbeddingCache()
+    cache.put("model-a", "query", [1.0])
+
+    # WHEN / THEN
+    assert cache.get("model-b", "query") is None
+
+
+def test_lru_eviction():
+    # GIVEN
+    cache = EmbeddingCache(max_size=2)
+    cache.put("m", "a", [1.0])
+    cache.put("m", "b", [2.0])
+    cache.get("m", "a")  # "b" becomes least recently used
+
+    # WHEN
+    cache.put("m", "c", [3.0])
+
+    # THEN
+    assert cache.get("m", "b") is None
+    assert cache.get("m", "a") == [1.0]
+    assert cache.get("m", "c") == [3.0]
+    assert cache.stats()["size"] == 2
+
+
+def test_ttl_expiry():
+    # GIVEN
+    cache = EmbeddingCache(ttl=10)
+    with patch("technical_components.embedding.embedding_cache.time.time") as now:
+        now.return_value = 1000.0
+        cache.put("m", "a", [1.0])
+
+        # WHEN / THEN
+        now.return_value = 1005.0
+        assert cache.get("m", "a") == [1.0]
+        now.return_value = 1011.0
+        assert cache.get("m", "a") is None
+
+
+def test_persistent_backend(tmp_path):
+    # GIVEN
+    path = str(tmp_path / "embeddings.sqlite")
+    EmbeddingCache(path=path).put("m", "query", [0.5, 0.25])
+
+    # WHEN: a new cache (other worker, restart) opens the same file
+    cache = EmbeddingCache(path=path)
+
+    # THEN
+    assert cache.get("m", "query") == [0.5, 0.25]
+
+
+def test_persistent_expired_rows_deleted(tmp_path):
+    # GIVEN: one fresh and two expired entries in the file
+    path = str(tmp_path / "embeddings.sqlite")
+    with patch("technical_components.embedding.embedding_cache.time.time") as now:
+        now.return_value = 1000.0
+        writer = EmbeddingCache(path=path, ttl=10)
+        writer.put("m", "old", [1.0])
+        writer.put("m", "stale", [2.0])
+        now.return_value = 1015.0
+        writer.put("m", "new", [3.0])
+
+        # WHEN: a miss on an expired row, then a new cache opens the file
+        assert writer.get("m", "old") is None
+        reopened = EmbeddingCache(path=path, ttl=10)
+
+    # THEN: only the fresh row is left
+    rows = reopened._db.execute("SELECT text FROM embeddings").fetchall()
+    assert rows == [("new",)]
+
+
+def test_unusable_file_degrades_to_memory(tmp_path):
+    # GIVEN: the SQLite file becomes locked (or full, or read-only)
+    cache = EmbeddingCache(path=str(tmp_path / "embeddings.sqlite"))
+    broken = MagicMock()
+    broken.execute.side_effect = sqlite3.OperationalError("database is locked")
+    cache._db = broken
+
+    # WHEN
+    cache.put("m", "query", [0.5])
+    cached = cache.get("m", "query")
+
+    # THEN: no error, the memory level keeps working without the file
+    assert cached == [0.5]
+    assert cache.get("m", "other") is None
+    assert cache._db is None
+    assert cache.stats()["persistent_path"] is None
+
+
+def test_unopenable_file_degrades_to_memory(tmp_path):
+    # GIVEN: a directory where the file should be
+    path = tmp_path / "embeddings.sqlite"
+    path.mkdir()
+
+    # WHEN
+    cache = EmbeddingCache(path=str(path), ttl=10)
+    cache.put("m", "query", [0.5])
+
+    # THEN
+    assert cache.get("m", "query") == [0.5]
+
+
+def test_invalid_size():
+    with pytest.raises(ValueError):
+        EmbeddingCache(max_size=0)
+
+
+def test_get_embedding_uses_cache():
+    # GIVEN
+    with patch.object(ollama_embedding, "_cache", EmbeddingCache()), patch.object(
+        ollama_embedding, "_backend", HashingBackend(4)
+    ), patch.object(
+        ollama_embedding, "get_embedding_batcher", return_value=None
+    ), patch.object(
+        ollama_embedding, "request_embedding"
+    ) as request:
+        request.return_value = {"embeddings": [[0.1, 0.2]]}
+
+        # WHEN
+        first = ollama_embedding.get_embedding("goblin")
+        second = ollama_embedding.get_embedding("goblin")
+
+        # THEN
+        assert first["embeddings"][0] == second["embeddings"][0] == [0.1, 0.2]
+        request.assert_called_once_with("goblin")
+
+
+def test_get_embedding_lists_bypass_cache():
+    # GIVEN
+    with patch.object(ollama_embedding, "_cache", EmbeddingCache()), patch.object(
+        ollama_embedding, "_backend", HashingBackend(4)
+    ), patch.object(ollama_embedding, "request_embedding") as request:
+        request.return_value = {"embeddings": [[0.1], [0.2]]}
+
+        # WHEN
+        ollama_embedding.get_embedding(["a", "b"])
+        ollama_embedding.get_embedding(["a", "b"])
+
+        # THEN
+        assert request.call_count == 2
@@ -0,0 +1,189 @@
+import asyncio
+
+import pytest
+import requests
+from unittest.mock import MagicMock, patch
+
+from technical_components.embedding.embedding_client import (
+    CircuitBreaker,
+    CircuitOpenError,
+    EmbeddingBackendError,
+    EmbeddingClient,
+)
+
+
+def make_response(status_code, payload=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.json.return_value = payload or {}
+    if status_code >= 400:
+        response.raise_for_status.side_effect = requests.HTTPError(str(status_code))
+    return response
+
+
+@pytest.fixture
+def client():
+    client = EmbeddingClient(token="secret", max_retries=2, backoff_factor=0)
+    client.session = MagicMock()
+    return client
+
+
+def test_token_is_set_once_on_the_session():
+    # GIVEN / WHEN
+    client = EmbeddingClient(token="secret")
+
+    # THEN
+    assert client.session.headers["Authorization"] == "Bearer secret"
+
+
+def test_embed_success(client):
+    # GIVEN
+    client.session.post.return_value = make_response(200, {"embeddings": [[0.1]]})
+
+    # WHEN
+    result = client.embed("goblin")
+
+    # THEN
+    assert result == {"embeddings": [[0.1]]}
+    _, kwargs = client.session.post.call_args
+    assert kwargs["json"] == {"model": "bge-m3:latest", "input": "goblin"}
+    assert kwargs["timeout"] == client.timeout
+
+
+def test_embed_retries_on_5xx_and_timeout(client):
+    # GIVEN
+    client.session.post.side_effect = [
+        make_response(503),
+        requests.Timeout("slow"),
+        make_response(200, {"embeddings": [[0.1]]}),
+    ]
+
+    # WHEN
+    result = client.embed("goblin")
+
+    # THEN
+    assert result["embeddings"] == [[0.1]]
+    assert client.session.post.call_count == 3
+
+
+def test_embed_gives_up_after_max_retries(client):
+    # GIVEN
+    client.session.post.side_effect = requests.ConnectionError("down")
+
+    # WHEN / THEN
+    with pytest.raises(requests.ConnectionError):
+        client.embed("goblin")
+    assert client.session.post.call_count == 3
+
+
+def test_embed_does_not_retry_4xx(client):
+    # GIVEN
+    client.circuit_breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    response = make_response(404, {"error": "model not found"})
+    response.text = '{"error": "model not found"}'
+    client.session.post.return_value = response
+
+    # WHEN / THEN: a real error for the caller, not an error body
+    with pytest.raises(EmbeddingBackendError, match="404"):
+        client.embed("goblin")
+
+    # THEN: not retried, and the backend is not counted as failing
+    assert client.session.post.call_count == 1
+    assert client.circuit_breaker.state == "closed"
+
+
+def test_4xx_releases_the_half_open_trial():
+    # GIVEN
+    client = EmbeddingClient(token="secret", max_retries=0)
+    client.session = MagicMock()
+    client.session.post.return_value = make_response(401)
+    client.circuit_breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    with patch("technical_components.embedding.embedding_client.time.monotonic") as now:
+        now.return_value = 100.0
+        client.circuit_breaker.record_failure()
+        now.return_value = 131.0
+
+        # WHEN
+        with pytest.raises(EmbeddingBackendError):
+            client.embed("goblin")
+
+        # THEN: the next call may try again
+        assert client.circuit_breaker.allow()
+
+
+def test_circuit_opens_and_fails_fast(client):
+    # GIVEN
+    client.circuit_breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    client.session.post.side_effect = requests.ConnectionError("down")
+
+    # WHEN: two failed calls, three attempts each
+    for _ in range(2):
+        with pytest.raises(requests.ConnectionError):
+            client.embed("goblin")
+    with pytest.raises(CircuitOpenError):
+        client.embed("goblin")
+
+    # THEN: the third call never hit the network
+    assert client.session.post.call_count == 6
+    assert client.circuit_breaker.state == "open"
+
+
+def test_retries_of_one_call_count_as_one_failure(client):
+    # GIVEN
+    client.circuit_breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    client.session.post.side_effect = requests.ConnectionError("down")
+
+    # WHEN
+    with pytest.raises(requests.ConnectionError):
+        client.embed("goblin")
+
+    # THEN
+    assert client.circuit_breaker.state == "closed"
+
+
+def test_circuit_half_open_then_closed():
+    # GIVEN
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    with patch("technical_components.embedding.embedding_client.time.monotonic") as now:
+        now.return_value = 100.0
+        breaker.record_failure()
+        assert not breaker.allow()
+
+        # WHEN
+        now.return_value = 131.0
+
+        # THEN
+        assert breaker.state == "half_open"
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker.state == "closed"
+
+
+def test_circuit_half_open_lets_a_single_trial_through():
+    # GIVEN
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    with patch("technical_components.embedding.embedding_client.time.monotonic") as now:
+        now.return_value = 100.0
+        breaker.record_failure()
+        now.return_value = 131.0
+
+        # WHEN
+        allowed = [breaker.allow() for _ in range(3)]
+        breaker.record_failure()
+
+        # THEN: one trial, and its failure re-opens the circuit
+        assert allowed == [True, False, False]
+        assert breaker.state == "open"
+        now.return_value = 162.0
+        assert breaker.allow()
+
+
+def test_aembed(client):
+    # GIVEN
+    client.session.post.return_value = make_response(200, {"embeddings": [[0.1]]})
+
+    # WHEN
+    result = asyncio.run(client.aembed("goblin"))
+
+    # THEN
+    assert result == {"embeddings": [[0.1]]}
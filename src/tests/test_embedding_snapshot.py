@@ -0,0 +1,183 @@
+import pytest
+from unittest.mock import MagicMock, patch
+
+np = pytest.importorskip("numpy")
+
+from technical_components.search.embedding_snapshot import (  # noqa: E402
+    EmbeddingSnapshot,
+    SnapshotWriter,
+    export_snapshot,
+)
+from technical_components.search import in_memory_search  # noqa: E402
+from technical_components.search.in_memory_search import (  # noqa: E402
+    InMemorySearchEngine,
+)
+
+WATERMARK = {"count": 3, "max_id": 9, "checksum": "abc"}
+
+CARDS = [
+    (3, [1.0, 0.0, 0.0], "Opt", "Scry 1. Draw a card."),
+    (7, [0.0, 2.0, 0.0], "Æther Vial", "At the beginning of your upkeep…"),
+    (9, [1.0, 1.0, 1.0], "Forest", ""),
+]
+
+
+def write(path, watermark=None):
+    writer = SnapshotWriter(str(path), "bge-m3:latest", 3, watermark)
+    for card_id, vector, name, text in CARDS:
+        writer.add(card_id, vector, name, text)
+    return writer.close()
+
+
+def test_snapshot_round_trip(tmp_path):
+    # GIVEN
+    path = tmp_path / "cards.emb"
+    header = write(path)
+
+    # WHEN
+    snapshot = EmbeddingSnapshot(str(path))
+
+    # THEN
+    assert header["count"] == 3
+    assert snapshot.model == "bge-m3:latest"
+    assert snapshot.ids.tolist() == [3, 7, 9]
+    assert list(snapshot.names) == ["Opt", "Æther Vial", "Forest"]
+    assert snapshot.texts[1] == "At the beginning of your upkeep…"
+    assert isinstance(snapshot.unit, np.memmap)
+    assert np.allclose(snapshot.unit[1], [0.0, 1.0, 0.0])
+    assert snapshot.norms[1] == pytest.approx(2.0)
+    # The matrix starts on a page boundary
+    assert header["sections"]["unit"] % 4096 == 0
+
+
+def test_engine_from_snapshot_matches_in_memory(tmp_path):
+    # GIVEN
+    path = tmp_path / "cards.emb"
+    write(path)
+    ids, vectors, names, texts = zip(*CARDS)
+    reference = InMemorySearchEngine(list(ids), list(vectors), names, texts)
+
+    # WHEN
+    engine = InMemorySearchEngine.from_snapshot(str(path))
+
+    # THEN
+    for distance in ("L2", "cosine"):
+        expected = reference.search([0.5, 1.0, 0.2], top_k=3, distance=distance)
+        results = engine.search([0.5, 1.0, 0.2], top_k=3, distance=distance)
+        assert [(c.id, c.name) for c, _ in results] == [
+            (c.id, c.name) for c, _ in expected
+        ]
+        assert [s for _, s in results] == pytest.approx([s for _, s in expected])
+    assert engine.stats()["memory_mapped"] is True
+
+
+def test_engine_from_snapshot_accepts_updates(tmp_path):
+    # GIVEN
+    path = tmp_path / "cards.emb"
+    write(path)
+    engine = InMemorySearchEngine.from_snapshot(str(path))
+
+    # WHEN: the mapped file is read-only, updates go to a private copy
+    engine.upsert(11, [0.0, 0.0, 5.0], name="Island", text="")
+    engine.remove(3)
+
+    # THEN
+    assert engine.search([0.0, 0.0, 1.0], top_k=1, distance="cosine")[0][0].id == 11
+    assert len(engine) == 3
+    assert EmbeddingSnapshot(str(path)).count == 3
+
+
+def test_export_snapshot_from_dao(tmp_path):
+    # GIVEN
+    dao = MagicMock()
+    dao.embedding_watermark.return_value = {"count": 2, "max_id": 2, "checksum": "x"}
+    dao.iter_embeddings.return_value = iter(
+        [
+            [
+                {
+                    "id": 1,
+                    "name": "Opt",
+                    "text": "Scry 1.",
+                    "embedding_of_text": "[1,0]",
+                },
+                {
+                    "id": 2,
+                    "name": "Shock",
+                    "text": "2 damage",
+                    "embedding_of_text": "[0,1]",
+                },
+            ]
+        ]
+    )
+    path = tmp_path / "out" / "cards.emb"
+
+    # WHEN
+    header = export_snapshot(str(path), model="m1", dao=dao)
+
+    # THEN
+    assert header["count"] == 2 and header["dimension"] == 2
+    assert not (tmp_path / "out" / "cards.emb.tmp").exists()
+    assert EmbeddingSnapshot(str(path)).names[1] == "Shock"
+    assert EmbeddingSnapshot(str(path)).watermark == {
+        "count": 2,
+        "max_id": 2,
+        "checksum": "x",
+    }
+
+
+@pytest.mark.parametrize(
+    "current, mapped",
+    [
+        (WATERMARK, True),
+        # Cards added, updated or re-embedded since the export
+        ({"count": 4, "max_id": 12, "checksum": "def"}, False),
+        ({"count": 3, "max_id": 9, "checksum": "def"}, False),
+    ],
+)
+def test_load_engine_checks_watermark(tmp_path, monkeypatch, current, mapped):
+    # GIVEN
+    path = tmp_path / "cards.emb"
+    write(path, WATERMARK)
+    monkeypatch.setenv("EMBEDDING_SNAPSHOT_PATH", str(path))
+    backend = MagicMock(model="bge-m3:latest")
+    from_dao = MagicMock()
+
+    # WHEN
+    with patch.object(
+        in_memory_search, "get_embedding_backend", return_value=backend
+    ), patch.object(in_memory_search, "CardDao") as card_dao, patch.object(
+        InMemorySearchEngine, "from_dao", from_dao
+    ):
+        card_dao.return_value.embedding_watermark.return_value = current
+        engine = in_memory_search._load_engine()
+
+    # THEN
+    assert (engine is not from_dao.return_value) is mapped
+    assert from_dao.called is not mapped
+
+
+def test_load_engine_snapshot_without_watermark(tmp_path, monkeypatch):
+    # GIVEN: a snapshot exported before watermarks were recorded
+    path = tmp_path / "cards.emb"
+    write(path)
+    monkeypatch.setenv("EMBEDDING_SNAPSHOT_PATH", str(path))
+
+    # WHEN
+    with patch.object(
+        in_memory_search, "get_embedding_backend"
+    ) as backend, patch.object(in_memory_search, "CardDao") as card_dao, patch.object(
+        InMemorySearchEngine, "from_dao"
+    ) as from_dao:
+        backend.return_value.model = "bge-m3:latest"
+        card_dao.return_value.embedding_watermark.return_value = WATERMARK
+        engine = in_memory_search._load_engine()
+
+    # THEN
+    assert engine is from_dao.return_value
+
+
+def test_not_a_snapshot(tmp_path):
+    path = tmp_path / "cards.json"
+    path.write_bytes(b'{"data": {}}')
+    with pytest.raises(ValueError):
+        EmbeddingSnapshot(str(path))
@@ -0,0 +1,200 @@
+import pytest
+from datetime import datetime
+from unittest.mock import Mock, patch, MagicMock
+
+from business_object.historical_search import HistoricalSearch
+from dao.historical_dao import HistoricalDao
+
+
+class TestHistoricalDao:
+    """Unit tests for the ownership-checked lookups of HistoricalDao"""
+
+    @pytest.fixture(autouse=True)
+    def setup_mocks(self):
+        """Setup mocks to isolate tests from the database"""
+        with patch("dao.historical_dao.DBConnection") as mock_db_connection:
+            self.mock_connection = MagicMock()
+            self.mock_cursor = MagicMock()
+
+            self.mock_connection.__enter__ = Mock(return_value=self.mock_connection)
+            self.mock_connection.__exit__ = Mock(return_value=None)
+            self.mock_connection.cursor.return_value.__enter__ = Mock(
+                return_value=self.mock_cursor
+            )
+            self.mock_connection.cursor.return_value.__exit__ = Mock(return_value=None)
+
+            mock_db_connection.return_value.connection = self.mock_connection
+            yield
+
+    def test_find_page_by_user_id_first_page(self):
+        """The first page reads the user's searches from the most recent one"""
+        # GIVEN
+        self.mock_cursor.fetchall.return_value = []
+
+        # WHEN
+        HistoricalDao().find_page_by_user_id(1, limit=21)
+
+        # THEN
+        sql, params = self.mock_cursor.execute.call_args[0]
+        assert "ORDER BY created_at DESC, id DESC" in sql
+        assert "OFFSET" not in sql
+        assert "(created_at, id) <" not in sql
+        assert params == (1, 21)
+
+    def test_find_page_by_user_id_after_cursor(self):
+        """Later pages start right after the last search seen"""
+        # GIVEN
+        created_at = datetime(2025, 1, 1)
+        self.mock_cursor.fetchall.return_value = [
+            {
+                "id": 6,
+                "user_id": 1,
+                "query_text": "goblin",
+                "embedding_dimensions": None,
+                "result_count": 3,
+                "created_at": created_at,
+            }
+        ]
+
+        # WHEN
+        searches = HistoricalDao().find_page_by_user_id(
+            1, limit=21, after=(created_at, 7)
+        )
+
+        # THEN
+        sql, params = self.mock_cursor.execute.call_args[0]
+        assert "AND (created_at, id) < (%s, %s)" in sql
+        assert "vector_dims(query_embedding) AS embedding_dimensions" in sql
+        assert "query_embedding," not in sql
+        assert params == (1, created_at, 7, 21)
+        assert [s.id for s in searches] == [6]
+
+    def test_find_by_id_for_user_found(self):
+        """A search of the user is read with one keyed query"""
+        # GIVEN
+        created_at = datetime(2025, 1, 1)
+        self.mock_cursor.fetchone.return_value = {
+            "id": 7,
+            "user_id": 1,
+            "query_text": "flying dragon",
+            "embedding_dimensions": 1024,
+            "result_count": 5,
+            "created_at": created_at,
+        }
+
+        # WHEN
+        search = HistoricalDao().find_by_id_for_user(7, 1)
+
+        # THEN
+        assert search.id == 7
+        assert search.user_id == 1
+        assert search.query_text == "flying dragon"
+        assert search.created_at == created_at
+        assert search.has_embedding and search.embedding_dimensions == 1024
+        assert search.query_embedding is None
+        sql, params = self.mock_cursor.execute.call_args[0]
+        assert "vector_dims(query_embedding) AS embedding_dimensions" in sql
+        assert "query_embedding," not in sql
+        assert "WHERE id = %s AND user_id = %s" in sql
+        assert "LIMIT" not in sql
+        assert params == (7, 1)
+
+    def test_find_by_id_for_user_not_owned(self):
+        """A search of another user (or a missing one) is not returned"""
+        # GIVEN
+        self.mock_cursor.fetchone.return_value = None
+
+        # WHEN
+        search = HistoricalDao().find_by_id_for_user(7, 2)
+
+        # THEN
+        assert search is None
+
+    def test_delete_by_id_for_user_success(self):
+        """The delete checks the owner in the same statement"""
+        # GIVEN
+        self.mock_cursor.rowcount = 1
+
+        # WHEN
+        result = HistoricalDao().delete_by_id_for_user(7, 1)
+
+        # THEN
+        assert result is True
+        self.mock_cursor.execute.assert_called_once()
+        sql, params = self.mock_cursor.execute.call_args[0]
+        assert "DELETE FROM project.search_history" in sql
+        assert "WHERE id = %s AND user_id = %s" in sql
+        assert params == (7, 1)
+        self.mock_connection.commit.assert_called_once()
+
+    def test_delete_by_id_for_user_not_owned(self):
+        """Nothing is deleted when the search belongs to someone else"""
+        # GIVEN
+        self.mock_cursor.rowcount = 0
+
+        # WHEN
+        result = HistoricalDao().delete_by_id_for_user(7, 2)
+
+        # THEN
+        assert result is False
+
+    def test_delete_by_id_for_user_database_error(self):
+        """Database errors are raised, not reported as a missing search"""
+        # GIVEN
+        self.mock_cursor.execute.side_effect = Exception("connection lost")
+
+        # WHEN / THEN
+        with pytest.raises(Exception, match="connection lost"):
+            HistoricalDao().delete_by_id_for_user(7, 1)
+
+    def test_get_stats_by_user_id_single_query(self):
+        """All the statistics come from one aggregate query"""
+        # GIVEN
+        self.mock_cursor.fetchone.return_value = {
+            "total_searches": 4,
+            "total_results": 12,
+            "avg_results": 3,
+            "max_results": 8,
+            "zero_result_searches": 1,
+            "most_recent": datetime(2025, 1, 2),
+            "oldest": datetime(2025, 1, 1),
+            "top_queries": [{"query": "dragon", "count": 2}],
+            "searches_per_day": [{"day": "2025-01-01", "count": 4}],
+        }
+
+        # WHEN
+        stats = HistoricalDao().get_stats_by_user_id(1, top_queries=3, days=7)
+
+        # THEN
+        self.mock_cursor.execute.assert_called_once()
+        sql, params = self.mock_cursor.execute.call_args[0]
+        assert "COUNT(*) FILTER (WHERE result_count = 0)" in sql
+        assert "LIMIT %(top_queries)s" in sql
+        # json_agg does not keep the subquery order unless told to
+        assert "ORDER BY q.count DESC, q.last_searched DESC" in sql
+        assert params == {"user_id": 1, "top_queries": 3, "days": 7}
+        assert stats["avg_results"] == 3.0
+        assert stats["top_queries"] == [{"query": "dragon", "count": 2}]
+
+    def test_create_many_single_copy(self):
+        """Batches are written with one binary COPY and one commit"""
+        # GIVEN
+        searches = [
+            HistoricalSearch(id=None, user_id=1, query_text=f"q{i}", result_count=i)
+            for i in range(3)
+        ]
+        self.mock_cursor.copy_expert.side_effect = lambda sql, stream: stream.read()
+
+        # WHEN
+        written = HistoricalDao().create_many(searches)
+
+        # THEN
+        assert written == 3
+        self.mock_cursor.copy_expert.assert_called_once()
+        assert "FORMAT binary" in self.mock_cursor.copy_expert.call_args[0][0]
+        self.mock_connection.commit.assert_called_once()
+
+    def test_create_many_empty(self):
+        # WHEN / THEN
+        assert HistoricalDao().create_many([]) == 0
+        self.mock_cursor.copy_expert.assert_not_called()
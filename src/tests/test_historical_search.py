@@ -71,3 +71,18 @@ class TestHistoricalSearch:
         assert search.created_at == created
         assert search.user_id == user_id
         assert search.query_text == query_text
+
+    def test_embedding_dimensions_without_the_vector(self):
+        # GIVEN / WHEN: read back from the database, without the vector
+        stored = HistoricalSearch(
+            id=1, user_id=7, query_text="goblin", embedding_dimensions=1024
+        )
+        computed = HistoricalSearch(
+            id=2, user_id=7, query_text="goblin", query_embedding=[0.1, 0.2]
+        )
+        missing = HistoricalSearch(id=3, user_id=7, query_text="goblin")
+
+        # THEN
+        assert stored.has_embedding and stored.embedding_dimensions == 1024
+        assert computed.embedding_dimensions == 2
+        assert not missing.has_embedding
@@ -130,3 +130,151 @@ def test_get_stats(historical_service):
     # THEN
     historical_service.dao.get_user_search_stats.assert_called_once_with(user_id)
     assert stats["total_searches"] == 3
+
+
+# ----- KEYSET PAGINATION (real HistoricalService) -----
+from datetime import datetime, timedelta
+
+from business_object.historical_search import HistoricalSearch as Search
+from service.historical_service import (
+    HistoricalService,
+    decode_history_cursor,
+    encode_history_cursor,
+)
+
+
+def make_searches(count):
+    start = datetime(2025, 1, 1, 12, 0, 0, 123456)
+    return [
+        Search(
+            id=100 - i,
+            user_id=1,
+            query_text=f"query {i}",
+            created_at=start - timedelta(minutes=i),
+        )
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def real_service():
+    with patch("service.historical_service.HistoricalDao"):
+        service = HistoricalService()
+    return service
+
+
+def test_history_cursor_round_trip():
+    # GIVEN
+    search = make_searches(1)[0]
+
+    # WHEN
+    cursor = encode_history_cursor(search)
+
+    # THEN
+    assert decode_history_cursor(cursor) == (search.created_at, search.id)
+
+
+def test_history_cursor_invalid():
+    # WHEN / THEN
+    with pytest.raises(ValueError):
+        decode_history_cursor("not-a-cursor")
+
+
+def test_get_history_page_first_page(real_service):
+    # GIVEN: one more row than the page size means another page follows
+    searches = make_searches(3)
+    real_service.dao.find_page_by_user_id.return_value = searches
+
+    # WHEN
+    page = real_service.get_history_page(1, per_page=2)
+
+    # THEN
+    real_service.dao.find_page_by_user_id.assert_called_once_with(1, 3, None)
+    real_service.dao.count_by_user_id.assert_not_called()
+    assert page["searches"] == searches[:2]
+    assert page["has_next"] is True
+    assert page["total"] is None
+    assert decode_history_cursor(page["next_cursor"]) == (
+        searches[1].created_at,
+        searches[1].id,
+    )
+
+
+def test_get_history_page_last_page_with_total(real_service):
+    # GIVEN
+    searches = make_searches(2)
+    cursor = encode_history_cursor(make_searches(5)[-1])
+    real_service.dao.find_page_by_user_id.return_value = searches
+    real_service.dao.count_by_user_id.return_value = 7
+
+    # WHEN
+    page = real_service.get_history_page(1, 2, cursor, include_total=True)
+
+    # THEN
+    after = real_service.dao.find_page_by_user_id.call_args[0][2]
+    assert after == decode_history_cursor(cursor)
+    assert page["has_next"] is False
+    assert page["next_cursor"] is None
+    assert page["total"] == 7
+
+
+@pytest.fixture
+def stats_service(real_service):
+    from service import historical_service
+
+    historical_service._stats_cache.invalidate()
+    real_service.dao.get_stats_by_user_id.return_value = {
+        "total_searches": 4,
+        "total_results": 12,
+        "avg_results": 3.0,
+        "max_results": 8,
+        "zero_result_searches": 1,
+        "most_recent": datetime(2025, 1, 2),
+        "oldest": datetime(2025, 1, 1),
+        "top_queries": [],
+        "searches_per_day": [],
+    }
+    yield real_service
+    historical_service._stats_cache.invalidate()
+
+
+def test_get_stats_from_the_database(stats_service):
+    # WHEN
+    stats = stats_service.get_stats(1)
+
+    # THEN
+    stats_service.dao.get_stats_by_user_id.assert_called_once_with(1)
+    stats_service.dao.find_by_user_id.assert_not_called()
+    assert stats["zero_result_rate"] == 0.25
+
+
+def test_get_stats_cached_until_a_search_is_added(stats_service):
+    # GIVEN
+    stats_service.get_stats(1)
+    stats_service.get_stats(1)
+    assert stats_service.dao.get_stats_by_user_id.call_count == 1
+
+    # WHEN
+    stats_service.add_search(1, "goblin", result_count=3)
+    stats_service.get_stats(1)
+
+    # THEN
+    assert stats_service.dao.get_stats_by_user_id.call_count == 2
+
+
+def test_get_stats_cache_is_per_user(stats_service):
+    # GIVEN
+    stats_service.get_stats(1)
+    stats_service.get_stats(2)
+
+    # WHEN: user 2 clears their history
+    stats_service.clear_user_history(2)
+    stats_service.get_stats(1)
+    stats_service.get_stats(2)
+
+    # THEN: only user 2 is read again
+    assert [c.args[0] for c in stats_service.dao.get_stats_by_user_id.mock_calls] == [
+        1,
+        2,
+        2,
+    ]
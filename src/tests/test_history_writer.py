@@ -0,0 +1,136 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+from business_object.historical_search import HistoricalSearch
+from service.history_writer import HistoryWriter
+
+
+def make_search(user_id=1, text="dragon"):
+    return HistoricalSearch(id=None, user_id=user_id, query_text=text, result_count=5)
+
+
+def make_writer(**kwargs):
+    service = MagicMock()
+    service.add_searches.side_effect = lambda searches: len(searches)
+    return HistoryWriter(service=service, **kwargs), service
+
+
+def written(service):
+    return [s for call in service.add_searches.call_args_list for s in call.args[0]]
+
+
+def test_full_batch_written_without_waiting():
+    # GIVEN: a flush interval far longer than the test
+    writer, service = make_writer(batch_size=3, max_wait_ms=60_000)
+    searches = [make_search(text=f"q{i}") for i in range(3)]
+
+    # WHEN
+    for search in searches:
+        assert writer.enqueue(search)
+    deadline = time.monotonic() + 5
+    while writer.stats()["written"] < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    # THEN: one write with the three searches
+    service.add_searches.assert_called_once_with(searches)
+    writer.close()
+
+
+def test_partial_batch_written_after_max_wait():
+    # GIVEN
+    writer, service = make_writer(batch_size=100, max_wait_ms=20)
+
+    # WHEN
+    writer.enqueue(make_search())
+    deadline = time.monotonic() + 5
+    while not service.add_searches.called and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    # THEN
+    assert len(written(service)) == 1
+    writer.close()
+
+
+def test_flush_writes_queued_searches():
+    # GIVEN
+    writer, service = make_writer(batch_size=100, max_wait_ms=60_000)
+    for i in range(5):
+        writer.enqueue(make_search(text=f"q{i}"))
+
+    # WHEN
+    assert writer.flush(timeout=5)
+
+    # THEN
+    assert [s.query_text for s in written(service)] == [f"q{i}" for i in range(5)]
+    assert writer.stats()["pending"] == 0
+    writer.close()
+
+
+def test_close_writes_queued_searches():
+    # GIVEN
+    writer, service = make_writer(batch_size=2, max_wait_ms=60_000)
+    for i in range(5):
+        writer.enqueue(make_search(text=f"q{i}"))
+
+    # WHEN
+    writer.close(timeout=5)
+
+    # THEN
+    assert len(written(service)) == 5
+    assert writer.stats()["written"] == 5
+
+
+def test_full_queue_drops_new_searches():
+    # GIVEN: the worker is stuck on a slow write
+    release = threading.Event()
+    service = MagicMock()
+    service.add_searches.side_effect = lambda searches: release.wait(5) and 0
+    writer = HistoryWriter(service=service, batch_size=1, max_pending=2)
+    writer.enqueue(make_search())
+    deadline = time.monotonic() + 5
+    while writer.stats()["pending"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    # WHEN
+    accepted = [writer.enqueue(make_search()) for _ in range(3)]
+
+    # THEN: enqueue never blocks, the overflow is counted
+    assert accepted == [True, True, False]
+    assert writer.stats()["dropped"] == 1
+    release.set()
+    writer.close(timeout=5)
+
+
+def test_failed_batch_does_not_stop_the_writer():
+    # GIVEN
+    writer, service = make_writer(batch_size=1)
+    service.add_searches.side_effect = [Exception("db down"), 1]
+
+    # WHEN
+    writer.enqueue(make_search(text="lost"))
+    writer.enqueue(make_search(text="kept"))
+    assert writer.flush(timeout=5)
+
+    # THEN
+    stats = writer.stats()
+    assert stats["failed"] == 1
+    assert stats["written"] == 1
+    writer.close()
+
+
+def test_semantic_search_history_is_queued():
+    # GIVEN
+    from service.card_service import CardService
+
+    with patch("service.card_service.get_history_writer") as get_writer:
+        # WHEN
+        CardService()._save_to_history(7, "flying dragon", 3)
+
+    # THEN: nothing is written on the request path
+    search = get_writer.return_value.enqueue.call_args.args[0]
+    assert (search.user_id, search.query_text, search.result_count) == (
+        7,
+        "flying dragon",
+        3,
+    )
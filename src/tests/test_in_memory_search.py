@@ -0,0 +1,182 @@
+import math
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+np = pytest.importorskip("numpy")
+
+from technical_components.search import in_memory_search  # noqa: E402
+from technical_components.search.in_memory_search import (  # noqa: E402
+    InMemorySearchEngine,
+    parse_vector,
+)
+
+
+@pytest.fixture
+def engine():
+    vectors = [[1.0, 0.0], [0.0, 2.0], [3.0, 3.0]]
+    return InMemorySearchEngine(
+        [10, 20, 30], vectors, names=["Ten", "Twenty", "Thirty"], texts=["a", "b", "c"]
+    )
+
+
+def test_search_cosine(engine):
+    # WHEN
+    results = engine.search([1.0, 1.0], top_k=2, distance="cosine")
+
+    # THEN: same direction first, scores are cosine similarities
+    assert [card.id for card, _ in results] == [30, 10]
+    assert math.isclose(results[0][1], 1.0, rel_tol=1e-6)
+    assert results[0][0].name == "Thirty"
+
+
+def test_search_l2_matches_pgvector_score(engine):
+    # WHEN
+    results = engine.search([0.0, 1.0], top_k=3, distance="L2")
+
+    # THEN: score is 1 / (1 + euclidean distance), best first
+    assert [card.id for card, _ in results] == [20, 10, 30]
+    assert math.isclose(results[0][1], 0.5, rel_tol=1e-6)
+    assert math.isclose(results[1][1], 1 / (1 + math.sqrt(2)), rel_tol=1e-6)
+
+
+def test_search_inner_product(engine):
+    # WHEN
+    results = engine.search([1.0, 0.0], top_k=3, distance="inner_product")
+
+    # THEN: raw dot products, largest first
+    assert [card.id for card, _ in results] == [30, 10, 20]
+    assert math.isclose(results[0][1], 3.0, rel_tol=1e-6)
+    assert math.isclose(results[2][1], 0.0, abs_tol=1e-6)
+
+
+def test_search_excludes_cards(engine):
+    # WHEN
+    results = engine.search([1.0, 1.0], top_k=3, distance="cosine", exclude_ids=[30])
+
+    # THEN: the next cards fill the top-k, unknown ids are ignored
+    assert sorted(card.id for card, _ in results) == [10, 20]
+    assert engine.search([1.0, 0.0], exclude_ids=[10, 20, 30, 99]) == []
+
+
+def test_search_batch_matches_single_queries(engine):
+    # GIVEN
+    queries = [[1.0, 0.1], [0.2, 1.0]]
+
+    # WHEN
+    batch = engine.search_batch(queries, top_k=2, distance="L2")
+
+    # THEN
+    for query, results in zip(queries, batch):
+        single = engine.search(query, top_k=2, distance="L2")
+        assert [c.id for c, _ in results] == [c.id for c, _ in single]
+
+
+def test_search_top_k_larger_than_index(engine):
+    assert len(engine.search([1.0, 0.0], top_k=50)) == 3
+
+
+def test_search_invalid_arguments(engine):
+    with pytest.raises(ValueError):
+        engine.search([1.0, 0.0], distance="manhattan")
+    with pytest.raises(ValueError):
+        engine.search([1.0, 0.0, 0.0])
+
+
+def test_upsert_and_remove(engine):
+    # WHEN
+    engine.upsert(40, [0.0, -1.0], name="Forty")
+    engine.upsert(10, [0.0, -5.0])
+    engine.upsert(20, name="Renamed")
+    assert engine.remove(30)
+
+    # THEN
+    results = engine.search([0.0, -1.0], top_k=3, distance="cosine")
+    assert [card.id for card, _ in results][:2] in ([40, 10], [10, 40])
+    assert len(engine) == 3
+    assert results[-1][0].name == "Renamed"
+    assert not engine.remove(999)
+
+
+def test_upsert_many_swaps_state_once(engine):
+    # GIVEN
+    before = engine._state
+
+    # WHEN: one update, two additions, a duplicate id (last wins)
+    engine.upsert_many(
+        [10, 40, 50, 40],
+        [[0.0, 4.0], [9.0, 9.0], [-1.0, 0.0], [-2.0, -2.0]],
+        texts=["new a", None, "e", "d"],
+    )
+
+    # THEN: untouched rows are copied as they were
+    state = engine._state
+    assert state is not before
+    assert len(engine) == 5
+    assert state.ids.tolist() == [10, 20, 30, 40, 50]
+    np.testing.assert_allclose(state.unit[1], before.unit[1])
+    np.testing.assert_allclose(state.unit[0], [0.0, 1.0])
+    assert math.isclose(state.norms[0], 4.0)
+    assert state.texts == ["new a", "b", "c", "d", "e"]
+    results = engine.search([-1.0, -1.0], top_k=1, distance="cosine")
+    assert results[0][0].id == 40
+    # The previous snapshot is left intact for searches still reading it
+    np.testing.assert_allclose(before.unit[0], [1.0, 0.0])
+
+
+def test_upsert_many_invalid_shape(engine):
+    with pytest.raises(ValueError):
+        engine.upsert_many([1, 2], [[1.0, 0.0]])
+
+
+def test_from_dao_parses_pgvector_text():
+    # GIVEN
+    dao = MagicMock()
+    dao.iter_embeddings.return_value = iter(
+        [
+            [
+                {
+                    "id": 1,
+                    "name": "Opt",
+                    "text": "Scry 1.",
+                    "embedding_of_text": "[0.5,0.5]",
+                }
+            ]
+        ]
+    )
+
+    # WHEN
+    engine = InMemorySearchEngine.from_dao(dao)
+
+    # THEN
+    assert len(engine) == 1
+    assert engine.search([1.0, 1.0], top_k=1)[0][0].name == "Opt"
+
+
+def test_refresh_search_engine_reloads_on_watermark_change(engine, monkeypatch):
+    # GIVEN: the engine of this worker was loaded from an older state
+    engine.watermark = {"count": 3, "max_id": 30, "checksum": "a"}
+    monkeypatch.setattr(in_memory_search, "_engine", engine)
+    fresh = InMemorySearchEngine([40], [[1.0, 1.0]], names=["Forty"])
+
+    with patch.object(in_memory_search, "CardDao") as card_dao, patch.object(
+        in_memory_search, "_load_engine", return_value=fresh
+    ) as load:
+        # WHEN: unchanged, then re-embedded by another worker
+        card_dao.return_value.embedding_watermark.return_value = engine.watermark
+        unchanged = in_memory_search.refresh_search_engine()
+        card_dao.return_value.embedding_watermark.return_value = {
+            "count": 1,
+            "max_id": 40,
+            "checksum": "b",
+        }
+        reloaded = in_memory_search.refresh_search_engine()
+
+    # THEN
+    assert unchanged is False and reloaded is True
+    load.assert_called_once()
+    assert in_memory_search.loaded_search_engine() is fresh
+
+
+def test_parse_vector():
+    assert parse_vector("[1,2.5]").tolist() == [1.0, 2.5]
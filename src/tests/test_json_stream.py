@@ -0,0 +1,35 @@
+import io
+import json
+
+import pytest
+
+from utils.json_stream import iter_object_items
+
+
+def test_iter_object_items_small_chunks():
+    # GIVEN: chunks smaller than a value, with multi-byte characters
+    document = {
+        "meta": {"version": "5.2.2"},
+        "data": {
+            "Æther Vial": [{"name": "Æther Vial", "manaValue": 1.0}],
+            "Opt": [{"name": "Opt", "edhrecRank": 123456}],
+        },
+    }
+    stream = io.BytesIO(json.dumps(document, ensure_ascii=False).encode("utf-8"))
+
+    # WHEN
+    items = list(iter_object_items(stream, "data", chunk_size=3))
+
+    # THEN
+    assert items == list(document["data"].items())
+
+
+def test_iter_object_items_missing_key():
+    stream = io.BytesIO(b'{"meta": {}}')
+    assert list(iter_object_items(stream, "data")) == []
+
+
+def test_iter_object_items_truncated_document():
+    stream = io.BytesIO(b'{"data": {"Opt": [{"name": "Op')
+    with pytest.raises(ValueError):
+        list(iter_object_items(stream, "data", chunk_size=4))
@@ -0,0 +1,130 @@
+import pytest
+from unittest.mock import MagicMock, patch
+
+from technical_components.search import name_index
+from technical_components.search.name_index import NameIndex, normalize
+
+
+@pytest.fixture
+def index():
+    return NameIndex(
+        [
+            (1, "Lightning Bolt"),
+            (2, "Lightning Helix"),
+            (3, "Bolt of Lightning"),
+            (4, "Æther Vial"),
+            (5, "Séance"),
+        ]
+    )
+
+
+def test_normalize():
+    assert normalize("Séance") == "seance"
+    assert normalize("Æther") == "æther"
+
+
+def test_suggest_full_names_before_later_words(index):
+    # WHEN
+    suggestions = index.suggest("bolt")
+
+    # THEN
+    assert suggestions == [(3, "Bolt of Lightning"), (1, "Lightning Bolt")]
+
+
+def test_suggest_is_case_and_accent_insensitive(index):
+    assert index.suggest("SEA") == [(5, "Séance")]
+    assert index.suggest("LIGHTNING ") == [
+        (1, "Lightning Bolt"),
+        (2, "Lightning Helix"),
+    ]
+
+
+def test_suggest_limit(index):
+    assert len(index.suggest("light", limit=1)) == 1
+    assert index.suggest("", limit=5) == []
+
+
+def test_fuzzy_fallback(index):
+    # WHEN: a typo, no name starts with the prefix
+    suggestions = index.suggest("lightnig h")
+
+    # THEN: the closest names come first
+    assert suggestions[0] == (2, "Lightning Helix")
+    assert index.suggest("lightnig h", fuzzy=False) == []
+
+
+def test_add_rename_and_remove(index):
+    # WHEN
+    index.add(6, "Boltwave")
+    index.add(1, "Chain Lightning")
+
+    # THEN
+    assert index.suggest("bolt") == [(3, "Bolt of Lightning"), (6, "Boltwave")]
+    assert index.suggest("chain") == [(1, "Chain Lightning")]
+
+    # WHEN
+    assert index.remove(3) is True
+    assert index.remove(99) is False
+
+    # THEN
+    assert index.suggest("bolt") == [(6, "Boltwave")]
+    assert len(index) == 5
+
+
+def test_incremental_updates_match_a_rebuild(index):
+    # GIVEN
+    index.add(7, "Lightning Axe")
+    index.remove(2)
+
+    # WHEN
+    rebuilt = NameIndex(index._state.names.items())
+
+    # THEN
+    assert index._state == rebuilt._state
+
+
+def test_stats_report_latency(index):
+    # GIVEN
+    index.suggest("light")
+
+    # WHEN
+    stats = index.stats()
+
+    # THEN
+    assert stats["cards"] == 5
+    assert stats["p99_ms"] is not None
+    assert "within_target" in stats
+
+
+def test_from_dao():
+    # GIVEN
+    dao = MagicMock()
+    dao.list_names.return_value = [(1, "Opt")]
+
+    # WHEN
+    index = NameIndex.from_dao(dao)
+
+    # THEN
+    assert index.suggest("op") == [(1, "Opt")]
+    assert index.watermark is dao.names_watermark.return_value
+
+
+def test_refresh_name_index_reloads_on_watermark_change(monkeypatch):
+    # GIVEN: the index of this worker was built from an older state
+    stale = NameIndex([(1, "Opt")])
+    stale.watermark = {"count": 1, "max_id": 1, "checksum": "a"}
+    monkeypatch.setattr(name_index, "_index", stale)
+
+    with patch.object(name_index, "CardDao") as card_dao:
+        dao = card_dao.return_value
+        dao.list_names.return_value = [(1, "Opt"), (2, "Shock")]
+
+        # WHEN: unchanged, then renamed / created by another worker
+        dao.names_watermark.return_value = stale.watermark
+        unchanged = name_index.refresh_name_index()
+        dao.names_watermark.return_value = {"count": 2, "max_id": 2, "checksum": "b"}
+        reloaded = name_index.refresh_name_index()
+
+    # THEN
+    assert unchanged is False and reloaded is True
+    assert name_index.loaded_name_index().suggest("sho") == [(2, "Shock")]
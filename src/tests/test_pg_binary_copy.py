@@ -0,0 +1,94 @@
+import struct
+from datetime import datetime
+
+from utils.pg_binary_copy import (
+    COPY_HEADER,
+    COPY_TRAILER,
+    BinaryCopyStream,
+    encode_array,
+    encode_jsonb,
+    encode_row,
+    encode_timestamp,
+    encode_vector,
+)
+
+
+def test_encode_vector():
+    # WHEN
+    data = encode_vector([1.0, -0.5])
+
+    # THEN: int16 dimension, int16 unused, big-endian float4 values
+    assert data == struct.pack("!hhff", 2, 0, 1.0, -0.5)
+
+
+def test_encode_text_array():
+    # WHEN
+    data = encode_array(["W", "U"], "text[]")
+
+    # THEN: ndim, has nulls, element oid, length, lower bound, elements
+    assert data == (
+        struct.pack("!iiiii", 1, 0, 25, 2, 1)
+        + struct.pack("!i", 1)
+        + b"W"
+        + struct.pack("!i", 1)
+        + b"U"
+    )
+
+
+def test_encode_empty_array():
+    assert encode_array([], "int[]") == struct.pack("!iii", 0, 0, 23)
+
+
+def test_encode_timestamp():
+    # WHEN
+    data = encode_timestamp(datetime(2000, 1, 2, 0, 0, 1, 5))
+
+    # THEN: big-endian int64 microseconds since 2000-01-01
+    assert data == struct.pack("!q", 86_400_000_000 + 1_000_005)
+
+
+def test_encode_timestamp_before_epoch():
+    assert encode_timestamp(datetime(1999, 12, 31, 23, 59, 59)) == struct.pack(
+        "!q", -1_000_000
+    )
+
+
+def test_encode_jsonb():
+    assert encode_jsonb({"modern": "Légal"}) == b'\x01{"modern": "L\xc3\xa9gal"}'
+
+
+def test_encode_row_with_null():
+    # WHEN
+    data = encode_row(["Opt", None, 1], ["text", "float", "float"])
+
+    # THEN
+    assert data == (
+        struct.pack("!h", 3)
+        + struct.pack("!i", 3)
+        + b"Opt"
+        + struct.pack("!i", -1)
+        + struct.pack("!id", 8, 1.0)
+    )
+
+
+def test_stream_reads_header_rows_and_trailer():
+    # GIVEN
+    rows = [["a"], ["bc"]]
+    stream = BinaryCopyStream(iter(rows), ["text"])
+
+    # WHEN: small reads, as copy_expert does with its buffer size
+    payload = b""
+    while True:
+        chunk = stream.read(5)
+        if not chunk:
+            break
+        payload += chunk
+
+    # THEN
+    assert payload == (
+        COPY_HEADER
+        + encode_row(["a"], ["text"])
+        + encode_row(["bc"], ["text"])
+        + COPY_TRAILER
+    )
+    assert stream.rows_written == 2
@@ -0,0 +1,111 @@
+from unittest.mock import MagicMock, patch
+
+from business_object.card import compute_text_hash
+from technical_components.embedding.reembedding_queue import ReembeddingQueue
+
+
+def fake_embed(texts):
+    return [[float(len(text))] for text in texts]
+
+
+def make_queue(texts, **kwargs):
+    dao = MagicMock()
+    dao.find_texts_by_ids.side_effect = lambda ids: [
+        (card_id, f"Card {card_id}", texts[card_id])
+        for card_id in sorted(ids)
+        if card_id in texts
+    ]
+    return ReembeddingQueue(dao=dao, embed=fake_embed, model="m1", **kwargs), dao
+
+
+def test_enqueue_reembeds_latest_text():
+    # GIVEN
+    texts = {1: "Flying", 2: "Trample"}
+    queue, dao = make_queue(texts)
+
+    # WHEN
+    queue.enqueue(1)
+    queue.enqueue(2)
+    assert queue.flush(timeout=5)
+
+    # THEN
+    rows = [
+        row for call in dao.update_embeddings.call_args_list for row in call.args[0]
+    ]
+    assert sorted(rows) == [
+        (1, [6.0], compute_text_hash("Flying")),
+        (2, [7.0], compute_text_hash("Trample")),
+    ]
+    assert dao.update_embeddings.call_args.kwargs["model"] == "m1"
+    assert queue.stats()["embedded"] == 2
+    queue.close()
+
+
+def test_batch_updates_in_memory_engine_once():
+    # GIVEN
+    texts = {1: "Flying", 2: "Trample"}
+    queue, dao = make_queue(texts)
+    engine = MagicMock()
+
+    # WHEN
+    with patch(
+        "technical_components.embedding.reembedding_queue.loaded_search_engine",
+        return_value=engine,
+    ):
+        with queue._cond:
+            queue.enqueue(1)
+            queue.enqueue(2)
+        assert queue.flush(timeout=5)
+
+    # THEN
+    engine.upsert_many.assert_called_once_with(
+        [1, 2],
+        [[6.0], [7.0]],
+        names=["Card 1", "Card 2"],
+        texts=["Flying", "Trample"],
+    )
+    engine.upsert.assert_not_called()
+    queue.close()
+
+
+def test_enqueue_same_card_twice_is_deduplicated():
+    # GIVEN: the worker is held until both ids are queued
+    texts = {7: "Haste"}
+    queue, dao = make_queue(texts)
+    with queue._cond:
+        queue.enqueue(7)
+        queue.enqueue(7)
+        # THEN
+        assert queue._pending == [7]
+
+    assert queue.flush(timeout=5)
+    queue.close()
+
+
+def test_failed_batch_is_counted_and_worker_keeps_running():
+    # GIVEN
+    texts = {1: "Flying", 2: "Trample"}
+    queue, dao = make_queue(texts, batch_size=1)
+    dao.update_embeddings.side_effect = [Exception("DB down"), 1]
+
+    # WHEN
+    queue.enqueue(1)
+    assert queue.flush(timeout=5)
+    queue.enqueue(2)
+    assert queue.flush(timeout=5)
+
+    # THEN
+    assert queue.stats() == {"pending": 0, "embedded": 1, "failed": 1}
+    queue.close()
+
+
+def test_close_processes_pending_cards():
+    # GIVEN
+    queue, dao = make_queue({5: "Deathtouch"})
+    queue.enqueue(5)
+
+    # WHEN
+    queue.close(timeout=5)
+
+    # THEN
+    assert dao.update_embeddings.called
@@ -0,0 +1,58 @@
+import threading
+
+import pytest
+from unittest.mock import patch
+
+from technical_components.search import refresher
+from technical_components.search.refresher import Refresher, start_refresher
+
+
+def test_refresher_counts_checks_reloads_and_errors():
+    # GIVEN: a reload, then a failing check, then nothing to do
+    results = iter([True, RuntimeError("database down"), False])
+    done = threading.Event()
+
+    def refresh():
+        result = next(results, False)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def counted():
+        try:
+            return refresh()
+        finally:
+            if runner.checks >= 2:
+                done.set()
+
+    # WHEN
+    runner = Refresher("test-refresh", counted, interval=0.01)
+    assert done.wait(5)
+    runner.stop(timeout=5)
+
+    # THEN: an error keeps the thread alive
+    assert runner.reloads == 1
+    assert runner.errors == 1
+    assert runner.checks >= 3
+
+
+def test_start_refresher_disabled_by_zero_interval():
+    with patch.dict("os.environ", {"SEARCH_REFRESH_INTERVAL": "0"}):
+        assert start_refresher("test-refresh", lambda: False) is None
+
+
+def test_stop_refreshers():
+    # GIVEN
+    with patch.dict("os.environ", {"SEARCH_REFRESH_INTERVAL": "60"}):
+        runner = start_refresher("test-refresh", lambda: False)
+
+    # WHEN
+    refresher.stop_refreshers(timeout=5)
+
+    # THEN
+    assert not runner._thread.is_alive()
+
+
+def test_invalid_interval():
+    with pytest.raises(ValueError):
+        Refresher("test-refresh", lambda: False, interval=0)
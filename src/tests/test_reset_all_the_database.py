@@ -0,0 +1,65 @@
+import io
+import json
+
+from unittest.mock import MagicMock, patch
+
+from business_object.card import compute_text_hash
+from utils.reset_all_the_database import CARD_COLUMNS, ResetDatabase
+from utils.pg_binary_copy import COPY_HEADER
+
+
+def test_card_to_row_with_embedding():
+    # GIVEN
+    card = {
+        "name": "Opt",
+        "text": "Scry 1. Draw a card.",
+        "manaValue": 1,
+        "colors": ["U"],
+        "embedding_of_text": [0.1, 0.2],
+    }
+
+    # WHEN
+    row = ResetDatabase().card_to_row(card, embedding_model="bge-m3:latest")
+
+    # THEN
+    assert len(row) == len(CARD_COLUMNS) + 3
+    assert row[0] == "Opt"
+    assert row[-3:] == [[0.1, 0.2], compute_text_hash(card["text"]), "bge-m3:latest"]
+
+
+def test_card_to_row_without_embeddings():
+    row = ResetDatabase().card_to_row({"name": "Forest"}, with_embeddings=False)
+    assert len(row) == len(CARD_COLUMNS)
+
+
+def test_iter_cards_keeps_first_version():
+    # GIVEN
+    document = {"data": {"Opt": [{"name": "Opt", "side": "a"}, {"name": "Opt"}]}}
+    stream = io.BytesIO(json.dumps(document).encode("utf-8"))
+
+    # WHEN / THEN
+    assert list(ResetDatabase().iter_cards(stream)) == [{"name": "Opt", "side": "a"}]
+
+
+def test_copy_cards_commits_each_chunk():
+    # GIVEN
+    payloads = []
+    connection = MagicMock()
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.copy_expert.side_effect = lambda sql, stream: payloads.append(stream.read())
+    db = MagicMock()
+    db.connection.__enter__.return_value = connection
+    cards = ({"name": f"Card {i}"} for i in range(5))
+
+    # WHEN
+    with patch("utils.reset_all_the_database.DBConnection", return_value=db):
+        inserted = ResetDatabase().copy_cards(
+            cards, with_embeddings=False, chunk_size=2
+        )
+
+    # THEN
+    assert inserted == 5
+    assert len(payloads) == 3
+    assert all(payload.startswith(COPY_HEADER) for payload in payloads)
+    assert connection.commit.call_count == 3
+    assert "FORMAT binary" in cursor.copy_expert.call_args.args[0]
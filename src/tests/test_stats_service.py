@@ -0,0 +1,111 @@
+import pytest
+from unittest.mock import Mock, MagicMock, patch
+
+from dao.stats_dao import StatsDao
+from service.stats_service import StatsService
+
+
+@pytest.fixture
+def mock_cursor():
+    with patch("dao.stats_dao.DBConnection") as mock_db_connection:
+        connection = MagicMock()
+        cursor = MagicMock()
+        connection.__enter__ = Mock(return_value=connection)
+        connection.__exit__ = Mock(return_value=None)
+        connection.cursor.return_value.__enter__ = Mock(return_value=cursor)
+        connection.cursor.return_value.__exit__ = Mock(return_value=None)
+        mock_db_connection.return_value.connection = connection
+        yield cursor
+
+
+@pytest.fixture
+def counts():
+    return {
+        "users_by_type": {"client": 3, "admin": 1},
+        "active_users": 3,
+        "total_users": 4,
+        "total_searches": 42,
+    }
+
+
+def test_global_stats_single_grouped_query(mock_cursor):
+    # GIVEN
+    mock_cursor.fetchall.return_value = [
+        {"user_type": "client", "total": 3, "active": 2, "total_searches": 42},
+        {"user_type": "admin", "total": 1, "active": 1, "total_searches": 42},
+    ]
+
+    # WHEN
+    stats = StatsDao().global_stats()
+
+    # THEN
+    mock_cursor.execute.assert_called_once()
+    sql = mock_cursor.execute.call_args[0][0]
+    assert "GROUP BY user_type" in sql
+    assert "password_hash" not in sql
+    assert stats == {
+        "users_by_type": {"client": 3, "admin": 1},
+        "active_users": 3,
+        "total_users": 4,
+        "total_searches": 42,
+    }
+
+
+def test_global_stats_without_users(mock_cursor):
+    # GIVEN
+    mock_cursor.fetchall.return_value = []
+
+    # WHEN
+    stats = StatsDao().global_stats()
+
+    # THEN
+    assert stats["total_users"] == 0
+    assert stats["total_searches"] == 0
+
+
+def test_get_global_stats_fills_every_type(counts):
+    # GIVEN
+    service = StatsService(cache_ttl=60)
+    service.dao = MagicMock()
+    service.dao.global_stats.return_value = counts
+
+    # WHEN
+    stats = service.get_global_stats()
+
+    # THEN
+    assert stats["users"] == {
+        "total": 4,
+        "active": 3,
+        "by_type": {"client": 3, "game_designer": 0, "admin": 1},
+    }
+    assert stats["searches"] == {"total": 42}
+
+
+def test_get_global_stats_cached(counts):
+    # GIVEN
+    service = StatsService(cache_ttl=60)
+    service.dao = MagicMock()
+    service.dao.global_stats.return_value = counts
+
+    # WHEN
+    first = service.get_global_stats()
+    second = service.get_global_stats()
+    service.get_global_stats(refresh=True)
+
+    # THEN: the second call is served from the cache, refresh recomputes
+    assert second is first
+    assert service.dao.global_stats.call_count == 2
+
+
+def test_get_global_stats_cache_disabled(counts):
+    # GIVEN
+    service = StatsService(cache_ttl=0)
+    service.dao = MagicMock()
+    service.dao.global_stats.return_value = counts
+
+    # WHEN
+    service.get_global_stats()
+    service.get_global_stats()
+
+    # THEN
+    assert service.dao.global_stats.call_count == 2
@@ -0,0 +1,85 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from utils.vector_codec import (
+    Vector,
+    decode_vector,
+    decode_vector_binary,
+    encode_vector,
+    register_vector,
+    to_vector_literal,
+)
+
+
+def test_literal_round_trip():
+    # GIVEN
+    values = [0.1, -2.5, 1e-7]
+
+    # WHEN
+    decoded = decode_vector(to_vector_literal(values))
+
+    # THEN: float32 precision is kept
+    assert list(decoded) == pytest.approx(values, rel=1e-6)
+
+
+def test_literal_is_compact():
+    assert to_vector_literal([1, 0.5]) == "[1,0.5]"
+
+
+def test_decode_null():
+    assert decode_vector(None) is None
+    assert decode_vector_binary(None) is None
+
+
+def test_binary_round_trip():
+    # GIVEN: vector_send output has the same layout as the COPY encoding
+    data = encode_vector([1.0, -0.5, 0.25])
+
+    # WHEN
+    decoded = decode_vector_binary(memoryview(data))
+
+    # THEN
+    assert list(decoded) == [1.0, -0.5, 0.25]
+
+
+def test_vector_is_quoted_as_literal():
+    assert Vector([1, 2]).getquoted() == b"'[1,2]'::vector"
+
+
+def test_numpy_array_is_adapted_as_vector():
+    # GIVEN
+    np = pytest.importorskip("numpy")
+    from psycopg2.extensions import adapt
+
+    # WHEN
+    quoted = adapt(np.array([0.5, 1.5], dtype=np.float32)).getquoted()
+
+    # THEN
+    assert quoted == b"'[0.5,1.5]'::vector"
+
+
+def test_register_vector():
+    # GIVEN
+    connection = MagicMock()
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.fetchone.return_value = {"oid": 16390}
+
+    # WHEN
+    with patch("utils.vector_codec.psycopg2.extensions.register_type") as register:
+        registered = register_vector(connection)
+
+    # THEN
+    assert registered is True
+    register.assert_called_once()
+    connection.rollback.assert_called_once()
+
+
+def test_register_vector_without_extension():
+    # GIVEN
+    connection = MagicMock()
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.fetchone.return_value = {"oid": None}
+
+    # WHEN / THEN
+    assert register_vector(connection) is False
@@ -0,0 +1,121 @@
+import pytest
+from unittest.mock import MagicMock, patch
+
+import dao.vector_index_dao as vector_index_dao
+from dao.vector_index_dao import (
+    VectorIndexDao,
+    index_parameters,
+    supports_iterative_scan,
+    vector_search_settings,
+)
+
+
+def test_index_parameters_ivfflat_scale_with_rows():
+    assert index_parameters("ivfflat", 500) == {"lists": 1}
+    assert index_parameters("ivfflat", 32_000) == {"lists": 32}
+    assert index_parameters("ivfflat", 4_000_000) == {"lists": 2000}
+
+
+def test_index_parameters_hnsw_scale_with_rows():
+    assert index_parameters("hnsw", 32_000) == {"m": 16, "ef_construction": 64}
+    assert index_parameters("hnsw", 2_000_000)["m"] == 32
+
+
+def test_index_parameters_unknown_type():
+    with pytest.raises(ValueError):
+        index_parameters("annoy", 10)
+
+
+def test_vector_search_settings_ef_search_at_least_top_k():
+    # WHEN
+    settings = vector_search_settings(top_k=100, probes=5, ef_search=40)
+
+    # THEN
+    assert settings == {"ivfflat.probes": 5, "hnsw.ef_search": 100}
+
+
+def test_vector_search_settings_ef_search_capped():
+    # WHEN: many excluded cards on top of the requested results
+    settings = vector_search_settings(top_k=100 + 5000, ef_search=40)
+
+    # THEN
+    assert settings["hnsw.ef_search"] == 1000
+
+
+def test_vector_search_settings_from_environment():
+    env = {"VECTOR_SEARCH_PROBES": "20", "VECTOR_SEARCH_EF_SEARCH": "80"}
+    with patch.dict("os.environ", env):
+        assert vector_search_settings(top_k=5) == {
+            "ivfflat.probes": 20,
+            "hnsw.ef_search": 80,
+        }
+
+
+@pytest.mark.parametrize(
+    "extversion, expected", [("0.5.1", False), ("0.8.0", True), ("0.10.0", True)]
+)
+def test_supports_iterative_scan_reads_the_version_once(
+    monkeypatch, extversion, expected
+):
+    # GIVEN
+    monkeypatch.setattr(vector_index_dao, "_pgvector_version", None)
+    cursor = MagicMock()
+    cursor.fetchone.return_value = {"extversion": extversion}
+
+    # WHEN
+    first = supports_iterative_scan(cursor)
+    second = supports_iterative_scan(cursor)
+
+    # THEN
+    assert first is second is expected
+    cursor.execute.assert_called_once()
+
+
+def test_invalid_metric():
+    with pytest.raises(ValueError):
+        VectorIndexDao(index_type="hnsw", metrics=["manhattan"])
+
+
+def test_create_one_index_per_metric():
+    # GIVEN
+    connection = MagicMock()
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.fetchall.return_value = []
+    db = MagicMock()
+    db.connection.__enter__.return_value = connection
+    dao = VectorIndexDao(index_type="ivfflat", metrics=["L2", "cosine"])
+
+    # WHEN
+    with patch("dao.vector_index_dao.DBConnection", return_value=db):
+        created = dao.create(row_count=32_000)
+
+    # THEN: after the lookup of the existing indexes
+    assert created == ["cards_embedding_l2_idx", "cards_embedding_cosine_idx"]
+    statements = [call.args[0] for call in cursor.execute.call_args_list]
+    assert "pg_indexes" in statements[0]
+    assert "vector_l2_ops" in statements[1] and "lists = 32" in statements[1]
+    assert "vector_cosine_ops" in statements[2]
+    connection.commit.assert_called_once()
+
+
+def test_create_skips_existing_indexes():
+    # GIVEN
+    connection = MagicMock()
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.fetchall.return_value = [
+        {"indexname": "cards_pkey"},
+        {"indexname": "cards_embedding_l2_idx"},
+    ]
+    db = MagicMock()
+    db.connection.__enter__.return_value = connection
+    dao = VectorIndexDao(index_type="hnsw", metrics=["L2", "cosine"])
+
+    # WHEN
+    with patch("dao.vector_index_dao.DBConnection", return_value=db):
+        created = dao.create(row_count=32_000)
+
+    # THEN
+    assert created == ["cards_embedding_cosine_idx"]
+    statements = [call.args[0] for call in cursor.execute.call_args_list]
+    assert len(statements) == 2
+    assert "vector_cosine_ops" in statements[1]
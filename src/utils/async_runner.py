@@ -0,0 +1,47 @@
+"""
+Run blocking service calls from async FastAPI routes without stalling the event loop
+"""
+
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import dotenv
+
+dotenv.load_dotenv()
+
+# One worker per pooled database connection: more threads would only queue on
+# the pool, fewer would leave connections unused
+_max_workers = int(os.getenv("API_WORKER_THREADS", os.getenv("PGPOOL_MAX_SIZE", "10")))
+_executor = ThreadPoolExecutor(
+    max_workers=_max_workers, thread_name_prefix="magicsearch-io"
+)
+
+
+async def run_sync(func, *args, **kwargs):
+    """
+    Await a blocking function (DAO/service call, HTTP request) on the bounded
+    I/O thread pool
+
+    Parameters
+    ----------
+    func : callable
+        Synchronous function to run
+    *args, **kwargs
+        Arguments forwarded to func
+
+    Returns
+    -------
+    Any
+        Value returned by func (exceptions are re-raised in the caller)
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _executor, functools.partial(func, *args, **kwargs)
+    )
+
+
+def shutdown_executor(wait: bool = True) -> None:
+    """Stop the I/O thread pool (called when the API shuts down)"""
+    _executor.shutdown(wait=wait)
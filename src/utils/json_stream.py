@@ -0,0 +1,127 @@
+"""
+Incremental reading of large JSON documents
+"""
+
+import codecs
+import json
+from typing import BinaryIO, Iterator
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+class _Reader:
+    """Text buffer over a binary stream, refilled on demand"""
+
+    def __init__(self, stream: BinaryIO, chunk_size: int):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """Read one more chunk, False at the end of the stream"""
+        if self.eof:
+            return False
+        data = self.stream.read(self.chunk_size)
+        if not data:
+            self.eof = True
+            self.buffer = self.buffer[self.pos :] + self.utf8.decode(b"", final=True)
+            self.pos = 0
+            return False
+        self.buffer = self.buffer[self.pos :] + self.utf8.decode(data)
+        self.pos = 0
+        return True
+
+    def skip_whitespace(self) -> None:
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self.fill():
+                return
+
+    def expect(self, *chars: str) -> str:
+        self.skip_whitespace()
+        if self.pos >= len(self.buffer):
+            raise ValueError("Unexpected end of JSON document")
+        char = self.buffer[self.pos]
+        if char not in chars:
+            raise ValueError(f"Expected one of {chars!r} in JSON, found {char!r}")
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Decode the next JSON value, reading more input until it is complete"""
+        self.skip_whitespace()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            # A number may continue in the next chunk ("12" + "34")
+            if end == len(self.buffer) and not self.eof and self.fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_object_items(
+    stream: BinaryIO, key: str, chunk_size: int = 1 << 20
+) -> Iterator[tuple[str, object]]:
+    """
+    Yield the (name, value) pairs of one object of a JSON document, one by one
+
+    Only the member being decoded is held in memory, which keeps memory flat on
+    documents such as AtomicCards.json ({"meta": ..., "data": {name: [...]}}).
+    Uses `ijson` when it is installed, a pure Python reader otherwise.
+
+    Parameters
+    ----------
+    stream : BinaryIO
+        Binary file object holding a JSON object
+    key : str
+        Top-level key of the object to iterate over (e.g. "data")
+    chunk_size : int, optional
+        Number of bytes read at a time (default: 1 MiB)
+
+    Yields
+    ------
+    tuple[str, object]
+        Member name and decoded value
+    """
+    try:
+        import ijson
+    except ImportError:
+        ijson = None
+
+    if ijson is not None:
+        yield from ijson.kvitems(stream, key, use_float=True, buf_size=chunk_size)
+        return
+
+    reader = _Reader(stream, chunk_size)
+    reader.expect("{")
+    if reader.expect('"', "}") == "}":
+        return
+    reader.pos -= 1
+    while True:
+        name = reader.value()
+        reader.expect(":")
+        if name != key:
+            reader.value()
+        else:
+            reader.expect("{")
+            if reader.expect('"', "}") == '"':
+                reader.pos -= 1
+                while True:
+                    item_name = reader.value()
+                    reader.expect(":")
+                    yield item_name, reader.value()
+                    if reader.expect(",", "}") == "}":
+                        break
+            return
+        if reader.expect(",", "}") == "}":
+            return
@@ -0,0 +1,155 @@
+"""
+Encoding of rows for PostgreSQL `COPY ... FROM STDIN WITH (FORMAT binary)`
+
+Each value is written in the binary wire format of its column type, so the
+server does not parse any text: vectors are sent as float4 arrays, arrays and
+JSONB without quoting or escaping.
+"""
+
+import io
+import json
+import struct
+from datetime import datetime
+from typing import Iterable, Iterator
+
+from utils.vector_codec import encode_vector
+
+COPY_SIGNATURE = b"PGCOPY\n\xff\r\n\x00"
+COPY_HEADER = COPY_SIGNATURE + struct.pack("!ii", 0, 0)
+COPY_TRAILER = struct.pack("!h", -1)
+NULL_FIELD = struct.pack("!i", -1)
+
+# Origin of PostgreSQL timestamps in the binary format
+POSTGRES_EPOCH = datetime(2000, 1, 1)
+
+# Element type OIDs checked by the server when it receives an array
+ARRAY_ELEMENT_OIDS = {"text[]": 25, "int[]": 23}
+
+
+def encode_text(value) -> bytes:
+    return str(value).encode("utf-8")
+
+
+def encode_float(value) -> bytes:
+    return struct.pack("!d", float(value))
+
+
+def encode_int(value) -> bytes:
+    return struct.pack("!i", int(value))
+
+
+def encode_bool(value) -> bytes:
+    return b"\x01" if value else b"\x00"
+
+
+def encode_timestamp(value: datetime) -> bytes:
+    """`timestamp` (without time zone): int64 microseconds since 2000-01-01"""
+    delta = value - POSTGRES_EPOCH
+    micros = (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+    return struct.pack("!q", micros)
+
+
+def encode_jsonb(value) -> bytes:
+    # Version byte of the jsonb binary format, followed by the JSON text
+    return b"\x01" + json.dumps(value, ensure_ascii=False).encode("utf-8")
+
+
+def encode_array(values, element_type: str) -> bytes:
+    """One-dimensional array of `text` or `int` elements"""
+    oid = ARRAY_ELEMENT_OIDS[element_type]
+    if not values:
+        return struct.pack("!iii", 0, 0, oid)
+
+    encode_element = encode_int if element_type == "int[]" else encode_text
+    parts = [struct.pack("!iiiii", 1, int(None in values), oid, len(values), 1)]
+    for element in values:
+        if element is None:
+            parts.append(NULL_FIELD)
+        else:
+            data = encode_element(element)
+            parts.append(struct.pack("!i", len(data)))
+            parts.append(data)
+    return b"".join(parts)
+
+
+ENCODERS = {
+    "text": encode_text,
+    "float": encode_float,
+    "int": encode_int,
+    "bool": encode_bool,
+    "timestamp": encode_timestamp,
+    "jsonb": encode_jsonb,
+    "vector": encode_vector,
+    "text[]": lambda values: encode_array(values, "text[]"),
+    "int[]": lambda values: encode_array(values, "int[]"),
+}
+
+
+def encode_row(values: list, types: list[str]) -> bytes:
+    """
+    Encode one row (a tuple of fields) in the binary COPY format
+
+    Parameters
+    ----------
+    values : list
+        Python values, None for NULL
+    types : list[str]
+        Column types, keys of ENCODERS, in the same order as `values`
+
+    Returns
+    -------
+    bytes
+        The encoded tuple
+    """
+    parts = [struct.pack("!h", len(values))]
+    for value, pg_type in zip(values, types):
+        if value is None:
+            parts.append(NULL_FIELD)
+        else:
+            data = ENCODERS[pg_type](value)
+            parts.append(struct.pack("!i", len(data)))
+            parts.append(data)
+    return b"".join(parts)
+
+
+class BinaryCopyStream(io.RawIOBase):
+    """
+    Read-only file object producing a binary COPY payload from rows
+
+    Rows are encoded lazily, when `copy_expert` reads from the stream, so only
+    one row is held in memory at a time.
+    """
+
+    def __init__(self, rows: Iterable[list], types: list[str]):
+        """
+        Parameters
+        ----------
+        rows : iterable of list
+            Rows to send, each with one value per column
+        types : list[str]
+            Column types, keys of ENCODERS
+        """
+        self.rows_written = 0
+        self._chunks = self._generate(rows, types)
+        self._buffer = b""
+
+    def _generate(self, rows: Iterable[list], types: list[str]) -> Iterator[bytes]:
+        yield COPY_HEADER
+        for row in rows:
+            yield encode_row(row, types)
+            self.rows_written += 1
+        yield COPY_TRAILER
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._buffer:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._buffer = chunk
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
@@ -4,19 +4,92 @@ Two modes:
 1. Default: download from URL AtomicCardsWithEmbeddings.json (WITH embeddings)
 2. With parameter: download from URL AtomicCards.json (WITHOUT embeddings)
 
+The JSON is parsed incrementally and the cards are loaded with binary
+COPY ... FROM STDIN, committed in chunks, so memory stays flat whatever the
+size of the file.
+
 Usage:
     python reset_all_the_database.py                    # Default: with embeddings from URL
     python reset_all_the_database.py --no-embeddings    # From URL without embeddings
+    python reset_all_the_database.py --source data/AtomicCards.json --no-embeddings
 """
 
-import requests
 import argparse
+import itertools
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+import requests
+
+from business_object.card import compute_text_hash
 from utils.singleton import Singleton
-from utils.sql_helpers import sql_value_string
+from utils.json_stream import iter_object_items
+from utils.pg_binary_copy import BinaryCopyStream
 from dao.db_connection import DBConnection
+from dao.vector_index_dao import VectorIndexDao
 from utils.setup_pgvector import PgVectorSetup
+from technical_components.embedding.embedding_client import DEFAULT_MODEL
 import utils.init_users_tables
 
+URL_WITH_EMBEDDINGS = (
+    "https://minio.lab.sspcloud.fr/thomasfr/AtomicCardsWithEmbeddings.json"
+)
+URL_WITHOUT_EMBEDDINGS = "https://minio.lab.sspcloud.fr/thomasfr/AtomicCards.json"
+
+# Columns of project.cards filled from the JSON: (SQL column, JSON key, type)
+CARD_COLUMNS = [
+    ("name", "name", "text"),
+    ("ascii_name", "asciiName", "text"),
+    ("type", "type", "text"),
+    ("types", "types", "text[]"),
+    ("subtypes", "subtypes", "text[]"),
+    ("supertypes", "supertypes", "text[]"),
+    ("mana_cost", "manaCost", "text"),
+    ("mana_value", "manaValue", "float"),
+    ("converted_mana_cost", "convertedManaCost", "float"),
+    ("layout", "layout", "text"),
+    ("text", "text", "text"),
+    ("colors", "colors", "text[]"),
+    ("color_identity", "colorIdentity", "text[]"),
+    ("color_indicator", "colorIndicator", "text[]"),
+    ("first_printing", "firstPrinting", "text"),
+    ("printings", "printings", "text[]"),
+    ("is_funny", "isFunny", "bool"),
+    ("is_game_changer", "isGameChanger", "bool"),
+    ("is_reserved", "isReserved", "bool"),
+    ("keywords", "keywords", "text[]"),
+    ("power", "power", "text"),
+    ("toughness", "toughness", "text"),
+    ("defense", "defense", "text"),
+    ("loyalty", "loyalty", "text"),
+    ("hand", "hand", "text"),
+    ("life", "life", "text"),
+    ("side", "side", "text"),
+    ("subsets", "subsets", "text[]"),
+    ("attraction_lights", "attractionLights", "int[]"),
+    ("face_converted_mana_cost", "faceConvertedManaCost", "float"),
+    ("face_mana_value", "faceManaValue", "float"),
+    ("face_name", "faceName", "text"),
+    ("edhrec_rank", "edhrecRank", "int"),
+    ("edhrec_saltiness", "edhrecSaltiness", "float"),
+    ("has_alternative_deck_limit", "hasAlternativeDeckLimit", "bool"),
+    ("identifiers", "identifiers", "jsonb"),
+    ("purchase_urls", "purchaseUrls", "jsonb"),
+    ("foreign_data", "foreignData", "jsonb"),
+    ("legalities", "legalities", "jsonb"),
+    ("rulings", "rulings", "jsonb"),
+    ("related_cards", "relatedCards", "jsonb"),
+    ("leadership_skills", "leadershipSkills", "jsonb"),
+]
+
+# Extra columns written when the file carries precomputed embeddings
+EMBEDDING_COLUMNS = [
+    ("embedding_of_text", "vector"),
+    ("text_hash", "text"),
+    ("embedding_model", "text"),
+]
+
 
 class ResetDatabase(metaclass=Singleton):
     """
@@ -34,133 +107,139 @@ class ResetDatabase(metaclass=Singleton):
             raise
         return True
 
-    def generate_insert_sql_many(
-        self, cards: list[dict], with_embeddings: bool = True
-    ) -> str:
+    @contextmanager
+    def open_source(self, source: str):
         """
-        Build a single INSERT INTO project.cards statement for many cards
+        Open a JSON file as a binary stream, from a local path or a URL
+
+        URLs are streamed: the body is read as the parser consumes it and never
+        held in memory as a whole.
+        """
+        if source.startswith(("http://", "https://")):
+            response = requests.get(source, stream=True, timeout=(5, 60))
+            try:
+                response.raise_for_status()
+                response.raw.decode_content = True
+                yield response.raw
+            finally:
+                response.close()
+        else:
+            with open(source, "rb") as f:
+                yield f
+
+    def iter_cards(self, stream) -> Iterator[dict]:
+        """Yield the first version of each card of an AtomicCards document"""
+        for _, versions in iter_object_items(stream, "data"):
+            if versions:
+                yield versions[0]
+
+    def card_to_row(
+        self,
+        card: dict,
+        with_embeddings: bool = True,
+        embedding_model: str = DEFAULT_MODEL,
+    ) -> list:
+        """
+        Convert a card of the JSON file into a row for COPY
 
         Parameters
         ----------
-        cards : list[dict]
-            List of card dictionaries
+        card : dict
+            Card as found in the JSON file
         with_embeddings : bool
-            If True, include embedding_of_text column
+            If True, add the embedding, text hash and model columns
+        embedding_model : str
+            Model recorded for precomputed embeddings
+
+        Returns
+        -------
+        list
+            One value per column, in the order of CARD_COLUMNS (+ EMBEDDING_COLUMNS)
         """
+        row = [card.get(key) for _, key, _ in CARD_COLUMNS]
+        if with_embeddings:
+            embedding = card.get("embedding_of_text")
+            if isinstance(embedding, list) and embedding:
+                row += [embedding, compute_text_hash(card.get("text")), embedding_model]
+            else:
+                row += [None, None, None]
+        return row
+
+    def copy_cards(
+        self,
+        cards: Iterator[dict],
+        with_embeddings: bool = True,
+        chunk_size: int = 2000,
+    ) -> int:
+        """
+        Load cards with binary COPY, committing every `chunk_size` cards
 
-        # Columns in the SQL table (order matters)
-        columns = [
-            "name",
-            "ascii_name",
-            "type",
-            "types",
-            "subtypes",
-            "supertypes",
-            "mana_cost",
-            "mana_value",
-            "converted_mana_cost",
-            "layout",
-            "text",
-            "colors",
-            "color_identity",
-            "color_indicator",
-            "first_printing",
-            "printings",
-            "is_funny",
-            "is_game_changer",
-            "is_reserved",
-            "keywords",
-            "power",
-            "toughness",
-            "defense",
-            "loyalty",
-            "hand",
-            "life",
-            "side",
-            "subsets",
-            "attraction_lights",
-            "face_converted_mana_cost",
-            "face_mana_value",
-            "face_name",
-            "edhrec_rank",
-            "edhrec_saltiness",
-            "has_alternative_deck_limit",
-            "identifiers",
-            "purchase_urls",
-            "foreign_data",
-            "legalities",
-            "rulings",
-            "related_cards",
-            "leadership_skills",
-        ]
-
+        Parameters
+        ----------
+        cards : Iterator[dict]
+            Cards as found in the JSON file
+        with_embeddings : bool
+            If True, load the precomputed embeddings as well
+        chunk_size : int
+            Number of cards per COPY and per commit (default: 2000)
+
+        Returns
+        -------
+        int
+            Number of inserted cards
+        """
+        columns = [column for column, _, _ in CARD_COLUMNS]
+        types = [pg_type for _, _, pg_type in CARD_COLUMNS]
         if with_embeddings:
-            columns.append("embedding_of_text")
-
-        # Map JSON keys → SQL column names when different
-        key_map = {
-            "ascii_name": "asciiName",
-            "mana_cost": "manaCost",
-            "mana_value": "manaValue",
-            "converted_mana_cost": "convertedManaCost",
-            "color_identity": "colorIdentity",
-            "color_indicator": "colorIndicator",
-            "first_printing": "firstPrinting",
-            "is_funny": "isFunny",
-            "is_game_changer": "isGameChanger",
-            "is_reserved": "isReserved",
-            "attraction_lights": "attractionLights",
-            "face_converted_mana_cost": "faceConvertedManaCost",
-            "face_mana_value": "faceManaValue",
-            "face_name": "faceName",
-            "edhrec_rank": "edhrecRank",
-            "edhrec_saltiness": "edhrecSaltiness",
-            "has_alternative_deck_limit": "hasAlternativeDeckLimit",
-            "purchase_urls": "purchaseUrls",
-            "foreign_data": "foreignData",
-            "related_cards": "relatedCards",
-            "leadership_skills": "leadershipSkills",
-            "embedding_of_text": "embedding_of_text",
-        }
-
-        all_values = []
-        for card in cards:
-            values = []
-            for col in columns:
-                key = key_map.get(col, col)  # map to JSON key if needed
-
-                # Special handling for embeddings
-                if col == "embedding_of_text" and key in card:
-                    embedding = card[key]
-                    if embedding is not None and isinstance(embedding, list):
-                        # Convert list to pgvector format: [0.1,0.2,0.3]
-                        embedding_str = "[" + ",".join(str(f) for f in embedding) + "]"
-                        values.append(f"'{embedding_str}'::vector")
-                    else:
-                        values.append("NULL")
-                else:
-                    values.append(sql_value_string(card.get(key)))
-
-            all_values.append(f"({', '.join(values)})")
-
-        sql = (
-            f"INSERT INTO project.cards (\n"
-            f"    {', '.join(columns)}\n"
-            f") VALUES\n"
-            f"{',\n'.join(all_values)}\n"
-            f";"
+            columns += [column for column, _ in EMBEDDING_COLUMNS]
+            types += [pg_type for _, pg_type in EMBEDDING_COLUMNS]
+        copy_sql = (
+            f"COPY project.cards ({', '.join(columns)}) "
+            "FROM STDIN WITH (FORMAT binary)"
         )
-        return sql
 
-    def launch(self, use_embeddings: bool = True, add_all_cards: bool = True):
+        rows = (self.card_to_row(card, with_embeddings) for card in cards)
+        inserted = 0
+        started = time.monotonic()
+        with DBConnection().connection as connection:
+            while True:
+                first = next(rows, None)
+                if first is None:
+                    break
+                chunk = itertools.chain([first], itertools.islice(rows, chunk_size - 1))
+                stream = BinaryCopyStream(chunk, types)
+                with connection.cursor() as cursor:
+                    cursor.copy_expert(copy_sql, stream)
+                connection.commit()
+
+                inserted += stream.rows_written
+                elapsed = time.monotonic() - started
+                rate = inserted / elapsed if elapsed > 0 else 0.0
+                print(f"💾 {inserted} cards inserted ({rate:.0f} cards/sec)")
+        return inserted
+
+    def launch(
+        self,
+        use_embeddings: bool = True,
+        add_all_cards: bool = True,
+        source: str | None = None,
+        chunk_size: int = 2000,
+    ):
         """
         Reset database and import cards
 
         Parameters
         ----------
         use_embeddings : bool
-            If True (default), download AtomicCardsWithEmbeddings.json WITH embeddings
-            If False, download AtomicCards.json WITHOUT embeddings
+            If True (default), import AtomicCardsWithEmbeddings.json WITH embeddings
+            If False, import AtomicCards.json WITHOUT embeddings
+        add_all_cards : bool
+            If False, only recreate the schema
+        source : str or None
+            Local path or URL of the JSON file (default: the SSPCloud file
+            matching `use_embeddings`)
+        chunk_size : int
+            Number of cards per COPY and per commit (default: 2000)
         """
 
         print("🚀 Resetting database")
@@ -171,62 +250,62 @@ class ResetDatabase(metaclass=Singleton):
         self.run_sql_string_sql(init_db_as_string)
         print("✅ Database initialized")
 
-        if add_all_cards:
-            # 2. Download cards from appropriate URL
-            if use_embeddings:
-                # Mode 1: Download WITH embeddings
-                url = "https://minio.lab.sspcloud.fr/thomasfr/AtomicCardsWithEmbeddings.json"
-                print(f"📦 Downloading cards from {url} (WITH embeddings ✨)")
-                with_embeddings = True
-            else:
-                # Mode 2: Download WITHOUT embeddings
-                url = "https://minio.lab.sspcloud.fr/thomasfr/AtomicCards.json"
-                print(f"📦 Downloading cards from {url} (WITHOUT embeddings)")
-                with_embeddings = False
-
-            try:
-                response = requests.get(url)
-                response.raise_for_status()
-                data = response.json()
-            except Exception as e:
-                print(f"❌ Error downloading from {url}: {e}")
-                return False
+        if not add_all_cards:
+            self.create_secondary_indexes()
+            return True
 
-            print(f"📊 Found {len(data['data'].keys())} unique card names")
-
-            # 3. Build one big INSERT for all cards (first version of each card)
-            all_cards = [versions[0] for _, versions in data["data"].items()]
-
-            print(f"💾 Preparing to insert {len(all_cards)} cards...")
-            sql_string = self.generate_insert_sql_many(
-                all_cards, with_embeddings=with_embeddings
-            )
+        # 2. Stream cards from the file or URL straight into COPY
+        if source is None:
+            source = URL_WITH_EMBEDDINGS if use_embeddings else URL_WITHOUT_EMBEDDINGS
+        embeddings_status = (
+            "WITH embeddings ✨" if use_embeddings else "WITHOUT embeddings"
+        )
+        print(f"📦 Loading cards from {source} ({embeddings_status})")
 
-            try:
-                self.run_sql_string_sql(sql_string)
-                embeddings_status = (
-                    "WITH embeddings ✨" if with_embeddings else "WITHOUT embeddings"
+        # The new table has no index yet: loading into an indexed table is
+        # slower, and IVFFlat centroids must be trained on the loaded vectors
+        try:
+            with self.open_source(source) as stream:
+                inserted = self.copy_cards(
+                    self.iter_cards(stream),
+                    with_embeddings=use_embeddings,
+                    chunk_size=chunk_size,
                 )
-                print(f"✅ All {len(all_cards)} cards inserted {embeddings_status}")
-                return True
-            except Exception as e:
-                print(f"❌ Could not insert all cards: {e}")
-                return False
+        except Exception as e:
+            print(f"❌ Could not insert all cards from {source}: {e}")
+            return False
+
+        print(f"✅ All {inserted} cards inserted {embeddings_status}")
+        self.create_secondary_indexes()
+        if use_embeddings:
+            VectorIndexDao().create()
+            print("✅ Vector indexes built")
+        else:
+            # compute_all_embeddings builds them once the cards are embedded
+            print("ℹ️  Vector indexes will be built by compute_all_embeddings")
+        return True
+
+    def create_secondary_indexes(self) -> None:
+        """Build the name and filter indexes of the cards (after the load)"""
+        with open("data/init_db_indexes.sql", encoding="utf-8") as f:
+            self.run_sql_string_sql(f.read())
+        print("✅ Secondary indexes built")
 
 
 def main(add_all_cards: bool = True):
     """Main function with argument parsing"""
     parser = argparse.ArgumentParser(
-        description="Reset database and import Magic cards from URL",
+        description="Reset database and import Magic cards from a file or URL",
         formatter_class=argparse.RawDescriptionHelpFormatter,
-        epilog="""
+        epilog=f"""
 Examples:
   python reset_all_the_database.py                  # Default: download with embeddings
   python reset_all_the_database.py --no-embeddings  # Download without embeddings
+  python reset_all_the_database.py --source AtomicCards.json --no-embeddings
 
 URLs used:
-  - With embeddings: https://minio.lab.sspcloud.fr/thomasfr/AtomicCardsWithEmbeddings.json
-  - Without embeddings: https://minio.lab.sspcloud.fr/thomasfr/AtomicCards.json
+  - With embeddings: {URL_WITH_EMBEDDINGS}
+  - Without embeddings: {URL_WITHOUT_EMBEDDINGS}
         """,
     )
 
@@ -235,6 +314,16 @@ URLs used:
         action="store_true",
         help="Download AtomicCards.json (without embeddings) instead of AtomicCardsWithEmbeddings.json",
     )
+    parser.add_argument(
+        "--source",
+        help="Local path or URL of the JSON file (default: SSPCloud URL)",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=2000,
+        help="Cards per COPY and per commit (default: 2000)",
+    )
 
     args = parser.parse_args()
 
@@ -242,11 +331,17 @@ URLs used:
     # With --no-embeddings: download WITHOUT embeddings
     use_embeddings = not args.no_embeddings
 
-    # Now we automatically call setup_pgvector.py
+    # Now we automatically call setup_pgvector.py; the schema is recreated
+    # right after, so indexes of the old tables are not built
     pgvector_setup = PgVectorSetup()
-    pgvector_setup.setup()
+    pgvector_setup.setup(indexes=False)
 
-    ResetDatabase().launch(use_embeddings=use_embeddings, add_all_cards=add_all_cards)
+    ResetDatabase().launch(
+        use_embeddings=use_embeddings,
+        add_all_cards=add_all_cards,
+        source=args.source,
+        chunk_size=args.chunk_size,
+    )
     # Now we automatically call init_user_tables.py
     utils.init_users_tables.main()
 
@@ -9,6 +9,8 @@ Usage:
 import os
 import dotenv
 from dao.db_connection import DBConnection
+from dao.vector_index_dao import VectorIndexDao
+from technical_components.embedding.embedding_client import DEFAULT_MODEL
 
 
 class PgVectorSetup:
@@ -79,23 +81,73 @@ class PgVectorSetup:
             return True
         return False
 
-    def create_index(self) -> bool:
-        """Create an index to speed up similarity searches"""
-        print(" Creating IVFFlat index to speed up searches...")
+    def add_embedding_tracking_columns(self) -> bool:
+        """Add the columns used to detect stale embeddings (existing databases)"""
+        print(" Adding text_hash and embedding_model columns...")
+        # Vectors already stored were computed from the current text by the
+        # default model: record it so they are not seen as stale
+        sql = f"""
+            ALTER TABLE project.cards
+            ADD COLUMN IF NOT EXISTS text_hash TEXT,
+            ADD COLUMN IF NOT EXISTS embedding_model TEXT;
 
-        # IVFFlat index for fast approximate searches
+            UPDATE project.cards
+            SET text_hash = md5(text), embedding_model = '{DEFAULT_MODEL}'
+            WHERE embedding_of_text IS NOT NULL AND text_hash IS NULL;
+        """
+        if self.run_query(sql):
+            print(" Embedding tracking columns ready")
+            return True
+        return False
+
+    def create_name_indexes(self) -> bool:
+        """Create the trigram indexes of the name search (existing databases)"""
+        print(" Creating name search indexes...")
         sql = """
-            CREATE INDEX IF NOT EXISTS cards_embedding_idx
-            ON project.cards
-            USING ivfflat (embedding_of_text vector_cosine_ops)
-            WITH (lists = 100);
+            CREATE EXTENSION IF NOT EXISTS pg_trgm;
+            CREATE INDEX IF NOT EXISTS cards_name_trgm_idx
+            ON project.cards USING GIN (lower(name) gin_trgm_ops);
+            CREATE INDEX IF NOT EXISTS cards_ascii_name_trgm_idx
+            ON project.cards USING GIN (lower(ascii_name) gin_trgm_ops);
         """
+        if self.run_query(sql):
+            print(" Name search indexes ready")
+            return True
+        return False
 
+    def create_filter_indexes(self) -> bool:
+        """Create the indexes of the hybrid search filters (existing databases)"""
+        print(" Creating filter indexes...")
+        sql = """
+            CREATE INDEX IF NOT EXISTS cards_colors_idx
+            ON project.cards USING GIN (colors);
+            CREATE INDEX IF NOT EXISTS cards_color_identity_idx
+            ON project.cards USING GIN (color_identity);
+            CREATE INDEX IF NOT EXISTS cards_types_idx
+            ON project.cards USING GIN (types);
+            CREATE INDEX IF NOT EXISTS cards_keywords_idx
+            ON project.cards USING GIN (keywords);
+            CREATE INDEX IF NOT EXISTS cards_legalities_idx
+            ON project.cards USING GIN (legalities jsonb_path_ops);
+            CREATE INDEX IF NOT EXISTS cards_mana_value_idx
+            ON project.cards (mana_value);
+        """
         if self.run_query(sql):
-            print(" Index successfully created")
+            print(" Filter indexes ready")
             return True
         return False
 
+    def create_index(self) -> bool:
+        """Create the indexes that speed up similarity searches"""
+        print(" Creating vector indexes to speed up searches...")
+        try:
+            VectorIndexDao().rebuild()
+        except Exception as e:
+            print(f" SQL Error: {e}")
+            return False
+        print(" Indexes successfully created")
+        return True
+
     def test_pgvector(self) -> bool:
         """Test that pgvector works"""
         print(" Testing pgvector...")
@@ -123,8 +175,16 @@ class PgVectorSetup:
         print(" pgvector is working correctly")
         return True
 
-    def setup(self):
-        """Execute the entire configuration"""
+    def setup(self, indexes: bool = True):
+        """
+        Execute the entire configuration
+
+        Parameters
+        ----------
+        indexes : bool, optional
+            Also create the name, filter and vector indexes; False when the
+            schema is about to be recreated (default: True)
+        """
         print("\n" + "=" * 60)
         print(" PGVECTOR CONFIGURATION")
         print("=" * 60 + "\n")
@@ -132,9 +192,15 @@ class PgVectorSetup:
         steps = [
             ("Extension activation", self.enable_pgvector),
             ("Column type modification", self.modify_embedding_column),
-            ("Index creation", self.create_index),
-            ("Tests", self.test_pgvector),
+            ("Embedding tracking columns", self.add_embedding_tracking_columns),
         ]
+        if indexes:
+            steps += [
+                ("Name search indexes", self.create_name_indexes),
+                ("Filter indexes", self.create_filter_indexes),
+                ("Index creation", self.create_index),
+            ]
+        steps.append(("Tests", self.test_pgvector))
 
         for step_name, step_func in steps:
             if not step_func():
@@ -0,0 +1,116 @@
+"""
+Conversion of pgvector `vector` values between Python and PostgreSQL
+
+- Reading: a typecaster registered on every pooled connection turns vector
+  columns into float32 NumPy arrays (lists of floats without NumPy). Bulk
+  readers select `vector_send(col)` instead, which comes back as the binary
+  wire format and is decoded with `decode_vector_binary` without any parsing.
+- Writing: wrap values in `Vector` (NumPy arrays are adapted automatically)
+  to send them as a vector literal; bulk writers use binary COPY with
+  `encode_vector`.
+"""
+
+import struct
+
+import psycopg2.extensions
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+# 9 significant digits are enough to round-trip any float32
+_FLOAT_FORMAT = "%.9g"
+_formats = {}
+
+
+def encode_vector(values) -> bytes:
+    """Binary wire format: dimension (int16), unused (int16), float4 values"""
+    if np is not None:
+        array = np.asarray(values, dtype=">f4")
+        return struct.pack("!hh", len(array), 0) + array.tobytes()
+    return struct.pack(f"!hh{len(values)}f", len(values), 0, *values)
+
+
+def decode_vector_binary(data):
+    """Decode the output of vector_send (bytes or memoryview)"""
+    if data is None:
+        return None
+    if np is not None:
+        return np.frombuffer(data, dtype=">f4", offset=4).astype(np.float32)
+    (dimension,) = struct.unpack_from("!h", data)
+    return list(struct.unpack_from(f"!{dimension}f", data, 4))
+
+
+def to_vector_literal(values) -> str:
+    """Text form '[0.1,0.2,...]', float32 precision"""
+    if np is not None:
+        values = np.asarray(values, dtype=np.float32).tolist()
+    else:
+        values = [float(value) for value in values]
+    fmt = _formats.get(len(values))
+    if fmt is None:
+        fmt = _formats.setdefault(len(values), ",".join([_FLOAT_FORMAT] * len(values)))
+    return "[" + (fmt % tuple(values)) + "]"
+
+
+def decode_vector(text: str | None, cursor=None):
+    """Typecaster of the vector type: '[0.1,0.2]' -> float32 array"""
+    if text is None:
+        return None
+    if np is not None:
+        return np.fromstring(text[1:-1], dtype=np.float32, sep=",")
+    return [float(value) for value in text[1:-1].split(",")]
+
+
+class Vector:
+    """
+    Query parameter holding a pgvector value
+
+    Example
+    -------
+    >>> cursor.execute("SELECT %s <-> %s", (Vector([1, 2]), Vector([2, 3])))
+    """
+
+    def __init__(self, values):
+        self.values = values
+
+    def __conform__(self, protocol):
+        if protocol is psycopg2.extensions.ISQLQuote:
+            return self
+
+    def getquoted(self) -> bytes:
+        return f"'{to_vector_literal(self.values)}'::vector".encode("ascii")
+
+
+def _adapt_ndarray(array):
+    if array.ndim == 1:
+        return Vector(array)
+    # Other arrays keep psycopg2's default behaviour (ARRAY[...])
+    return psycopg2.extensions.adapt(array.tolist())
+
+
+psycopg2.extensions.register_adapter(Vector, lambda vector: vector)
+if np is not None:
+    psycopg2.extensions.register_adapter(np.ndarray, _adapt_ndarray)
+
+
+def register_vector(connection) -> bool:
+    """
+    Register the vector typecaster on a connection
+
+    Returns
+    -------
+    bool
+        False if the vector extension is not installed in the database
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT to_regtype('vector')::oid AS oid")
+        row = cursor.fetchone()
+    connection.rollback()
+    oid = row["oid"] if isinstance(row, dict) else row[0]
+    if oid is None:
+        return False
+    vector_type = psycopg2.extensions.new_type((oid,), "VECTOR", decode_vector)
+    psycopg2.extensions.register_type(vector_type, connection)
+    return True
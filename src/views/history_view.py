@@ -90,8 +90,8 @@ class HistoryView(AbstractView):
                 print(f"   Results: {search.result_count}")
                 print(f"   Date: {search.created_at.strftime('%d/%m/%Y %H:%M:%S')}")
 
-                if search.query_embedding:
-                    print(f"   Embedding: {len(search.query_embedding)} dimensions")
+                if search.has_embedding:
+                    print(f"   Embedding: {search.embedding_dimensions} dimensions")
                 else:
                     print(f"   Embedding: None")
 
@@ -124,6 +124,7 @@ class HistoryView(AbstractView):
                 ["Total Searches", stats["total_searches"]],
                 ["Total Results Found", stats["total_results"]],
                 ["Average Results per Search", f"{stats['avg_results']:.2f}"],
+                ["Searches Without Results", f"{stats['zero_result_rate']:.0%}"],
                 [
                     "Most Recent Search",
                     stats["most_recent"].strftime("%d/%m/%Y %H:%M:%S"),
@@ -133,13 +134,24 @@ class HistoryView(AbstractView):
 
             print(tabulate(stats_table, headers=["Metric", "Value"], tablefmt="grid"))
 
+            if stats["top_queries"]:
+                print("\n🔁 Most repeated searches:")
+                print(
+                    tabulate(
+                        [[q["query"], q["count"]] for q in stats["top_queries"]],
+                        headers=["Query", "Times"],
+                        tablefmt="simple",
+                    )
+                )
+
             print(f"\n📈 Analysis:")
-            if stats["total_searches"] > 0:
-                avg_results = stats["total_results"] / stats["total_searches"]
-                print(f"   • You average {avg_results:.1f} results per search")
+            print(f"   • You average {stats['avg_results']:.1f} results per search")
+            if stats["max_results"] is not None:
                 print(
-                    f"   • Your most productive search found {int(max(10, stats['avg_results']))} results"
+                    f"   • Your most productive search found {stats['max_results']} results"
                 )
+            recent = sum(day["count"] for day in stats["searches_per_day"])
+            print(f"   • {recent} searches over the last 30 days")
 
         except Exception as e:
             self.show_message(f"❌ Error retrieving statistics: {e}")
@@ -172,20 +184,13 @@ class HistoryView(AbstractView):
                 if search_id == 0:
                     return
 
-                # Vérifier que la recherche appartient à l'utilisateur
-                found = any(s.id == search_id for s in history)
-                if not found:
+                # Supprimer (seulement si la recherche appartient à l'utilisateur)
+                if self.history_service.delete_search_for_user(search_id, self.user.id):
+                    self.show_message(f"✅ Search #{search_id} deleted successfully!")
+                else:
                     self.show_message(
                         f"❌ Search ID {search_id} not found in your history"
                     )
-                    input("\nPress Enter to continue...")
-                    return
-
-                # Supprimer
-                if self.history_service.delete_search(search_id):
-                    self.show_message(f"✅ Search #{search_id} deleted successfully!")
-                else:
-                    self.show_message(f"❌ Failed to delete search #{search_id}")
 
             except ValueError:
                 self.show_message("❌ Please enter a valid number")
@@ -245,11 +250,9 @@ class HistoryView(AbstractView):
                     return
 
                 # Trouver la recherche
-                search_to_repeat = None
-                for s in history:
-                    if s.id == search_id:
-                        search_to_repeat = s
-                        break
+                search_to_repeat = self.history_service.find_search_for_user(
+                    search_id, self.user.id
+                )
 
                 if not search_to_repeat:
                     self.show_message(f"❌ Search ID {search_id} not found")
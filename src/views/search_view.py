@@ -33,13 +33,25 @@ class SearchView(AbstractView):
             choice = self.get_input()
 
             if choice == "1":
-                result = card_service.random()
-                self.show_message(result)
-                if hasattr(result, "is_truncated") and result.is_truncated:
-                    choice = input("\nText has been truncated. See full text? (y/n): ")
-                    if choice.lower() == "y":
-                        print("\n=== Full text ===")
-                        print(result.text)
+                count_input = self.get_input("How many cards? (default = 1): ")
+                try:
+                    count = int(count_input) if count_input.strip() else 1
+                except ValueError:
+                    count = 1
+
+                if count <= 1:
+                    result = card_service.random()
+                    self.show_message(result)
+                    if hasattr(result, "is_truncated") and result.is_truncated:
+                        choice = input(
+                            "\nText has been truncated. See full text? (y/n): "
+                        )
+                        if choice.lower() == "y":
+                            print("\n=== Full text ===")
+                            print(result.text)
+                else:
+                    for card in card_service.random_cards(min(count, 100)):
+                        self.show_message(card)
                 self.pause()
 
             elif choice == "2":